@@ -0,0 +1,83 @@
+"""Benchmark TaskStorage.load() before and after the Task.from_dict fast path.
+
+Usage: python benchmarks/bench_load.py [SIZE ...]   (default: 100000 1000000)
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, TaskPriority, TaskStatus
+from storage import TaskStorage, TaskDecoder
+
+
+class LegacyTaskDecoder(json.JSONDecoder):
+    """The decoder as it was before Task.from_dict: builds each task via __init__."""
+
+    def __init__(self, *args, **kwargs):
+        json.JSONDecoder.__init__(self, object_hook=self.object_hook, *args, **kwargs)
+
+    def object_hook(self, obj):
+        if 'id' in obj and 'title' in obj:
+            task = Task(obj['title'], obj.get('description', ''))
+            task.id = obj['id']
+            task.priority = TaskPriority(obj['priority'])
+            task.status = TaskStatus(obj['status'])
+            for key in ['created_at', 'updated_at', 'completed_at']:
+                if obj.get(key):
+                    setattr(task, key, datetime.fromisoformat(obj[key]))
+            if obj.get('due_date'):
+                task.due_date = datetime.fromisoformat(obj['due_date'])
+            task.tags = obj.get('tags', [])
+            return task
+        return obj
+
+
+def write_store(path, size):
+    now = datetime.now()
+    tasks = []
+    for i in range(size):
+        task = Task(f"Task {i}", f"Description {i}", TaskPriority(i % 4 + 1),
+                    now + timedelta(days=i % 30 - 10), [f"tag{i % 7}", "bench"])
+        if i % 5 == 0:
+            task.mark_as_done()
+        tasks.append(task.to_dict())
+    with open(path, 'w') as f:
+        json.dump(tasks, f)
+
+
+def time_decode(path, decoder):
+    start = time.perf_counter()
+    with open(path) as f:
+        json.load(f, cls=decoder)
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print("TaskStorage.load() throughput")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = os.path.join(tmp_dir, f"tasks_{size}.json")
+            write_store(path, size)
+
+            before = time_decode(path, LegacyTaskDecoder)
+            after = time_decode(path, TaskDecoder)
+            start = time.perf_counter()
+            TaskStorage(path)
+            full_load = time.perf_counter() - start
+
+            print(f"\n{size} tasks:")
+            print(f"  decode before: {before:.2f}s ({size / before:,.0f} tasks/s)")
+            print(f"  decode after:  {after:.2f}s ({size / after:,.0f} tasks/s)")
+            print(f"  speedup:       {before / after:.2f}x")
+            print(f"  TaskStorage(): {full_load:.2f}s including index build")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure the memory held by N decoded tasks for each task class.
+
+Usage: python benchmarks/bench_memory.py [SIZE]   (default: 1000000)
+"""
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, CompactTask, EpochTask, TaskPriority, TupleTagsTask
+
+
+def make_records(size):
+    now = datetime.now()
+    for i in range(size):
+        # Fresh tag strings per record, as the JSON decoder produces them.
+        tags = ["tag" + str(i % 7), "".join(["ben", "ch"])]
+        yield Task(f"Task {i}", "", TaskPriority(i % 4 + 1),
+                   now + timedelta(days=i % 30), tags).to_dict()
+
+
+def measure(task_class, size):
+    gc.collect()
+    tracemalloc.start()
+    tasks = {}
+    for record in make_records(size):
+        task = task_class.from_dict(record)
+        tasks[task.id] = task
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return current
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Memory held by {size} tasks (tracemalloc)")
+    print("=" * 40)
+    baseline = None
+    for task_class in [Task, CompactTask, TupleTagsTask, EpochTask]:
+        used = measure(task_class, size)
+        baseline = baseline or used
+        print(f"{task_class.__name__:>14}: {used / 2**20:8.1f} MiB "
+              f"({used / size:.0f} B/task, {used / baseline:.0%} of Task)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark process-pool ranking: the single-process top_tasks() and
+sort_tasks_by_importance() against task_parallel with 1, 2, 4, ... workers
+up to the CPU count, for in-memory tasks and for a binary store whose
+workers read their own shards.
+
+Usage: python benchmarks/bench_parallel.py [SIZE ...]   (default: 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scoring import make_tasks
+from binary_storage import write_binary
+from models import EpochTask
+from task_parallel import parallel_rank, rank_binary_file
+from task_priority import score_tasks, top_tasks
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def worker_counts():
+    counts, workers = [], 1
+    while workers < (os.cpu_count() or 1):
+        counts.append(workers)
+        workers *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000]
+    print(f"Process-pool ranking ({os.cpu_count()} CPUs)")
+    print("=" * 40)
+    for size in sizes:
+        tasks = make_tasks(size)
+        now = datetime.now()
+        print(f"\n{size} tasks:")
+
+        serial, top = timed(lambda: top_tasks(tasks, 100, now))
+        print(f"  top 100, top_tasks:               {serial:.2f}s ({size / serial / 1e6:.2f}M tasks/s)")
+        for workers in worker_counts():
+            elapsed, result = timed(lambda: parallel_rank(tasks, 100, now, workers=workers))
+            assert result == top
+            print(f"  top 100, {workers:>2} workers:              {elapsed:.2f}s ({size / elapsed / 1e6:.2f}M tasks/s)")
+
+        def sort_all():
+            scores = score_tasks(tasks, now)
+            return [tasks[i] for i in sorted(range(size), key=scores.__getitem__, reverse=True)]
+
+        serial, ranking = timed(sort_all)
+        print(f"  full ranking, one process:        {serial:.2f}s")
+        for workers in worker_counts():
+            elapsed, result = timed(lambda: parallel_rank(tasks, None, now, workers=workers))
+            assert result == ranking
+            print(f"  full ranking, {workers:>2} workers:         {elapsed:.2f}s")
+
+        epoch_tasks = []
+        for task in tasks:
+            copy = EpochTask(task.title, priority=task.priority, due_date=task.due_date, tags=task.tags)
+            copy.status, copy.updated_at = task.status, task.updated_at
+            epoch_tasks.append(copy)
+        serial, top = timed(lambda: top_tasks(epoch_tasks, 100, now))
+        print(f"  top 100 of EpochTasks, top_tasks:  {serial:.2f}s ({size / serial / 1e6:.2f}M tasks/s)")
+        for workers in worker_counts():
+            elapsed, result = timed(lambda: parallel_rank(epoch_tasks, 100, now, workers=workers))
+            assert result == top
+            print(f"  top 100 of EpochTasks, {workers:>2} workers: {elapsed:.2f}s ({size / elapsed / 1e6:.2f}M tasks/s)")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "tasks.tbin")
+            write_binary(path, tasks)
+            for workers in worker_counts():
+                elapsed, _ = timed(lambda: rank_binary_file(path, 100, now, workers=workers))
+                print(f"  top 100 from .tbin, {workers:>2} workers:   {elapsed:.2f}s ({size / elapsed / 1e6:.2f}M tasks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark scoring profiles: a compiled ScoringProfile against the same
+scoring written out by hand with its constants inline, per task, in a batch
+and for the top 5. The compiled path should be as fast as the hand-written
+one, for the default profile and for one loaded from config alike.
+
+Usage: python benchmarks/bench_profiles.py [SIZE ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from heapq import heappush, heapreplace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scoring import make_tasks
+from task_priority import DEFAULT_PROFILE, ScoringProfile, top_tasks
+
+# The same weights as DEFAULT_PROFILE, in config form.
+CONFIG = {
+    "priority_weights": {"low": 1, "medium": 2, "high": 4, "urgent": 6},
+    "due_date_bands": [[0, 35], [1, 20], [3, 15], [8, 10]],
+    "status_adjustments": {"done": -50, "review": -15},
+    "boost_tags": ["blocker", "critical", "urgent"],
+    "tag_boost": 8,
+    "recent_update_boost": 5,
+}
+
+
+def handwritten_score(task, now):
+    """The default scoring with every constant written into the code."""
+    score = (10, 20, 40, 60)[task.priority._value_ - 1]
+    status = task.status._value_
+    if status == "done":
+        score -= 50
+    elif status == "review":
+        score -= 15
+    if task.due_date is not None:
+        days_until_due = (task.due_date - now).days
+        if days_until_due < 0:
+            score += 35
+        elif days_until_due < 1:
+            score += 20
+        elif days_until_due < 3:
+            score += 15
+        elif days_until_due < 8:
+            score += 10
+    if "blocker" in task.tags or "critical" in task.tags or "urgent" in task.tags:
+        score += 8
+    if (now - task.updated_at).days < 1:
+        score += 5
+    return score
+
+
+def handwritten_score_tasks(tasks, now):
+    """handwritten_score's batch loop, its cut-offs worked out once."""
+    cutoffs = (now, now + timedelta(days=1), now + timedelta(days=3), now + timedelta(days=8))
+    updated_since = now - timedelta(days=1)
+    boost_tags = frozenset(["blocker", "critical", "urgent"])
+    scores = []
+    append = scores.append
+    for task in tasks:
+        score = (10, 20, 40, 60)[task.priority._value_ - 1]
+        status = task.status._value_
+        if status == "done":
+            score -= 50
+        elif status == "review":
+            score -= 15
+        due_date = task.due_date
+        if due_date is not None:
+            score += (35, 20, 15, 10, 0)[bisect_right(cutoffs, due_date)]
+        if not boost_tags.isdisjoint(task.tags):
+            score += 8
+        if task.updated_at > updated_since:
+            score += 5
+        append(score)
+    return scores
+
+
+def handwritten_top(tasks, limit, now):
+    heap = []
+    for position, (task, score) in enumerate(zip(tasks, handwritten_score_tasks(tasks, now))):
+        if len(heap) < limit:
+            heappush(heap, (score, -position, task))
+        elif score > heap[0][0]:
+            heapreplace(heap, (score, -position, task))
+    return [task for _, _, task in sorted(heap, reverse=True)]
+
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    configured = ScoringProfile.from_dict(CONFIG, "configured")
+    print("Scoring profiles (best of 3)")
+    print("=" * 40)
+    for size in sizes:
+        tasks = make_tasks(size)
+        now = datetime.now()
+        print(f"\n{size} tasks:")
+
+        hand, expected = timed(lambda: [handwritten_score(task, now) for task in tasks])
+        print(f"  per task, hand-written:        {hand:.2f}s")
+        for label, profile in [("default", DEFAULT_PROFILE), ("from config", configured)]:
+            compiled, scores = timed(lambda: [profile.score(task, now) for task in tasks])
+            assert scores == expected
+            print(f"  per task, profile {label + ':':<12} {compiled:.2f}s ({compiled / hand:.2f}x)")
+
+        hand, expected = timed(lambda: handwritten_score_tasks(tasks, now))
+        print(f"  batch, hand-written:           {hand:.2f}s")
+        for label, profile in [("default", DEFAULT_PROFILE), ("from config", configured)]:
+            compiled, scores = timed(lambda: profile.score_tasks(tasks, now))
+            assert scores == expected
+            print(f"  batch, profile {label + ':':<15} {compiled:.2f}s ({compiled / hand:.2f}x)")
+
+        hand, expected = timed(lambda: handwritten_top(tasks, 5, now))
+        print(f"  top 5, hand-written:           {hand:.2f}s")
+        compiled, top = timed(lambda: top_tasks(tasks, 5, now, configured))
+        assert top == expected
+        print(f"  top 5, profile from config:    {compiled:.2f}s ({compiled / hand:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark task scoring: calculate_task_score per task, as it is and as it
+was before batch scoring, against the score_tasks() loop and the
+column-wise score_table(); then the top 5 by a full sort against top_tasks().
+
+Usage: python benchmarks/bench_scoring.py [SIZE ...]   (default: 100000 1000000)
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, TaskPriority, TaskStatus
+from task_priority import calculate_task_score, score_table, score_tasks, top_tasks
+from task_table import TaskTable, np
+
+
+def legacy_calculate_task_score(task):
+    """calculate_task_score as it was before batch scoring: rebuilds its
+    weights and reads the clock twice per task."""
+    priority_weights = {
+        TaskPriority.LOW: 1,
+        TaskPriority.MEDIUM: 2,
+        TaskPriority.HIGH: 4,
+        TaskPriority.URGENT: 6
+    }
+    score = priority_weights.get(task.priority, 0) * 10
+    if task.due_date:
+        days_until_due = (task.due_date - datetime.now()).days
+        if days_until_due < 0:
+            score += 35
+        elif days_until_due == 0:
+            score += 20
+        elif days_until_due <= 2:
+            score += 15
+        elif days_until_due <= 7:
+            score += 10
+    if task.status == TaskStatus.DONE:
+        score -= 50
+    elif task.status == TaskStatus.REVIEW:
+        score -= 15
+    if any(tag in ["blocker", "critical", "urgent"] for tag in task.tags):
+        score += 8
+    days_since_update = (datetime.now() - task.updated_at).days
+    if days_since_update < 1:
+        score += 5
+    return score
+
+
+def make_tasks(size):
+    rng = random.Random(1)
+    now = datetime.now()
+    tasks = []
+    for i in range(size):
+        task = Task(f"Task {i}", priority=TaskPriority(i % 4 + 1),
+                    due_date=now + timedelta(hours=rng.randint(-300, 300)) if i % 3 else None,
+                    tags=["backend", "urgent"] if i % 11 == 0 else ["backend"])
+        task.status = list(TaskStatus)[i % 4]
+        task.updated_at = now - timedelta(hours=rng.randint(0, 60))
+        tasks.append(task)
+    return tasks
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print("Task scoring")
+    print("=" * 40)
+    for size in sizes:
+        tasks = make_tasks(size)
+        legacy, _ = timed(lambda: [legacy_calculate_task_score(task) for task in tasks])
+        scalar, expected = timed(lambda: [calculate_task_score(task) for task in tasks])
+        batch, scores = timed(lambda: score_tasks(tasks))
+        assert scores == expected
+        print(f"\n{size} tasks:")
+        print(f"  calculate_task_score (before): {legacy:.2f}s")
+        print(f"  calculate_task_score:          {scalar:.2f}s ({legacy / scalar:.1f}x)")
+        print(f"  score_tasks:                   {batch:.2f}s ({legacy / batch:.1f}x)")
+        if np is not None:
+            table = TaskTable()
+            table.rebuild(tasks)
+            columnar, scores = timed(lambda: score_table(table))
+            assert scores.tolist() == expected
+            print(f"  score_table:                   {columnar:.3f}s ({legacy / columnar:.0f}x)")
+
+        now = datetime.now()
+
+        def sort_then_slice():
+            scored = [(calculate_task_score(task, now), task) for task in tasks]
+            return [task for _, task in sorted(scored, key=lambda pair: pair[0], reverse=True)[:5]]
+
+        full_sort, expected = timed(sort_then_slice)
+        heap, top = timed(lambda: top_tasks(iter(tasks), 5, now))
+        assert top == expected
+        print(f"  top 5, score and sort all:     {full_sort:.2f}s")
+        print(f"  top 5, top_tasks:              {heap:.2f}s ({full_sort / heap:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark the full-text TextIndex: build, save/load and query latency.
+
+Usage: python benchmarks/bench_search.py [SIZE ...]   (default: 100000 1000000)
+"""
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task
+from text_index import TextIndex
+
+VOCABULARY = [f"word{i}" for i in range(50_000)]
+QUERIES = ["word123", "word123 word77", "word123 OR word4567", "word12345*", "tag3 word5"]
+
+
+def make_tasks(size):
+    rng = random.Random(1)
+    return [Task(" ".join(rng.choices(VOCABULARY, k=4)), " ".join(rng.choices(VOCABULARY, k=8)),
+                 tags=[f"tag{i % 20}"]) for i in range(size)]
+
+
+def query_latency(index, query, runs=50):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        index.search(query, limit=20)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print("TextIndex")
+    print("=" * 40)
+    for size in sizes:
+        tasks = make_tasks(size)
+        index = TextIndex()
+        start = time.perf_counter()
+        index.rebuild(tasks)
+        build = time.perf_counter() - start
+
+        saved = io.BytesIO()
+        index.save(saved)
+        saved.seek(0)
+        start = time.perf_counter()
+        loaded = TextIndex.load(saved)
+        loaded.rebuild(tasks)
+        reload = time.perf_counter() - start
+
+        print(f"\n{size} tasks:")
+        print(f"  build:             {build:.2f}s")
+        print(f"  load saved + sync: {reload:.2f}s ({len(saved.getvalue()) / 1e6:.0f} MB on disk)")
+        for query in QUERIES:
+            print(f"  {query!r:<24} {query_latency(index, query):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
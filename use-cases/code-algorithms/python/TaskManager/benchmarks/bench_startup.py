@@ -0,0 +1,74 @@
+"""Benchmark cli.py startup: wall time per command and what it imports.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS]
+
+Exits with status 1 if the median `--help` time is over --budget-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+
+COMMANDS = [
+    ("--help", ["--help"]),
+    ("parse error", ["no-such-command"]),
+    ("list (empty store)", ["--no-daemon", "list"]),
+]
+
+
+def time_command(argv, cwd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=cwd,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def import_times(argv, cwd, top=8):
+    """The slowest imports reported by `python -X importtime`, cumulative µs."""
+    result = subprocess.run([sys.executable, "-X", "importtime", CLI] + argv, cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    options = parser.parse_args()
+
+    print("cli.py startup (median wall time)")
+    print("=" * 40)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        interpreter = time_command(["-c", "pass"], tmp_dir, options.runs)
+        print(f"  {'python -c pass':<20} {interpreter:7.1f} ms")
+        for label, argv in COMMANDS:
+            results[label] = time_command([CLI] + argv, tmp_dir, options.runs)
+            print(f"  {label:<20} {results[label]:7.1f} ms")
+
+        for label, argv in COMMANDS:
+            print(f"\nSlowest imports for {label}:")
+            for cumulative, name in import_times(argv, tmp_dir):
+                print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+    if options.budget_ms is not None and results["--help"] > options.budget_ms:
+        print(f"\n--help took {results['--help']:.1f} ms, over the {options.budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+# task_manager/binary_storage.py
+"""Compact binary task file with random access by id.
+
+Layout (all integers little-endian):
+
+    header   magic, version, flags, task count, hash slot count and the
+             offsets of the slots, records and heap sections
+    slots    open-addressing hash table of (id hash, record offset) pairs
+    order    record positions sorted by id, for id prefix lookups; present
+             when the flags have ID_ORDER set (files written before it
+             existed lack it)
+    records  one fixed-width record per task: priority, status, four
+             timestamps as int64 epoch microseconds, and (offset, length)
+             references into the heap for id, title, description and tags
+    heap     UTF-8 strings; tags are stored as length-prefixed strings
+
+Reading one task touches the header, one slot, one record and its heap
+strings, so a lookup costs a handful of page reads however big the file
+is.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+
+from models import Task, TaskPriority, TaskStatus, to_epoch, from_epoch
+from storage import TaskStorage, TaskEncoder, TaskDecoder, atomic_write
+
+MAGIC = b"TASKBIN\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQQQ")
+SLOT = struct.Struct("<QQ")
+FIXED_FIELDS = "<BB4q"
+RECORD = struct.Struct(FIXED_FIELDS + "QI" * 4)
+# The id reference comes first after the fixed-width fields.
+ID_REF = struct.Struct("<QI")
+ID_REF_OFFSET = struct.calcsize(FIXED_FIELDS)
+LENGTH = struct.Struct("<I")
+# The fields of a record that a score and its tie-break read: priority,
+# status, created, updated and due times, the id and the tags.
+SCORING_FIELDS = struct.Struct("<BBqqq8xQI24xQI")
+POSITION = struct.Struct("<I")
+
+# Header flags.
+ID_ORDER = 1
+
+STATUSES = list(TaskStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+PRIORITIES = {priority.value: priority for priority in TaskPriority}
+
+
+def _id_hash(task_id):
+    # 0 marks an empty slot, so real hashes are forced to be non-zero.
+    digest = hashlib.blake2b(task_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def write_binary(path, tasks):
+    """Write `tasks` to `path` in the binary format, atomically."""
+    tasks = list(tasks)
+    slot_count = 8
+    while slot_count < 2 * len(tasks):
+        slot_count *= 2
+
+    order = sorted(range(len(tasks)), key=lambda position: tasks[position].id)
+    slots_offset = HEADER.size
+    records_offset = slots_offset + slot_count * SLOT.size + len(order) * POSITION.size
+    heap_offset = records_offset + len(tasks) * RECORD.size
+
+    heap = bytearray()
+
+    def put(data):
+        start = len(heap)
+        heap.extend(data)
+        return start, len(data)
+
+    records = bytearray()
+    slots = bytearray(slot_count * SLOT.size)
+    mask = slot_count - 1
+    for position, task in enumerate(tasks):
+        tags = b"".join(LENGTH.pack(len(tag)) + tag
+                        for tag in (tag.encode() for tag in task.tags))
+        id_ref = put(task.id.encode())
+        records.extend(RECORD.pack(
+            task.priority.value, STATUS_CODES[task.status],
+            to_epoch(task.created_at), to_epoch(task.updated_at),
+            to_epoch(task.due_date), to_epoch(task.completed_at),
+            *id_ref, *put(task.title.encode()), *put((task.description or "").encode()), *put(tags)
+        ))
+
+        id_hash = _id_hash(task.id)
+        slot = id_hash & mask
+        while SLOT.unpack_from(slots, slot * SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(slots, slot * SLOT.size, id_hash,
+                       records_offset + position * RECORD.size)
+
+    def write(f):
+        f.write(HEADER.pack(MAGIC, VERSION, ID_ORDER, len(tasks), slot_count,
+                            slots_offset, records_offset, heap_offset))
+        f.write(slots)
+        f.write(struct.pack(f"<{len(order)}I", *order))
+        f.write(records)
+        f.write(heap)
+
+    atomic_write(path, write, binary=True)
+
+
+class BinaryTaskFile:
+    """Read-only, memory-mapped view of a binary task file."""
+
+    def __init__(self, path, task_class=Task):
+        self.task_class = task_class
+        self.count = 0
+        self.map = None
+        self.order_offset = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, flags, self.count, self.slot_count, self.slots_offset,
+         self.records_offset, self.heap_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary task file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary task file version: {version}")
+        if flags & ID_ORDER:
+            self.order_offset = self.slots_offset + self.slot_count * SLOT.size
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+    def _string(self, offset, length):
+        start = self.heap_offset + offset
+        return self.map[start:start + length].decode()
+
+    def _tags(self, offset, length):
+        tags = []
+        position = self.heap_offset + offset
+        end = position + length
+        while position < end:
+            size, = LENGTH.unpack_from(self.map, position)
+            position += LENGTH.size
+            tags.append(self.map[position:position + size].decode())
+            position += size
+        return tags
+
+    def _read_record(self, offset):
+        (priority, status, created_at, updated_at, due_date, completed_at,
+         id_offset, id_length, title_offset, title_length,
+         description_offset, description_length,
+         tags_offset, tags_length) = RECORD.unpack_from(self.map, offset)
+        task = self.task_class.__new__(self.task_class)
+        task.id = self._string(id_offset, id_length)
+        task.title = self._string(title_offset, title_length)
+        task.description = self._string(description_offset, description_length)
+        task.priority = PRIORITIES[priority]
+        task.status = STATUSES[status]
+        task.created_at = from_epoch(created_at)
+        task.updated_at = from_epoch(updated_at)
+        task.due_date = from_epoch(due_date)
+        task.completed_at = from_epoch(completed_at)
+        task.tags = self._tags(tags_offset, tags_length)
+        return task
+
+    def get(self, task_id):
+        """Read one task by id without touching any other record."""
+        if not self.count:
+            return None
+        id_hash = _id_hash(task_id)
+        mask = self.slot_count - 1
+        slot = id_hash & mask
+        encoded_id = task_id.encode()
+        while True:
+            slot_hash, offset = SLOT.unpack_from(self.map, self.slots_offset + slot * SLOT.size)
+            if not slot_hash:
+                return None
+            if slot_hash == id_hash:
+                # Compare the stored id before decoding the whole record.
+                id_offset, id_length = ID_REF.unpack_from(self.map, offset + ID_REF_OFFSET)
+                start = self.heap_offset + id_offset
+                if self.map[start:start + id_length] == encoded_id:
+                    return self._read_record(offset)
+            slot = (slot + 1) & mask
+
+    def _id_at(self, rank):
+        # The encoded id of the rank-th task in id order.
+        position, = POSITION.unpack_from(self.map, self.order_offset + rank * POSITION.size)
+        offset = self.records_offset + position * RECORD.size + ID_REF_OFFSET
+        id_offset, id_length = ID_REF.unpack_from(self.map, offset)
+        start = self.heap_offset + id_offset
+        return self.map[start:start + id_length]
+
+    def ids_with_prefix(self, prefix, limit=None):
+        """Ids starting with `prefix` in sorted order, by binary search over
+        the order section; None if the file was written without one."""
+        if not self.count:
+            return []
+        if self.order_offset is None:
+            return None
+        # UTF-8 bytes sort in the same order as the strings they encode.
+        encoded = prefix.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_at(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        ids = []
+        while low < self.count and (limit is None or len(ids) < limit):
+            task_id = self._id_at(low)
+            if not task_id.startswith(encoded):
+                break
+            ids.append(task_id.decode())
+            low += 1
+        return ids
+
+    def read_at(self, position):
+        """The task in the position-th record, in file order."""
+        return self._read_record(self.records_offset + position * RECORD.size)
+
+    def project(self, start, stop, boost_tags):
+        """Records [start, stop) as a task_parallel projection, and a
+        (created_at, encoded id, position) key for each. No string is
+        decoded unless the raw tags hold one of `boost_tags`."""
+        begin = self.records_offset + start * RECORD.size
+        records = list(SCORING_FIELDS.iter_unpack(self.map[begin:self.records_offset + stop * RECORD.size]))
+        # Each tag is stored length-prefixed, so a task with a boost tag has
+        # its bytes in its tags; a match is confirmed by decoding them.
+        patterns = re.compile(b"|".join(re.escape(LENGTH.pack(len(tag)) + tag)
+                                        for tag in (tag.encode() for tag in boost_tags)) or b"(?!)")
+        data = self.map
+        heap = self.heap_offset
+        search = patterns.search
+        boosted = bytes([
+            1 if record[8] and search(data, heap + record[7], heap + record[7] + record[8])
+            and not boost_tags.isdisjoint(self._tags(record[7], record[8])) else 0
+            for record in records])
+        keys = [(record[2], data[heap + record[5]:heap + record[5] + record[6]], position)
+                for position, record in enumerate(records, start)]
+        projection = ([record[0] for record in records], [record[1] for record in records],
+                      [record[4] for record in records], [record[3] for record in records], boosted)
+        return projection, keys
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self.read_at(position)
+
+
+class BinaryTaskStorage(TaskStorage):
+    """TaskStorage kept in the binary format.
+
+    Opening the store only maps the file. get_task() reads single tasks
+    straight from the map; anything that needs the whole task set (lists,
+    statistics, mutations) loads it on first use and then behaves like the
+    JSON store, rewriting the binary file on save.
+    """
+
+    def __init__(self, storage_path="tasks.tbin", task_class=Task, read_only=False):
+        self.file = None
+        super().__init__(storage_path, task_class, read_only=read_only)
+
+    @property
+    def tasks(self):
+        if self._tasks is None:
+            self._tasks = {}
+            TaskStorage.load(self)
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, tasks):
+        self._tasks = tasks
+
+    def load(self):
+        # Only map the file; the tasks are read when first needed.
+        if self.file is not None:
+            self.file.close()
+        self.file = BinaryTaskFile(self.storage_path, self.task_class)
+        self._tasks = None
+
+    def read_store(self):
+        # Another process may have replaced the file since it was mapped.
+        self.file.close()
+        self.file = BinaryTaskFile(self.storage_path, self.task_class)
+        for task in self.file:
+            self._tasks[task.id] = task
+
+    def get_task(self, task_id):
+        if self._tasks is None:
+            # A detached copy; save() logs the stored task before replacing it.
+            task = self.file.get(task_id)
+        else:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                self._log_undo(task_id)
+        if task is None and task_id not in self._archive_removals:
+            task = self.archive.get(task_id)
+        return task
+
+    def _live_ids(self, prefix, limit):
+        if self._tasks is None:
+            ids = self.file.ids_with_prefix(prefix, limit)
+            if ids is not None:
+                return ids
+        self.tasks  # a file without the order section: use the loaded index
+        return super()._live_ids(prefix, limit)
+
+    def rank_tasks(self, limit=None, now=None, profile=None, workers=None):
+        """task_parallel ranking; until the store is loaded the workers
+        read their shards straight from the file."""
+        from task_parallel import parallel_rank, rank_binary_file
+        if self._tasks is None:
+            return rank_binary_file(self.storage_path, limit, now, profile, workers,
+                                    task_class=self.task_class)
+        return parallel_rank(self.iter_tasks_by_created(), limit, now, profile, workers)
+
+    def get_statistics(self, now=None):
+        self.tasks  # the counters are filled when the store is loaded
+        return super().get_statistics(now)
+
+    def save(self, task=None):
+        if task is not None and task.id in self.tasks and self.tasks[task.id] is not task:
+            # A detached copy read from the map before the store was loaded.
+            self._log_undo(task.id)
+            self.tasks[task.id] = task
+        super().save(task)
+
+    def snapshot_records(self):
+        return list(self.tasks.values())
+
+    def write_records(self, records):
+        write_binary(self.storage_path, records)
+        # The old map stays valid after the rename; swap to the new file.
+        self.file.close()
+        self.file = BinaryTaskFile(self.storage_path, self.task_class)
+
+
+def json_to_binary(json_path, binary_path, task_class=Task):
+    """Convert a tasks.json store to the binary format."""
+    with open(json_path) as f:
+        tasks = json.load(f, cls=TaskDecoder, task_class=task_class)
+    write_binary(binary_path, tasks)
+
+
+def binary_to_json(binary_path, json_path, task_class=Task):
+    """Convert a binary store back to tasks.json."""
+    source = BinaryTaskFile(binary_path, task_class)
+    try:
+        with open(json_path, "w") as f:
+            json.dump(list(source), f, cls=TaskEncoder, indent=2)
+    finally:
+        source.close()
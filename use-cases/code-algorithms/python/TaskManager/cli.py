@@ -1,87 +1,339 @@
 # task_manager/cli.py
 import argparse
-from datetime import datetime
+import os
+import sys
 
-from task_manager import TaskManager
-from models import TaskStatus, TaskPriority
+# Only what every run needs is imported here. Storage engines, the task
+# model and the daemon client are imported by the commands that use them,
+# so --help and argument errors never load a store or its modules.
+
+STATUS_CHOICES = ["todo", "in_progress", "review", "done"]
+PRIORITY_CHOICES = [1, 2, 3, 4]
+OUTPUT_FORMATS = ["text", "jsonl", "tsv"]
+
+# Commands that only read the store; when run without the daemon they
+# open it read-only. search is not one of them: it may save the search
+# index next to the store.
+READ_ONLY_COMMANDS = {"list", "query", "show", "stats", "export", "history", "top"}
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
 
 
 def format_task(task):
     status_symbol = {
-        TaskStatus.TODO: "[ ]",
-        TaskStatus.IN_PROGRESS: "[>]",
-        TaskStatus.REVIEW: "[?]",
-        TaskStatus.DONE: "[✓]"
+        "todo": "[ ]",
+        "in_progress": "[>]",
+        "review": "[?]",
+        "done": "[✓]"
     }
 
     priority_symbol = {
-        TaskPriority.LOW: "!",
-        TaskPriority.MEDIUM: "!!",
-        TaskPriority.HIGH: "!!!",
-        TaskPriority.URGENT: "!!!!"
+        "LOW": "!",
+        "MEDIUM": "!!",
+        "HIGH": "!!!",
+        "URGENT": "!!!!"
     }
 
     due_str = f"Due: {task.due_date.strftime('%Y-%m-%d')}" if task.due_date else "No due date"
     tags_str = f"Tags: {', '.join(task.tags)}" if task.tags else "No tags"
 
     return (
-        f"{status_symbol[task.status]} {task.id[:8]} - {priority_symbol[task.priority]} {task.title}\n"
+        f"{status_symbol[task.status.value]} {task.id[:8]} - {priority_symbol[task.priority.name]} {task.title}\n"
         f"  {task.description}\n"
         f"  {due_str} | {tags_str}\n"
         f"  Created: {task.created_at.strftime('%Y-%m-%d %H:%M')}"
     )
 
-def main():
+def format_task_text(task):
+    return f"{format_task(task)}\n{'-' * 50}\n"
+
+
+def format_task_jsonl(task):
+    import json
+    return json.dumps(task.to_dict(), ensure_ascii=False) + "\n"
+
+
+TSV_HEADER = "id\tstatus\tpriority\tdue_date\ttitle\ttags\n"
+
+
+def _tsv_field(value):
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def format_task_tsv(task):
+    due = task.due_date.strftime('%Y-%m-%d') if task.due_date else ""
+    fields = [task.id, task.status.value, task.priority.name, due, task.title, ",".join(task.tags)]
+    return "\t".join(_tsv_field(field) for field in fields) + "\n"
+
+
+FORMATTERS = {"text": format_task_text, "jsonl": format_task_jsonl, "tsv": format_task_tsv}
+
+
+def write_tasks(tasks, output_format="text", out=None, chunk_size=512):
+    """Stream tasks to `out` in chunks; returns (count, last task).
+
+    The first task is written straight away so output starts before the
+    rest has been read; after that lines are joined and written a chunk
+    at a time instead of one print per line.
+    """
+    out = out or sys.stdout
+    formatter = FORMATTERS[output_format]
+    buffer = [TSV_HEADER] if output_format == "tsv" else []
+    count, last = 0, None
+    for last in tasks:
+        buffer.append(formatter(last))
+        count += 1
+        if count == 1 or len(buffer) >= chunk_size:
+            out.write("".join(buffer))
+            out.flush()
+            buffer.clear()
+    out.write("".join(buffer))
+    out.flush()
+    return count, last
+
+
+def _create_arguments(parser):
+    parser.add_argument("title", help="Task title")
+    parser.add_argument("-d", "--description", help="Task description", default="")
+    parser.add_argument("-p", "--priority", help="Task priority (1-4)", type=int, choices=PRIORITY_CHOICES, default=2)
+    parser.add_argument("-u", "--due", help="Due date (YYYY-MM-DD)", default=None)
+    parser.add_argument("-t", "--tags", help="Comma-separated tags", default="")
+
+
+def _list_arguments(parser):
+    parser.add_argument("-s", "--status", help="Filter by status", choices=STATUS_CHOICES)
+    parser.add_argument("-p", "--priority", help="Filter by priority", type=int, choices=PRIORITY_CHOICES)
+    parser.add_argument("-o", "--overdue", help="Show only overdue tasks", action="store_true")
+    parser.add_argument("-w", "--due-within", help="Show open tasks due in the next N days (with --overdue, overdue ones too)",
+                        type=int, metavar="DAYS")
+    parser.add_argument("-n", "--limit", help="Show at most N tasks and print a cursor for the next page",
+                        type=positive_int)
+    parser.add_argument("-a", "--after", help="Continue after this cursor (from the previous page)", metavar="CURSOR")
+    parser.add_argument("-f", "--format", help="Output format", choices=OUTPUT_FORMATS, default="text")
+
+
+def _query_arguments(parser):
+    parser.add_argument("expression", nargs="+",
+                        help="Query terms, e.g. status=in_progress priority>=high tag=backend due<7d sort=due limit=10")
+    parser.add_argument("--explain", help="Show which index the query uses", action="store_true")
+    parser.add_argument("-f", "--format", help="Output format", choices=OUTPUT_FORMATS, default="text")
+
+
+def _search_arguments(parser):
+    parser.add_argument("terms", nargs="+",
+                        help="Words to find in titles, descriptions and tags; all must match. "
+                             "OR separates alternatives and word* matches a prefix")
+    parser.add_argument("-n", "--limit", help="Show at most N results", type=int, default=20)
+    parser.add_argument("-f", "--format", help="Output format", choices=OUTPUT_FORMATS, default="text")
+
+
+def _top_arguments(parser):
+    parser.add_argument("-n", "--limit", help="Show the N most important tasks", type=int, default=5)
+    parser.add_argument("--profile", help="Score with this profile from the store's .scoring file",
+                        default=None)
+    parser.add_argument("--workers", help="Score in N processes, for very large stores (0: one per CPU)",
+                        type=int, default=None)
+    parser.add_argument("-f", "--format", help="Output format", choices=OUTPUT_FORMATS, default="text")
+
+
+def _status_arguments(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+    parser.add_argument("status", help="New status", choices=STATUS_CHOICES)
+
+
+def _priority_arguments(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+    parser.add_argument("priority", help="New priority", type=int, choices=PRIORITY_CHOICES)
+
+
+def _due_arguments(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+    parser.add_argument("due_date", help="New due date (YYYY-MM-DD)")
+
+
+def _tag_arguments(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+    parser.add_argument("tag", help="Tag to add")
+
+
+def _untag_arguments(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+    parser.add_argument("tag", help="Tag to remove")
+
+
+def _task_id_argument(parser):
+    parser.add_argument("task_id", help="Task ID, or a unique prefix of it")
+
+
+def _stats_arguments(parser):
+    parser.add_argument("--verify", help="Cross-check the counters against a full scan", action="store_true")
+
+
+def _history_arguments(parser):
+    parser.add_argument("--since", help="Only tasks completed on or after this date (YYYY-MM-DD)", default=None)
+    parser.add_argument("-n", "--limit", help="Show at most N tasks", type=int, default=None)
+    parser.add_argument("-f", "--format", help="Output format", choices=OUTPUT_FORMATS, default="text")
+
+
+def _archive_arguments(parser):
+    parser.add_argument("--older-than", help="Archive tasks completed more than this many days ago (default: 30)",
+                        type=int, default=30, metavar="DAYS")
+
+
+def _import_arguments(parser):
+    parser.add_argument("file", help="File to read, or - for stdin")
+    parser.add_argument("-f", "--format", help="Input format (default: from the file extension, else jsonl); "
+                        "text reads one free-text task per line, e.g. 'Buy milk @shopping !2 #tomorrow'",
+                        choices=["jsonl", "csv", "text"])
+    parser.add_argument("--batch-size", help="Tasks validated and saved per write", type=int, default=1000)
+    parser.add_argument("--skip-invalid", help="Skip invalid records instead of stopping at the first",
+                        action="store_true")
+
+
+def _export_arguments(parser):
+    parser.add_argument("file", help="File to write (default: stdout)", nargs="?", default="-")
+    parser.add_argument("-f", "--format", help="Output format (default: from the file extension, else jsonl)",
+                        choices=["jsonl", "csv"])
+
+
+def _convert_arguments(parser):
+    parser.add_argument("source", help="Store to read (.json or .tbin)")
+    parser.add_argument("destination", help="Store to write (.tbin or .json)")
+
+
+def _serve_arguments(parser):
+    parser.add_argument("--socket", help="Socket path (default: next to the store)", default=None)
+    parser.add_argument("--flush-interval", help="Write changes at most once per this many seconds",
+                        type=float, default=None)
+
+
+# name -> (help, function adding the command's arguments)
+COMMANDS = {
+    "create": ("Create a new task", _create_arguments),
+    "list": ("List all tasks", _list_arguments),
+    "query": ("List tasks matching a query expression", _query_arguments),
+    "search": ("Full-text search over titles, descriptions and tags", _search_arguments),
+    "top": ("List the most important tasks by priority, due date, status and tags", _top_arguments),
+    "status": ("Update task status", _status_arguments),
+    "priority": ("Update task priority", _priority_arguments),
+    "due": ("Update task due date", _due_arguments),
+    "tag": ("Add tag to task", _tag_arguments),
+    "untag": ("Remove tag from task", _untag_arguments),
+    "show": ("Show task details", _task_id_argument),
+    "delete": ("Delete a task", _task_id_argument),
+    "stats": ("Show task statistics", _stats_arguments),
+    "history": ("List completed tasks, most recent first, archived ones included", _history_arguments),
+    "archive": ("Move tasks completed long ago out of the store into its archive", _archive_arguments),
+    "import": ("Import tasks from a JSONL, CSV or text file", _import_arguments),
+    "export": ("Export all tasks as JSONL or CSV", _export_arguments),
+    "convert": ("Convert between tasks.json and the binary format", _convert_arguments),
+    "serve": ("Keep the store loaded and serve CLI commands over a Unix socket", _serve_arguments),
+}
+
+GLOBAL_OPTIONS_WITH_VALUES = ["--storage", "--engine"]
+
+
+def _command_name(argv):
+    """The subcommand named in `argv`, skipping global options and their values."""
+    tokens = iter(argv)
+    for token in tokens:
+        if token.startswith("--") and "=" not in token and len(token) > 2 and any(
+                option.startswith(token) for option in GLOBAL_OPTIONS_WITH_VALUES):
+            next(tokens, None)
+        elif not token.startswith("-"):
+            return token
+    return None
+
+
+def build_parser(argv=None):
+    """The CLI argument parser.
+
+    Every subcommand is registered by name and help text, but only the one
+    named in `argv` gets its arguments; building the others would be
+    wasted on a single invocation. Without `argv` all of them are built.
+    """
+    command = _command_name(argv) if argv is not None else None
     parser = argparse.ArgumentParser(description="Task Manager CLI")
+    parser.add_argument("--storage", help="Path to the task store", default="tasks.json")
+    parser.add_argument("--engine", help="Storage engine (default: detected from the store)",
+                        choices=["json", "journal", "sqlite", "binary"], default=None)
+    parser.add_argument("--no-daemon", help="Open the store directly even if a task daemon is running",
+                        action="store_true")
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    for name, (help_text, add_arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if argv is None or name == command:
+            add_arguments(subparser)
+    return parser
 
-    # Create task command
-    create_parser = subparsers.add_parser("create", help="Create a new task")
-    create_parser.add_argument("title", help="Task title")
-    create_parser.add_argument("-d", "--description", help="Task description", default="")
-    create_parser.add_argument("-p", "--priority", help="Task priority (1-4)", type=int, choices=[1, 2, 3, 4], default=2)
-    create_parser.add_argument("-u", "--due", help="Due date (YYYY-MM-DD)", default=None)
-    create_parser.add_argument("-t", "--tags", help="Comma-separated tags", default="")
 
-    # List tasks command
-    list_parser = subparsers.add_parser("list", help="List all tasks")
-    list_parser.add_argument("-s", "--status", help="Filter by status", choices=["todo", "in_progress", "review", "done"])
-    list_parser.add_argument("-p", "--priority", help="Filter by priority", type=int, choices=[1, 2, 3, 4])
-    list_parser.add_argument("-o", "--overdue", help="Show only overdue tasks", action="store_true")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser(argv)
+    args = parser.parse_args(argv)
 
-    # Update task commands
-    update_status_parser = subparsers.add_parser("status", help="Update task status")
-    update_status_parser.add_argument("task_id", help="Task ID")
-    update_status_parser.add_argument("status", help="New status", choices=["todo", "in_progress", "review", "done"])
+    if args.command is None:
+        parser.print_help()
+        return
 
-    update_priority_parser = subparsers.add_parser("priority", help="Update task priority")
-    update_priority_parser.add_argument("task_id", help="Task ID")
-    update_priority_parser.add_argument("priority", help="New priority", type=int, choices=[1, 2, 3, 4])
+    if args.command == "convert":
+        from binary_storage import json_to_binary, binary_to_json
+        if args.source.endswith(".tbin"):
+            binary_to_json(args.source, args.destination)
+        else:
+            json_to_binary(args.source, args.destination)
+        print(f"Converted {args.source} to {args.destination}")
+        return
 
-    update_due_parser = subparsers.add_parser("due", help="Update task due date")
-    update_due_parser.add_argument("task_id", help="Task ID")
-    update_due_parser.add_argument("due_date", help="New due date (YYYY-MM-DD)")
+    if args.command == "serve":
+        from task_server import serve
+        serve(args.storage, engine=args.engine, socket_path=args.socket,
+              flush_interval=args.flush_interval)
+        return
 
-    # Tag management
-    add_tag_parser = subparsers.add_parser("tag", help="Add tag to task")
-    add_tag_parser.add_argument("task_id", help="Task ID")
-    add_tag_parser.add_argument("tag", help="Tag to add")
+    # The daemon cannot read our stdin, so imports from it run here.
+    reads_stdin = args.command == "import" and args.file == "-"
+    if not args.no_daemon and not reads_stdin:
+        from task_client import run_remote
+        # A running daemon answers from memory; otherwise open the store.
+        status = run_remote(args.storage, argv)
+        if status is not None:
+            return status
 
-    remove_tag_parser = subparsers.add_parser("untag", help="Remove tag from task")
-    remove_tag_parser.add_argument("task_id", help="Task ID")
-    remove_tag_parser.add_argument("tag", help="Tag to remove")
+    from task_manager import TaskManager
+    task_manager = TaskManager(args.storage, engine=args.engine,
+                               read_only=args.command in READ_ONLY_COMMANDS)
+    return run_command(args, task_manager, parser)
 
-    # Other commands
-    show_parser = subparsers.add_parser("show", help="Show task details")
-    show_parser.add_argument("task_id", help="Task ID")
 
-    delete_parser = subparsers.add_parser("delete", help="Delete a task")
-    delete_parser.add_argument("task_id", help="Task ID")
+def _open_file(path, mode):
+    if path == "-":
+        from contextlib import nullcontext
+        return nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    # newline="" as the csv module wants; JSONL does not care.
+    return open(path, mode, newline="", encoding="utf-8")
 
-    stats_parser = subparsers.add_parser("stats", help="Show task statistics")
 
-    args = parser.parse_args()
-    task_manager = TaskManager()
+def run_command(args, task_manager, parser):
+    """Run one parsed command against `task_manager`, printing to stdout."""
+    if getattr(args, "task_id", None) is not None:
+        from task_manager import AmbiguousTaskIdError
+        try:
+            # Unknown ids pass through, so each command reports them as before.
+            args.task_id = task_manager.resolve_task_id(args.task_id) or args.task_id
+        except AmbiguousTaskIdError as e:
+            print(f"Task ID {e.prefix} is ambiguous; it matches:")
+            for task_id in e.candidates:
+                task = task_manager.get_task_details(task_id)
+                print(f"  {task_id}  {task.title if task else ''}")
+            if e.truncated:
+                print("  ... and more; use a longer prefix")
+            return 1
 
     if args.command == "create":
         tags = [tag.strip() for tag in args.tags.split(",")] if args.tags else []
@@ -96,14 +348,57 @@ def main():
             print(f"Created task with ID: {task_id}")
 
     elif args.command == "list":
-        tasks = task_manager.list_tasks(args.status, args.priority, args.overdue)
-        if tasks:
-            for task in tasks:
-                print(format_task(task))
-                print("-" * 50)
-        else:
+        try:
+            tasks = task_manager.iter_tasks(args.status, args.priority, args.overdue, args.due_within,
+                                            after=args.after, limit=args.limit)
+        except ValueError as e:
+            print(e)
+            return
+        count, last = write_tasks(tasks, args.format)
+        if count == 0 and args.format == "text":
+            print("No tasks found matching the criteria.")
+        if args.limit is not None and count == args.limit and last is not None:
+            # On stderr so piped jsonl/tsv output stays clean.
+            from task_query import format_cursor
+            by_due = args.overdue or args.due_within is not None
+            print(f"Next page: --after {format_cursor(last, by_due)}", file=sys.stderr)
+
+    elif args.command == "query":
+        expression = " ".join(args.expression)
+        try:
+            if args.explain:
+                print(f"Plan: {task_manager.explain_query(expression)}", file=sys.stderr)
+            tasks = task_manager.query(expression)
+        except ValueError as e:
+            print(f"Invalid query: {e}")
+            return
+        count, _ = write_tasks(tasks, args.format)
+        if count == 0 and args.format == "text":
             print("No tasks found matching the criteria.")
 
+    elif args.command == "search":
+        try:
+            tasks = task_manager.search(" ".join(args.terms), args.limit)
+        except ValueError as e:
+            print(f"Invalid search: {e}")
+            return
+        count, _ = write_tasks(tasks, args.format)
+        if count == 0 and args.format == "text":
+            print("No tasks found matching the search.")
+
+    elif args.command == "top":
+        try:
+            if args.workers is not None:
+                tasks = task_manager.rank_tasks(args.limit, args.workers or None, profile=args.profile)
+            else:
+                tasks = task_manager.get_top_priority_tasks(args.limit, profile=args.profile)
+        except ValueError as e:
+            print(f"Invalid scoring profile: {e}")
+            return 1
+        count, _ = write_tasks(tasks, args.format)
+        if count == 0 and args.format == "text":
+            print("No tasks found.")
+
     elif args.command == "status":
         if task_manager.update_task_status(args.task_id, args.status):
             print(f"Updated task status to {args.status}")
@@ -147,8 +442,47 @@ def main():
         else:
             print("Failed to delete task. Task not found.")
 
+    elif args.command == "history":
+        since = None
+        if args.since:
+            from datetime import datetime
+            try:
+                since = datetime.strptime(args.since, "%Y-%m-%d")
+            except ValueError:
+                print("Invalid date format. Use YYYY-MM-DD")
+                return 1
+        count, _ = write_tasks(task_manager.history(since, args.limit), args.format)
+        if count == 0 and args.format == "text":
+            print("No completed tasks found.")
+
+    elif args.command == "archive":
+        count = task_manager.archive_completed(args.older_than)
+        print(f"Archived {count} tasks completed more than {args.older_than} days ago")
+
+    elif args.command == "import":
+        from task_io import detect_format, read_records
+        input_format = args.format or detect_format(args.file)
+        with _open_file(args.file, "r") as stream:
+            try:
+                imported, skipped = task_manager.import_tasks(
+                    read_records(stream, input_format), args.batch_size, args.skip_invalid)
+            except ValueError as e:
+                print(f"Import stopped at {e}; the batches before it were saved.")
+                return 1
+        print(f"Imported {imported} tasks" + (f", skipped {skipped} invalid records" if skipped else ""))
+
+    elif args.command == "export":
+        from task_io import WRITERS, detect_format
+        output_format = args.format or detect_format(args.file)
+        if output_format not in WRITERS:
+            output_format = "jsonl"
+        with _open_file(args.file, "w") as stream:
+            count = task_manager.export_tasks(WRITERS[output_format](stream))
+        if args.file != "-":
+            print(f"Exported {count} tasks to {args.file}")
+
     elif args.command == "stats":
-        stats = task_manager.get_statistics()
+        stats = task_manager.get_statistics(verify=args.verify)
         print(f"Total tasks: {stats['total']}")
         print(f"By status:")
         for status, count in stats['by_status'].items():
@@ -159,8 +493,11 @@ def main():
         print(f"Overdue tasks: {stats['overdue']}")
         print(f"Completed in last 7 days: {stats['completed_last_week']}")
 
-    else:
-        parser.print_help()
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; stop quietly.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,146 @@
+# task_manager/journal_storage.py
+import json
+import os
+
+from models import Task
+from storage import TaskStorage, TaskEncoder, TaskDecoder, read_generation, write_generation
+
+
+class JournaledTaskStorage(TaskStorage):
+    """TaskStorage that appends one record per mutation instead of
+    rewriting the whole store.
+
+    tasks.json holds the last snapshot and tasks.json.journal holds the
+    mutations made since. Loading replays the journal on top of the
+    snapshot; once the journal grows past `compact_every` records it is
+    folded back into a fresh snapshot.
+    """
+
+    def __init__(self, storage_path="tasks.json", compact_every=1000, task_class=Task,
+                 read_only=False):
+        self.journal_path = storage_path + ".journal"
+        self.compact_every = compact_every
+        self.journal_records = 0
+        self.journal_torn = False
+        super().__init__(storage_path, task_class, read_only=read_only)
+
+    def read_store(self):
+        super().read_store()
+        self.journal_records = 0
+        self.journal_torn = False
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, 'rb') as f:
+            good_end = self._replay(f, self._apply)
+            # Only noted here: read_store holds the shared lock at most, and
+            # other readers may be reading the journal. The next append cuts
+            # the torn record off under the exclusive lock.
+            self.journal_torn = f.seek(0, os.SEEK_END) > good_end
+
+    def _replay(self, f, apply=None):
+        """Decode the records of the open journal f, passing each to apply,
+        and return the offset just past the last whole one."""
+        decoder = TaskDecoder(task_class=self.task_class)
+        good_end = 0
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("record cut short")
+                record = decoder.decode(line.decode())
+            except ValueError:
+                # A torn write at the tail of the journal; everything
+                # before it was applied, everything after it is lost.
+                break
+            if apply is not None:
+                apply(record)
+                self.journal_records += 1
+            good_end += len(line)
+        return good_end
+
+    def _cut_torn_tail(self):
+        """Truncate the journal after its last whole record, or our next
+        append would land behind a torn one and be skipped on every later
+        load. Call it under the exclusive file lock only."""
+        with open(self.journal_path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not self.journal_torn:
+                # A writer may have crashed mid-append since we read the journal.
+                if size == 0:
+                    return
+                f.seek(size - 1)
+                if f.read(1) == b"\n":
+                    return
+            f.seek(0)
+            f.truncate(self._replay(f))
+        self.journal_torn = False
+
+    def _apply(self, record):
+        if record["op"] == "put":
+            task = record["task"]
+            self.tasks[task.id] = task
+        elif record["op"] == "del":
+            self.tasks.pop(record["id"], None)
+
+    def _append(self, *records):
+        lines = "".join(
+            json.dumps(record, cls=TaskEncoder, separators=(',', ':')) + "\n"
+            for record in records
+        )
+        try:
+            with self.file_lock() as lock_fd:
+                if os.path.exists(self.journal_path):
+                    self._cut_torn_tail()
+                with open(self.journal_path, 'a') as f:
+                    f.write(lines)
+                if lock_fd is not None:
+                    # Appends change the store too; a compaction elsewhere
+                    # must see them before it truncates the journal.
+                    generation = read_generation(lock_fd)
+                    write_generation(lock_fd, generation + 1)
+                    if generation == self.generation:
+                        self.generation = generation + 1
+        except Exception as e:
+            print(f"Error saving tasks: {e}")
+            return
+        with self._lock:
+            # These changes are on disk now; replaying them after a later
+            # re-read would put back versions other processes replaced.
+            for record in records:
+                self._unsynced.pop(record["task"].id if record["op"] == "put" else record["id"], None)
+        self.journal_records += len(records)
+        if self.journal_records >= self.compact_every:
+            self.compact()
+
+    def _persist(self, task=None):
+        if task is None:
+            self.compact()
+        else:
+            self._append({"op": "put", "task": task})
+
+    def _persist_delete(self, task_id):
+        self._append({"op": "del", "id": task_id})
+
+    def _persist_changes(self, changes, full_save):
+        if full_save:
+            self.compact()
+            return
+        self._append(*[
+            {"op": "put", "task": task} if task is not None else {"op": "del", "id": task_id}
+            for task_id, task in changes.items()
+        ])
+
+    def compact(self):
+        """Write a full snapshot and start a new, empty journal."""
+        try:
+            with self.file_lock():
+                self.write_snapshot()
+                # Replaying puts and deletes is idempotent, so a crash between
+                # the snapshot and the truncate only costs a slower next load.
+                # The empty journal is kept so the store still opens journaled.
+                open(self.journal_path, 'w').close()
+                self.journal_torn = False
+        except Exception as e:
+            print(f"Error saving tasks: {e}")
+            return
+        self.journal_records = 0
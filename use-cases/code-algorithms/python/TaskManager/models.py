@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
+import sys
 import uuid
 
 
@@ -15,6 +16,19 @@ class TaskStatus(Enum):
     REVIEW = "review"
     DONE = "done"
 
+# Lookup tables for decoding; calling the Enum constructor is much slower.
+PRIORITY_BY_VALUE = {priority.value: priority for priority in TaskPriority}
+STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value) if value else None
+
+
 class Task:
     def __init__(self, title, description="", priority=TaskPriority.MEDIUM,
                  due_date=None, tags=None):
@@ -44,3 +58,123 @@ class Task:
         if not self.due_date:
             return False
         return self.due_date < datetime.now() and self.status != TaskStatus.DONE
+
+    def to_dict(self):
+        """Return the task as a JSON-ready dict."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority.value,
+            'status': self.status.value,
+            'created_at': _isoformat(self.created_at),
+            'updated_at': _isoformat(self.updated_at),
+            'due_date': _isoformat(self.due_date),
+            'completed_at': _isoformat(self.completed_at),
+            'tags': self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a task from to_dict() output.
+
+        Skips __init__, so no throwaway uuid4() or datetime.now() is made
+        for fields that are about to be overwritten.
+        """
+        task = cls.__new__(cls)
+        task.id = data['id']
+        task.title = data['title']
+        task.description = data.get('description', '')
+        task.priority = PRIORITY_BY_VALUE[data['priority']]
+        task.status = STATUS_BY_VALUE[data['status']]
+        task.created_at = _parse_iso(data.get('created_at')) or datetime.now()
+        task.updated_at = _parse_iso(data.get('updated_at')) or task.created_at
+        task.due_date = _parse_iso(data.get('due_date'))
+        task.completed_at = _parse_iso(data.get('completed_at'))
+        task.tags = data.get('tags', [])
+        return task
+
+
+class SlottedTask:
+    """Base for the memory-lean task variants.
+
+    Same attributes and methods as Task, but stored in __slots__ instead of
+    a per-instance __dict__, with tag strings interned so that a tag used
+    by a million tasks is held once. Set tuple_tags in a subclass to keep
+    tags in an immutable tuple instead of a list.
+    """
+    __slots__ = ('id', 'title', 'description', 'priority', 'status', '_tags')
+    tuple_tags = False
+
+    __init__ = Task.__init__
+    update = Task.update
+    mark_as_done = Task.mark_as_done
+    is_overdue = Task.is_overdue
+    to_dict = Task.to_dict
+    from_dict = classmethod(Task.from_dict.__func__)
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags):
+        interned = map(sys.intern, tags)
+        self._tags = tuple(interned) if self.tuple_tags else list(interned)
+
+
+class CompactTask(SlottedTask):
+    """Slotted task holding its timestamps as datetime objects."""
+    __slots__ = ('created_at', 'updated_at', 'due_date', 'completed_at')
+
+
+class TupleTagsTask(CompactTask):
+    """CompactTask keeping its tags in a tuple, which is smaller than a list."""
+    __slots__ = ()
+    tuple_tags = True
+
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+# Epoch value used by the columnar and binary formats for a missing
+# timestamp; it sorts before every real one.
+NO_TIME = -2 ** 63
+
+
+def to_epoch(value):
+    """Naive datetime -> integer microseconds since 1970, NO_TIME for None."""
+    return (value - EPOCH) // ONE_MICROSECOND if value is not None else NO_TIME
+
+
+def from_epoch(value):
+    return EPOCH + value * ONE_MICROSECOND if value != NO_TIME else None
+
+
+class EpochField:
+    """Exposes a naive datetime kept in a slot as integer microseconds
+    since 1970-01-01, which is smaller than a datetime object."""
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        return EPOCH + value * ONE_MICROSECOND if value is not None else None
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, (value - EPOCH) // ONE_MICROSECOND if value is not None else None)
+
+
+class EpochTask(SlottedTask):
+    """Slotted task holding its timestamps as integer epoch microseconds."""
+    __slots__ = ('_created_at', '_updated_at', '_due_date', '_completed_at')
+
+    created_at = EpochField()
+    updated_at = EpochField()
+    due_date = EpochField()
+    completed_at = EpochField()
+
+
+TASK_TYPES = (Task, SlottedTask)
@@ -0,0 +1,327 @@
+# task_manager/sqlite_storage.py
+import os
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from models import Task, TaskPriority, TaskStatus
+
+TAG_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    due_date TEXT,
+    completed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks(completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at, id);
+
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id TEXT NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (task_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags(tag);
+
+-- Full-text index; each row has the rowid of its task in `tasks`.
+CREATE VIRTUAL TABLE IF NOT EXISTS task_search USING fts5(
+    title, description, tags, tokenize = 'unicode61 remove_diacritics 0'
+);
+"""
+
+# PRAGMA user_version once task_search has been filled for existing tasks.
+SEARCH_SCHEMA_VERSION = 1
+
+# Column weights for ranking, as in text_index: title, description, tags.
+SEARCH_RANK = "bm25(task_search, 3.0, 1.0, 2.0)"
+
+# Tags are folded into the task row so a query is a single pass over the
+# cursor instead of one extra lookup per task.
+SELECT_TASKS = f"""
+SELECT id, title, description, priority, status, created_at, updated_at,
+       due_date, completed_at,
+       (SELECT group_concat(tag, char({ord(TAG_SEPARATOR)})) FROM
+           (SELECT tag FROM task_tags WHERE task_id = tasks.id ORDER BY position))
+FROM tasks
+"""
+
+
+def _to_iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class SqliteTaskStorage:
+    """TaskStorage with the same public methods, backed by SQLite.
+
+    Nothing is loaded up front: every query reads only the rows it
+    returns, using the indexes on status, priority, due_date and tags.
+    Tasks returned by the getters are detached copies; pass a changed task
+    to save() to write it back.
+    """
+
+    def __init__(self, storage_path="tasks.db", task_class=Task, read_only=False):
+        self.storage_path = storage_path
+        self.task_class = task_class
+        self.read_only = read_only
+        if not read_only:
+            self.conn = sqlite3.connect(storage_path)
+        elif os.path.exists(storage_path):
+            uri = f"file:{quote(os.path.abspath(storage_path))}?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True)
+        else:
+            # Nothing to read; an empty in-memory database stands in.
+            self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self._in_transaction = False
+        self.load()
+
+    def load(self):
+        if self.read_only and os.path.exists(self.storage_path):
+            return  # The schema is already there and must not be written.
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < SEARCH_SCHEMA_VERSION:
+                # A database from before full-text search: index what is there.
+                self.conn.execute("DELETE FROM task_search")
+                self.conn.execute(
+                    "INSERT INTO task_search (rowid, title, description, tags) "
+                    "SELECT rowid, title, description, coalesce((SELECT group_concat(tag, ' ') "
+                    "FROM task_tags WHERE task_id = tasks.id), '') FROM tasks"
+                )
+                self.conn.execute(f"PRAGMA user_version = {SEARCH_SCHEMA_VERSION}")
+
+    def save(self, task=None):
+        if task is not None:
+            with self._write_scope():
+                self._write_task(task)
+
+    def _write_scope(self):
+        if self.read_only:
+            raise PermissionError(f"{self.storage_path} is open read-only")
+        # Outside a transaction every write commits on its own.
+        return nullcontext() if self._in_transaction else self.conn
+
+    @contextmanager
+    def transaction(self):
+        """Run the block in one SQLite transaction; roll back if it raises."""
+        if self._in_transaction:
+            yield self
+            return
+        self._in_transaction = True
+        try:
+            with self.conn:
+                yield self
+        finally:
+            self._in_transaction = False
+
+    def close(self):
+        self.conn.close()
+
+    def _write_task(self, task):
+        self._discard_search_row(task.id)
+        cursor = self.conn.execute(
+            "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.id, task.title, task.description, task.priority.value,
+             task.status.value, _to_iso(task.created_at), _to_iso(task.updated_at),
+             _to_iso(task.due_date), _to_iso(task.completed_at))
+        )
+        self.conn.execute(
+            "INSERT INTO task_search (rowid, title, description, tags) VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, task.title, task.description, " ".join(task.tags))
+        )
+        self.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task.id,))
+        self.conn.executemany(
+            "INSERT INTO task_tags VALUES (?, ?, ?)",
+            [(task.id, position, tag) for position, tag in enumerate(task.tags)]
+        )
+
+    def _discard_search_row(self, task_id):
+        # REPLACE gives the task a new rowid, so its old search row goes first.
+        self.conn.execute(
+            "DELETE FROM task_search WHERE rowid = (SELECT rowid FROM tasks WHERE id = ?)",
+            (task_id,)
+        )
+
+    def search(self, query, limit=None):
+        """Tasks matching a search expression (see text_index.parse_search),
+        best match first, using the FTS5 index."""
+        from text_index import parse_search
+        match = " OR ".join(
+            "(" + " AND ".join(f'"{word}"*' if is_prefix else f'"{word}"' for word, is_prefix in clause) + ")"
+            for clause in parse_search(query)
+        )
+        hits = (f"JOIN (SELECT rowid AS hit, {SEARCH_RANK} AS score FROM task_search "
+                "WHERE task_search MATCH ? ORDER BY score LIMIT ?) ON hit = tasks.rowid ORDER BY score")
+        return list(self.iter_tasks(hits, (match, -1 if limit is None else limit)))
+
+    def _row_to_task(self, row):
+        (task_id, title, description, priority, status, created_at,
+         updated_at, due_date, completed_at, tags) = row
+        return self.task_class.from_dict({
+            'id': task_id,
+            'title': title,
+            'description': description,
+            'priority': priority,
+            'status': status,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'due_date': due_date,
+            'completed_at': completed_at,
+            'tags': tags.split(TAG_SEPARATOR) if tags else [],
+        })
+
+    def iter_tasks(self, where="", params=()):
+        """Yield tasks matching an SQL `where` clause one row at a time."""
+        cursor = self.conn.execute(SELECT_TASKS + where, params)
+        for row in cursor:
+            yield self._row_to_task(row)
+
+    def add_task(self, task):
+        self.save(task)
+        return task.id
+
+    def get_task(self, task_id):
+        return next(self.iter_tasks("WHERE id = ?", (task_id,)), None)
+
+    def update_task(self, task_id, **kwargs):
+        task = self.get_task(task_id)
+        if task:
+            task.update(**kwargs)
+            self.save(task)
+            return True
+        return False
+
+    def delete_task(self, task_id):
+        with self._write_scope():
+            self._discard_search_row(task_id)
+            cursor = self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return cursor.rowcount > 0
+
+    def get_all_tasks(self):
+        return list(self.iter_tasks())
+
+    def archive_completed(self, before):
+        # Queries read only the rows they need, so old done tasks cost
+        # nothing until asked for; there is nothing to move.
+        if self.read_only:
+            raise PermissionError(f"{self.storage_path} is open read-only")
+        return 0
+
+    def iter_completed(self, since=None):
+        """Yield done tasks most recently completed first; only those
+        completed at or after `since` when given."""
+        where, params = "WHERE status = ? AND completed_at IS NOT NULL", [TaskStatus.DONE.value]
+        if since is not None:
+            where += " AND completed_at >= ?"
+            params.append(since.isoformat())
+        return self.iter_tasks(where + " ORDER BY completed_at DESC, id DESC", params)
+
+    def iter_tasks_by_created(self, after=None):
+        if after is None:
+            return self.iter_tasks("ORDER BY created_at, id")
+        created_at, task_id = after
+        return self.iter_tasks("WHERE (created_at, id) > (?, ?) ORDER BY created_at, id",
+                               (created_at.isoformat(), task_id))
+
+    def find_ids(self, prefix, limit=None):
+        """Ids starting with `prefix`, in sorted order; at most `limit`."""
+        # A range on the primary key instead of LIKE, which cannot use it.
+        # No real id continues a prefix with the last code point there is.
+        cursor = self.conn.execute(
+            "SELECT id FROM tasks WHERE id >= ? AND id < ? ORDER BY id LIMIT ?",
+            (prefix, prefix + "\U0010ffff", -1 if limit is None else limit)
+        )
+        return [task_id for task_id, in cursor]
+
+    def get_tasks_by_status(self, status):
+        return list(self.iter_tasks("WHERE status = ?", (status.value,)))
+
+    def get_tasks_by_priority(self, priority):
+        return list(self.iter_tasks("WHERE priority = ?", (priority.value,)))
+
+    def get_tasks_by_tag(self, tag):
+        return list(self.iter_tasks(
+            "WHERE id IN (SELECT task_id FROM task_tags WHERE tag = ?)", (tag,)
+        ))
+
+    def get_overdue_tasks(self, now=None):
+        return self.get_tasks_due_between(None, now or datetime.now())
+
+    def get_tasks_due_between(self, start, end):
+        """Tasks not done that are due in [start, end), earliest first."""
+        where, params = "WHERE due_date < ? AND status != ?", [end.isoformat(), TaskStatus.DONE.value]
+        if start is not None:
+            where += " AND due_date >= ?"
+            params.append(start.isoformat())
+        return list(self.iter_tasks(where + " ORDER BY due_date, id", params))
+
+    def _query_where(self, query, now):
+        # SQLite's own planner picks the index; query.select() rechecks
+        # every filter on the rows that come back.
+        clauses, params = [], []
+        if query.statuses is not None:
+            clauses.append(f"status IN ({', '.join('?' * len(query.statuses))})")
+            params.extend(status.value for status in query.statuses)
+        if query.priorities is not None:
+            clauses.append(f"priority IN ({', '.join('?' * len(query.priorities))})")
+            params.extend(priority.value for priority in query.priorities)
+        for group in query.tags:
+            clauses.append("id IN (SELECT task_id FROM task_tags WHERE tag IN "
+                           f"({', '.join('?' * len(group))}))")
+            params.extend(group)
+        window = query.due_window(now)
+        if window is not None:
+            start, end = window
+            clauses.append("due_date IS NOT NULL")
+            if start is not None:
+                clauses.append("due_date >= ?")
+                params.append(start.isoformat())
+            if end is not None:
+                clauses.append("due_date < ?")
+                params.append(end.isoformat())
+        if query.overdue:
+            clauses.append("status != ?")
+            params.append(TaskStatus.DONE.value)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def plan_query(self, query, now):
+        where, params = self._query_where(query, now)
+        rows = self.conn.execute("EXPLAIN QUERY PLAN " + SELECT_TASKS + where, params)
+        return "; ".join(row[-1] for row in rows)
+
+    def find_tasks(self, query, now):
+        where, params = self._query_where(query, now)
+        return self.iter_tasks(where, params)
+
+    def get_statistics(self, now=None):
+        # Counted by SQLite from the indexes; no task rows are decoded.
+        now = now or datetime.now()
+        by_status = dict(self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+        by_priority = dict(self.conn.execute("SELECT priority, COUNT(*) FROM tasks GROUP BY priority"))
+        overdue, = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE due_date < ? AND status != ?",
+            (now.isoformat(), TaskStatus.DONE.value)
+        ).fetchone()
+        completed, = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE completed_at >= ?",
+            ((now - timedelta(days=7)).isoformat(),)
+        ).fetchone()
+        return {
+            "total": sum(by_status.values()),
+            "by_status": {status.value: by_status.get(status.value, 0) for status in TaskStatus},
+            "by_priority": {priority.name: by_priority.get(priority.value, 0) for priority in TaskPriority},
+            "overdue": overdue,
+            "completed_last_week": completed,
+        }
@@ -1,101 +1,708 @@
 # task_manager/storage.py
+import atexit
+import copy
+import gc
+import heapq
 import json
 import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
 from datetime import datetime
-from models import Task, TaskPriority, TaskStatus
+from itertools import islice, takewhile
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; stores there are single-process only.
+    fcntl = None
+
+from models import Task, TaskStatus, TASK_TYPES
+from task_archive import TaskArchive
+from task_index import TaskIndex
+from task_stats import TaskStats
 
 class TaskEncoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, Task):
-            task_dict = obj.__dict__.copy()
-            task_dict['priority'] = obj.priority.value
-            task_dict['status'] = obj.status.value
-            # Convert datetime objects to ISO format strings
-            for key in ['created_at', 'updated_at', 'due_date', 'completed_at']:
-                if task_dict.get(key) is not None:
-                    task_dict[key] = task_dict[key].isoformat()
-            return task_dict
+        if isinstance(obj, TASK_TYPES):
+            return obj.to_dict()
         return super().default(obj)
 
 class TaskDecoder(json.JSONDecoder):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, task_class=Task, **kwargs):
+        self.task_class = task_class
         json.JSONDecoder.__init__(self, object_hook=self.object_hook, *args, **kwargs)
 
     def object_hook(self, obj):
         if 'id' in obj and 'title' in obj:
-            task = Task(obj['title'], obj.get('description', ''))
-            task.id = obj['id']
-            task.priority = TaskPriority(obj['priority'])
-            task.status = TaskStatus(obj['status'])
+            return self.task_class.from_dict(obj)
+        return obj
 
-            # Convert ISO format strings to datetime objects
-            for key in ['created_at', 'updated_at', 'completed_at']:
-                if obj.get(key):
-                    setattr(task, key, datetime.fromisoformat(obj[key]))
 
-            if obj.get('due_date'):
-                task.due_date = datetime.fromisoformat(obj['due_date'])
+def _umask():
+    # The only way to read it is to set it; put it straight back.
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def atomic_write(path, write, binary=False):
+    """Replace `path` with what `write(f)` writes, all or nothing.
+
+    The data goes to a temporary file in the same directory, is fsynced
+    and then renamed over `path`, so a crash leaves either the old or the
+    new file, never a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".",
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            # mkstemp made it 0600; give it the mode open() would have.
+            os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Make the rename itself durable.
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def read_generation(lock_fd):
+    data = os.pread(lock_fd, 32, 0)
+    return int(data) if data.strip() else 0
+
+
+def write_generation(lock_fd, generation):
+    os.ftruncate(lock_fd, 0)
+    os.pwrite(lock_fd, str(generation).encode(), 0)
 
-            task.tags = obj.get('tags', [])
-            return task
-        return obj
 
 class TaskStorage:
-    def __init__(self, storage_path="tasks.json"):
+    def __init__(self, storage_path="tasks.json", task_class=Task, flush_interval=None,
+                 read_only=False):
         self.storage_path = storage_path
+        # A read-only store never writes, not even the lock file, and
+        # refuses changes.
+        self.read_only = read_only
+        # Guards self.tasks against the background flusher; taken around
+        # every change and while the flusher copies the store.
+        self._lock = threading.RLock()
+        self._flush_wanted = threading.Condition(self._lock)
+        # Serializes writers so an older snapshot never lands after a newer one.
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._flusher = None
+        # With a flush interval (seconds), changes are written by a
+        # background thread at most once per interval instead of on every
+        # call; flush() writes immediately and also runs at exit.
+        self.flush_interval = flush_interval
+        # Task, or a memory-lean variant such as CompactTask for huge stores.
+        self.task_class = task_class
         self.tasks = {}
+        self.index = TaskIndex()
+        self.stats = TaskStats(self.index)
+        # Everything kept in sync with self.tasks. Each entry provides
+        # add(task), discard(task_id), reindex(task) and rebuild(tasks).
+        self.indexes = [self.index, self.stats]
+        # Changes made inside transaction(): task id -> task, or None when
+        # the task was deleted. None outside a transaction.
+        self._pending = None
+        self._pending_full_save = False
+        # Copies of the tasks a transaction fetched with get_task(), taken
+        # before the caller could change them: task id -> copy. None
+        # outside a transaction.
+        self._undo = None
+        # Other processes may share the store. Writers hold an exclusive
+        # flock on storage_path + ".lock", which also holds a generation
+        # counter bumped on every write. self.generation is the one this
+        # process last synced with; _unsynced holds its changes since then
+        # (task id -> task, or None when deleted) so they can be replayed
+        # on top of a newer store instead of overwriting it.
+        self.lock_path = storage_path + ".lock"
+        # Full-text index, attached by search_index() on first use and
+        # saved next to the store so later processes need not rebuild it.
+        self.text_index = None
+        self.search_path = storage_path + ".search"
+        # Done tasks moved out of the store by archive_completed(). Ids of
+        # archived tasks deleted or changed since the last write wait in
+        # _archive_removals and leave the archive once the store is written.
+        self.archive = TaskArchive(storage_path + ".archive", task_class)
+        self._archive_removals = set()
+        self._lock_fd = None
+        self._file_mutex = threading.RLock()
+        self.generation = 0
+        self._unsynced = {}
+        self._unsynced_all = False
         self.load()
+        if flush_interval is not None and not read_only:
+            self._start_flusher()
 
     def load(self):
+        # Every object created while loading survives, so letting the cyclic
+        # GC run in between only rescans them over and over.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.read_tasks()
+            self._rebuild_indexes()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    @contextmanager
+    def file_lock(self, exclusive=True):
+        """Hold the advisory lock shared with other processes.
+
+        Yields the lock file descriptor, or None where fcntl is missing.
+        Shared holders (readers) never block each other. Re-entering from
+        the thread that already holds the lock reuses it.
+        """
+        if fcntl is None:
+            yield None
+            return
+        with self._file_mutex:
+            if self._lock_fd is not None:
+                yield self._lock_fd
+                return
+            if self.read_only:
+                try:
+                    fd = os.open(self.lock_path, os.O_RDONLY)
+                except FileNotFoundError:
+                    # Nobody has written the store with locking yet.
+                    yield None
+                    return
+            else:
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._lock_fd = fd
+                yield fd
+            finally:
+                self._lock_fd = None
+                os.close(fd)
+
+    def read_tasks(self):
+        with self.file_lock(exclusive=False) as lock_fd:
+            if lock_fd is not None:
+                self.generation = read_generation(lock_fd)
+            self.read_store()
+
+    def read_store(self):
         if os.path.exists(self.storage_path):
             try:
                 with open(self.storage_path, 'r') as f:
-                    tasks_data = json.load(f, cls=TaskDecoder)
+                    tasks_data = json.load(f, cls=TaskDecoder, task_class=self.task_class)
                     if isinstance(tasks_data, list):
                         for task in tasks_data:
                             self.tasks[task.id] = task
             except Exception as e:
                 print(f"Error loading tasks: {e}")
 
-    def save(self):
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"{self.storage_path} is open read-only")
+
+    def save(self, task=None):
+        self._check_writable()
+        # `task` names the task that changed, when the caller knows it, so
+        # the indexes and incremental engines only have to look at it.
+        # Without it any task may have changed and the indexes are rebuilt.
+        with self._lock:
+            if task is not None and task.id not in self.tasks and self._is_archived(task.id):
+                # A change to an archived task brings it back into the store.
+                self.tasks[task.id] = task
+                self._archive_removals.add(task.id)
+            if task is None:
+                self._rebuild_indexes()
+                self._unsynced_all = True
+            elif self.tasks.get(task.id) is task:
+                for index in self.indexes:
+                    index.reindex(task)
+                self._unsynced[task.id] = task
+
+            if self._pending is None:
+                self._persist(task)
+            elif task is None:
+                self._pending_full_save = True
+            else:
+                self._pending[task.id] = task
+        if self._pending is None:
+            self._remove_archived()
+
+    def add_index(self, index):
+        """Attach another index and fill it from the current tasks."""
+        index.rebuild(self.tasks.values())
+        self.indexes.append(index)
+        return index
+
+    def remove_index(self, index):
+        self.indexes.remove(index)
+
+    def _rebuild_indexes(self):
+        for index in self.indexes:
+            index.rebuild(self.tasks.values())
+
+    def _persist(self, task=None):
+        # The plain JSON store always rewrites the whole file, either now
+        # or, with a background flusher, at the end of the flush interval.
+        if self._flusher is not None:
+            self._dirty = True
+            self._flush_wanted.notify()
+            return
+        try:
+            self.write_snapshot()
+        except Exception as e:
+            print(f"Error saving tasks: {e}")
+
+    def _persist_delete(self, task_id):
+        self._persist()
+
+    def _persist_changes(self, changes, full_save):
+        # One write for a whole transaction; the JSON store has nothing
+        # cheaper than a full rewrite.
+        self._persist()
+
+    @contextmanager
+    def transaction(self):
+        """Group changes so they are written once, when the block exits.
+
+        If the block raises, the in-memory store is rolled back to how it
+        was when the transaction started and nothing is written. Nothing is
+        copied up front: the tasks the block saved or deleted are put back
+        as get_task() handed them out or, when the block reached them some
+        other way (and may have changed them before saving), as they were
+        last written. Nested transactions join the outermost one.
+        """
+        if self._pending is not None:
+            yield self
+            return
+
+        if self._flusher is not None:
+            # So what is on disk is what a rollback returns to.
+            self.flush()
+        unsynced, unsynced_all = dict(self._unsynced), self._unsynced_all
+        self._pending = {}
+        self._pending_full_save = False
+        self._undo = {}
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._roll_back(self._pending, self._pending_full_save, self._undo)
+                self._pending = self._undo = None
+                self._unsynced, self._unsynced_all = unsynced, unsynced_all
+                self._archive_removals = set()
+                self._rebuild_indexes()
+            raise
+
+        with self._lock:
+            changes, full_save = self._pending, self._pending_full_save
+            self._pending = self._undo = None
+            if changes or full_save:
+                self._persist_changes(changes, full_save)
+        self._remove_archived()
+
+    def _roll_back(self, changes, full_save, undo):
+        committed = self._read_committed() if full_save or set(changes) - set(undo) else {}
+        if full_save:
+            # Any task may have changed; start over from the written store.
+            self.tasks = committed
+            changes = undo
+        for task_id in changes:
+            task = undo[task_id] if task_id in undo else committed.get(task_id)
+            if task is None:
+                self.tasks.pop(task_id, None)
+            else:
+                self.tasks[task_id] = task
+
+    def _read_committed(self):
+        # The tasks as last written, leaving the loaded store and the
+        # generation it is synced with alone.
+        tasks, generation = self.tasks, self.generation
+        self.tasks = {}
+        try:
+            self.read_tasks()
+            return self.tasks
+        finally:
+            self.tasks, self.generation = tasks, generation
+
+    def write_snapshot(self):
+        with self._write_lock, self.file_lock() as lock_fd:
+            with self._lock:
+                if lock_fd is not None:
+                    generation = read_generation(lock_fd)
+                    if generation != self.generation:
+                        self._merge_from_disk()
+                records = self.snapshot_records()
+                unsynced, unsynced_all = self._unsynced, self._unsynced_all
+                self._unsynced, self._unsynced_all = {}, False
+            try:
+                if lock_fd is not None:
+                    # Bumped before the write: a crash in between only
+                    # makes other processes re-read needlessly.
+                    write_generation(lock_fd, generation + 1)
+                    self.generation = generation + 1
+                self.write_records(records)
+            except BaseException:
+                with self._lock:
+                    self._unsynced = {**unsynced, **self._unsynced}
+                    self._unsynced_all = self._unsynced_all or unsynced_all
+                raise
+            self.save_search_index()
+
+    def refresh(self):
+        """Pick up writes other processes made since we last synced.
+
+        Returns True when the store was re-read. Changes of our own that
+        are not written yet are replayed on top, as in write_snapshot().
+        """
+        with self.file_lock(exclusive=False) as lock_fd:
+            if lock_fd is None or read_generation(lock_fd) == self.generation:
+                return False
+            with self._lock:
+                self._merge_from_disk()
+            return True
+
+    def _merge_from_disk(self):
+        # Another process saved since we last synced: start from its store
+        # and replay only our own changes on top of it.
+        self.archive.reload()
+        if self._unsynced_all:
+            # A full save without a task hint; our whole store wins.
+            return
+        local = self._unsynced
+        self.tasks = {}
+        self.read_tasks()
+        for task_id, task in local.items():
+            if task is None:
+                self.tasks.pop(task_id, None)
+            else:
+                self.tasks[task_id] = task
+        self._rebuild_indexes()
+
+    def snapshot_records(self):
+        # Cheap copy of the store taken under the lock; the slow part,
+        # serializing and writing it, happens in write_records() without it.
+        return [task.to_dict() for task in self.tasks.values()]
+
+    def write_records(self, records):
+        atomic_write(self.storage_path, lambda f: json.dump(records, f, indent=2))
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True,
+                                         name=f"flush {self.storage_path}")
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                while not self._dirty:
+                    self._flush_wanted.wait()
+            # Let the changes of the next interval pile up into this write.
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write changes still waiting for the background flusher."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
         try:
-            with open(self.storage_path, 'w') as f:
-                json.dump(list(self.tasks.values()), f, cls=TaskEncoder, indent=2)
+            self.write_snapshot()
         except Exception as e:
             print(f"Error saving tasks: {e}")
+            with self._lock:
+                self._dirty = True
 
     def add_task(self, task):
-        self.tasks[task.id] = task
-        self.save()
+        self._check_writable()
+        with self._lock:
+            if task.id not in self.tasks and self._is_archived(task.id):
+                # Replaces the archived task, which leaves the archive.
+                self._archive_removals.add(task.id)
+            self.tasks[task.id] = task
+            self.save(task)
         return task.id
 
     def get_task(self, task_id):
-        return self.tasks.get(task_id)
+        task = self.tasks.get(task_id)
+        if task is None and task_id not in self._archive_removals:
+            task = self.archive.get(task_id)
+        elif task is not None:
+            # The caller may be about to change it in place.
+            self._log_undo(task_id)
+        return task
+
+    def _log_undo(self, task_id):
+        if self._undo is not None and task_id not in self._undo:
+            with self._lock:
+                task = self.tasks.get(task_id)
+                self._undo[task_id] = None if task is None else _copy_task(task)
+
+    def _is_archived(self, task_id):
+        return task_id not in self._archive_removals and self.archive.get(task_id) is not None
+
+    def _remove_archived(self):
+        # Only once the store itself has been written, so a crash in
+        # between leaves a task in both places rather than in neither.
+        if not self._archive_removals:
+            return
+        if self._flusher is not None:
+            self.flush()
+        with self.file_lock() as lock_fd:
+            self.archive.remove(self._archive_removals)
+            self._archive_removals = set()
+            if lock_fd is not None:
+                # Other processes must re-read the archive too.
+                generation = read_generation(lock_fd)
+                write_generation(lock_fd, generation + 1)
+                if generation == self.generation:
+                    self.generation = generation + 1
+
+    def archive_completed(self, before):
+        """Move done tasks completed before `before` out of the store and
+        into its archive (see task_archive). Returns how many were moved.
+
+        Archived tasks are still found by id and by iter_completed(), and
+        still counted by get_statistics(); lists, queries and searches no
+        longer see them. Saving or deleting one takes it out of the
+        archive again.
+        """
+        self._check_writable()
+        with self.file_lock():
+            self.refresh()
+            tasks = self.tasks  # loads the binary store, and with it the counters
+            with self._lock:
+                completed = self.stats.completed
+                tasks = [tasks[task_id] for _, task_id in completed[:bisect_left(completed, (before,))]]
+                tasks = [task for task in tasks if task.status == TaskStatus.DONE]
+            if not tasks:
+                return 0
+            self.archive.add(tasks)
+            # A crash before the store is written leaves the tasks in both;
+            # archiving again settles it.
+            with self.transaction():
+                for task in tasks:
+                    self.delete_task(task.id)
+        return len(tasks)
+
+    def iter_archived_tasks(self):
+        # Not those leaving the archive: they are live or deleted.
+        return (task for task in self.archive if task.id not in self._archive_removals)
+
+    def iter_completed(self, since=None):
+        """Yield done tasks most recently completed first, archived ones
+        included; only those completed at or after `since` when given."""
+        tasks = self.tasks  # loads the binary store, and with it the counters
+        with self._lock:
+            completed = self.stats.completed
+            keys = completed[bisect_left(completed, (since,)) if since else 0:]
+        live = (tasks[task_id] for _, task_id in reversed(keys)
+                if task_id in tasks and tasks[task_id].status == TaskStatus.DONE)
+        archived = (task for task in self.archive
+                    if task.id not in tasks and task.id not in self._archive_removals)
+        if since is not None:
+            archived = takewhile(lambda task: task.completed_at >= since, archived)
+        return heapq.merge(live, archived, key=lambda task: task.completed_at, reverse=True)
 
     def update_task(self, task_id, **kwargs):
         task = self.get_task(task_id)
         if task:
             task.update(**kwargs)
-            self.save()
+            self.save(task)
             return True
         return False
 
     def delete_task(self, task_id):
-        if task_id in self.tasks:
-            del self.tasks[task_id]
-            self.save()
-            return True
-        return False
+        self._check_writable()
+        with self._lock:
+            if task_id in self.tasks:
+                del self.tasks[task_id]
+                for index in self.indexes:
+                    index.discard(task_id)
+                self._unsynced[task_id] = None
+                if self._pending is None:
+                    self._persist_delete(task_id)
+                else:
+                    self._pending[task_id] = None
+            elif self._is_archived(task_id):
+                self._archive_removals.add(task_id)
+            else:
+                return False
+        if self._pending is None:
+            self._remove_archived()
+        return True
+
+    def _tasks_for(self, task_ids):
+        return [self.tasks[task_id] for task_id in task_ids]
 
     def get_all_tasks(self):
         return list(self.tasks.values())
 
+    def iter_tasks_by_created(self, after=None):
+        """Yield tasks oldest first, resuming after a (created_at, id) cursor."""
+        tasks = self.tasks
+        for task_id in self.index.ids_created_after(after):
+            yield tasks[task_id]
+
+    def find_ids(self, prefix, limit=None):
+        """Ids starting with `prefix`, in sorted order; at most `limit`.
+        Archived tasks are included."""
+        ids = self._live_ids(prefix, limit)
+        archived = [task_id for task_id in self.archive.ids_with_prefix(prefix, limit)
+                    if task_id not in self._archive_removals]
+        if archived:
+            ids = list(islice(heapq.merge(ids, archived), limit))
+        return ids
+
+    def _live_ids(self, prefix, limit):
+        with self._lock:
+            return self.index.ids_with_prefix(prefix, limit)
+
     def get_tasks_by_status(self, status):
-        return [task for task in self.tasks.values() if task.status == status]
+        return self._tasks_for(self.index.ids_with_status(status))
 
     def get_tasks_by_priority(self, priority):
-        return [task for task in self.tasks.values() if task.priority == priority]
+        return self._tasks_for(self.index.ids_with_priority(priority))
+
+    def get_tasks_by_tag(self, tag):
+        return self._tasks_for(self.index.ids_with_tag(tag))
+
+    def get_overdue_tasks(self, now=None):
+        return self._tasks_for(self.index.ids_due_before(now or datetime.now()))
+
+    def get_tasks_due_between(self, start, end):
+        """Tasks not done that are due in [start, end), earliest first."""
+        return self._tasks_for(self.index.ids_due_between(start, end))
+
+    def plan_query(self, query, now):
+        """Describe how find_tasks() will look up `query`."""
+        tasks = self.tasks
+        plan = query.plan(self.index, now)
+        if plan is None:
+            return f"full scan ({len(tasks)} tasks)"
+        name, rows, _ = plan
+        return f"{name} index ({rows} candidates)"
+
+    def find_tasks(self, query, now):
+        """Candidate tasks for a TaskQuery; query.select() does the rest."""
+        tasks = self.tasks
+        plan = query.plan(self.index, now)
+        if plan is None:
+            return tasks.values()
+        return self._tasks_for(plan[2])
+
+    def get_statistics(self, now=None):
+        now = now or datetime.now()
+        with self._lock:
+            return self.archive.add_statistics(self.stats.statistics(now), now)
+
+    def search_index(self):
+        """The full-text TextIndex, attached to the store on first use.
+
+        Loaded from the copy saved next to the store when there is one,
+        and brought up to date by re-indexing only the tasks that changed
+        since; built from scratch otherwise. Saved back if that changed
+        anything, and again whenever the whole store is written.
+        """
+        with self._lock:
+            if self.text_index is None:
+                from text_index import TextIndex
+                index = None
+                if os.path.exists(self.search_path):
+                    try:
+                        with open(self.search_path, 'rb') as f:
+                            index = TextIndex.load(f)
+                    except Exception:
+                        pass  # Damaged or from another version; rebuild it.
+                index = index or TextIndex()
+                changed = index.rebuild(self.tasks.values())
+                self.indexes.append(index)
+                self.text_index = index
+                if changed:
+                    self.save_search_index()
+            return self.text_index
+
+    def save_search_index(self):
+        if self.text_index is None or self.read_only:
+            return
+        try:
+            with self._lock:
+                atomic_write(self.search_path, self.text_index.save, binary=True)
+        except Exception as e:
+            print(f"Error saving search index: {e}")
+
+    def search(self, query, limit=None):
+        """Tasks matching a search expression (see text_index.parse_search),
+        best match first."""
+        index = self.search_index()
+        with self._lock:
+            return self._tasks_for(index.search(query, limit))
+
+    def check_indexes(self):
+        """Compare the live indexes against a rebuild; [] means consistent."""
+        return self.index.check_consistency(self.tasks.values())
+
+
+def _copy_task(task):
+    clone = copy.copy(task)
+    clone.tags = list(task.tags)
+    return clone
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+BINARY_EXTENSION = ".tbin"
+
+
+def detect_engine(storage_path):
+    if storage_path.endswith(SQLITE_EXTENSIONS):
+        return "sqlite"
+    if storage_path.endswith(BINARY_EXTENSION):
+        return "binary"
+    if os.path.exists(storage_path + ".journal"):
+        return "journal"
+    return "json"
+
+
+def open_storage(storage_path="tasks.json", engine=None, task_class=Task, flush_interval=None,
+                 read_only=False):
+    """Create the storage engine for `storage_path`.
 
-    def get_overdue_tasks(self):
-        return [task for task in self.tasks.values() if task.is_overdue()]
+    engine is "json", "journal", "sqlite" or "binary". When it is not
+    given it is picked from the path: .db/.sqlite files are SQLite
+    databases, .tbin files use the binary format, and a store that already
+    has a journal next to it is opened journaled. flush_interval turns on
+    background flushing for the JSON engine. A read_only store is opened
+    without writing anything and refuses changes.
+    """
+    if engine is None:
+        engine = detect_engine(storage_path)
 
+    if engine == "json":
+        return TaskStorage(storage_path, task_class, flush_interval, read_only)
+    if engine == "journal":
+        from journal_storage import JournaledTaskStorage
+        return JournaledTaskStorage(storage_path, task_class=task_class, read_only=read_only)
+    if engine == "sqlite":
+        from sqlite_storage import SqliteTaskStorage
+        return SqliteTaskStorage(storage_path, task_class, read_only)
+    if engine == "binary":
+        from binary_storage import BinaryTaskStorage
+        return BinaryTaskStorage(storage_path, task_class, read_only)
+    raise ValueError(f"Unknown storage engine: {engine}")
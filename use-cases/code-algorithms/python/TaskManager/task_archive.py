@@ -0,0 +1,152 @@
+# task_manager/task_archive.py
+"""Cold tier for tasks completed long ago.
+
+Done tasks are rarely looked at again, yet the JSON, journal and binary
+stores read every one of them on load and write every one on each full
+save. TaskStorage.archive_completed() moves them out of the store into an
+archive next to it:
+
+    <store>.archive        the tasks in the binary format (binary_storage),
+                           most recently completed first
+    <store>.archive.stats  counts by status and priority, plus the
+                           completion times that can still fall in the
+                           last-week window of get_statistics(), as JSON
+
+Nothing is read until it is needed: a lookup by id maps the archive and
+decodes one record, history decodes records from the front only as far as
+it is iterated, and statistics read the small .stats file alone. Each
+change rewrites the archive, so archiving is meant to run now and then
+(daily, say), not on every change.
+"""
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+
+# The window of get_statistics()'s completed_last_week.
+RECENT = timedelta(days=7)
+
+
+def _aggregate(tasks, now):
+    by_status = {status.value: 0 for status in TaskStatus}
+    by_priority = {priority.name: 0 for priority in TaskPriority}
+    completed = []
+    since = now - RECENT
+    for task in tasks:
+        by_status[task.status.value] += 1
+        by_priority[task.priority.name] += 1
+        # Later windows start later still, so no task completed before
+        # this one starts can ever count as recent again.
+        if task.completed_at and task.completed_at >= since:
+            completed.append(task.completed_at)
+    completed.sort()
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "completed": completed,
+    }
+
+
+class TaskArchive:
+    """The archive of one store; see the module docstring."""
+
+    def __init__(self, path, task_class=Task):
+        self.path = path
+        self.stats_path = path + ".stats"
+        self.task_class = task_class
+        self._file = None
+        self._aggregates = None
+
+    @property
+    def file(self):
+        if self._file is None:
+            from binary_storage import BinaryTaskFile
+            self._file = BinaryTaskFile(self.path, self.task_class)
+        return self._file
+
+    def reload(self):
+        """Drop what was read, after another process changed the archive."""
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._aggregates = None
+
+    def __len__(self):
+        return len(self.file)
+
+    def __iter__(self):
+        """Archived tasks, most recently completed first."""
+        return iter(self.file)
+
+    def get(self, task_id):
+        return self.file.get(task_id)
+
+    def ids_with_prefix(self, prefix, limit=None):
+        return self.file.ids_with_prefix(prefix, limit) or []
+
+    def aggregates(self):
+        if self._aggregates is None:
+            self._aggregates = self._read_aggregates()
+        return self._aggregates
+
+    def _signature(self):
+        # Changes whenever the archive file is replaced.
+        stat = os.stat(self.path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _read_aggregates(self):
+        try:
+            with open(self.stats_path) as f:
+                aggregates = json.load(f)
+            if aggregates.pop("archive") == self._signature():
+                aggregates["completed"] = [datetime.fromisoformat(value)
+                                           for value in aggregates["completed"]]
+                return aggregates
+        except (OSError, ValueError, KeyError):
+            pass
+        # No stats file, or one out of step with the archive (a crash
+        # between writing the two): count the archive itself.
+        return _aggregate(self.file, datetime.now())
+
+    def add_statistics(self, stats, now):
+        """Add the archived tasks to a get_statistics() result."""
+        aggregates = self.aggregates()
+        if not aggregates["total"]:
+            return stats
+        stats["total"] += aggregates["total"]
+        for status, count in aggregates["by_status"].items():
+            stats["by_status"][status] += count
+        for priority, count in aggregates["by_priority"].items():
+            stats["by_priority"][priority] += count
+        # Only done tasks are archived, so none of them is overdue.
+        completed = aggregates["completed"]
+        stats["completed_last_week"] += len(completed) - bisect_left(completed, now - RECENT)
+        return stats
+
+    def add(self, tasks, now=None):
+        """Write `tasks` into the archive, replacing archived tasks with the
+        same id."""
+        archived = {task.id: task for task in self.file}
+        archived.update((task.id, task) for task in tasks)
+        self._write(archived.values(), now or datetime.now())
+
+    def remove(self, task_ids, now=None):
+        """Drop the tasks with these ids from the archive."""
+        self._write([task for task in self.file if task.id not in task_ids],
+                    now or datetime.now())
+
+    def _write(self, tasks, now):
+        from binary_storage import write_binary
+        from storage import atomic_write
+
+        tasks = sorted(tasks, key=lambda task: task.completed_at, reverse=True)
+        aggregates = _aggregate(tasks, now)
+        write_binary(self.path, tasks)
+        saved = {**aggregates, "completed": [value.isoformat() for value in aggregates["completed"]],
+                 "archive": self._signature()}
+        atomic_write(self.stats_path, lambda f: json.dump(saved, f))
+        self.reload()
+        self._aggregates = aggregates
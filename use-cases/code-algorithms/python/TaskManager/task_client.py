@@ -0,0 +1,63 @@
+# task_manager/task_client.py
+"""Client side of the task daemon (see task_server).
+
+Wire format, one JSON object per line: the client sends
+{"argv": [...], "cwd": "..."}; the daemon answers with any number of
+{"stdout": text} / {"stderr": text} messages and a final {"exit": code}.
+"""
+import json
+import os
+import socket
+import sys
+
+# sun_path is 108 bytes on Linux and 104 on macOS.
+MAX_SOCKET_PATH = 100
+
+
+def socket_path_for(storage_path):
+    """Where the daemon for `storage_path` listens."""
+    path = os.path.abspath(storage_path) + ".sock"
+    if len(path.encode()) <= MAX_SOCKET_PATH:
+        return path
+    import hashlib
+    import tempfile
+    digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"taskmanager-{digest}.sock")
+
+
+def send_message(stream, message):
+    stream.write(json.dumps(message).encode() + b"\n")
+
+
+def run_remote(storage_path, argv, socket_path=None):
+    """Run a CLI command on the daemon for `storage_path`.
+
+    Copies the daemon's output to our stdout/stderr and returns the exit
+    status, or None when no daemon is listening.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or socket_path_for(storage_path)
+    if not os.path.exists(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        # A stale socket file left by a daemon that was killed.
+        client.close()
+        return None
+
+    with client, client.makefile("rwb") as stream:
+        send_message(stream, {"argv": list(argv), "cwd": os.getcwd()})
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            for name, text in message.items():
+                target = sys.stdout if name == "stdout" else sys.stderr
+                target.write(text)
+                target.flush()
+    print("Task daemon closed the connection", file=sys.stderr)
+    return 1
@@ -0,0 +1,175 @@
+# task_manager/task_index.py
+from bisect import bisect_left, bisect_right, insort
+
+from models import TaskStatus
+
+
+class TaskIndex:
+    """Secondary indexes over the tasks held by a TaskStorage.
+
+    Keeps status -> ids, priority -> ids and tag -> ids (dicts used as
+    ordered sets) plus a list of (due_date, id) pairs sorted by due date
+    for the tasks that are not done, so deadline queries are a bisect, a
+    list of (created_at, id) pairs that gives listings a stable order to
+    page through, and the ids in sorted order so an id prefix is a bisect.
+    The keys each task was indexed under are remembered, so a task can be
+    re-indexed after it has already been changed in place.
+    """
+
+    def __init__(self):
+        self.by_status = {}
+        self.by_priority = {}
+        self.by_tag = {}
+        self.by_due_date = []
+        self.by_created = []
+        self.by_id = []
+        self._keys = {}
+        self._created = {}
+
+    def rebuild(self, tasks):
+        self.__init__()
+        for task in tasks:
+            due_date = self._add_to_sets(task)
+            if due_date is not None:
+                self.by_due_date.append((due_date, task.id))
+            self._created[task.id] = task.created_at
+            self.by_created.append((task.created_at, task.id))
+        # One sort instead of an insort per task.
+        self.by_due_date.sort()
+        self.by_created.sort()
+        self.by_id = sorted(self._created)
+
+    def add(self, task):
+        due_date = self._add_to_sets(task)
+        if due_date is not None:
+            insort(self.by_due_date, (due_date, task.id))
+        if task.id not in self._created:
+            insort(self.by_id, task.id)
+        created_at = self._created.get(task.id)
+        if created_at != task.created_at:
+            # Creation times never change in practice, so a re-index
+            # normally leaves this list alone.
+            if created_at is not None:
+                del self.by_created[bisect_left(self.by_created, (created_at, task.id))]
+            self._created[task.id] = task.created_at
+            insort(self.by_created, (task.created_at, task.id))
+
+    def _add_to_sets(self, task):
+        tags = tuple(dict.fromkeys(task.tags))
+        due_date = task.due_date if task.status != TaskStatus.DONE else None
+        self._keys[task.id] = (task.status, task.priority, tags, due_date)
+        self.by_status.setdefault(task.status, {})[task.id] = None
+        self.by_priority.setdefault(task.priority, {})[task.id] = None
+        for tag in tags:
+            self.by_tag.setdefault(tag, {})[task.id] = None
+        return due_date
+
+    def discard(self, task_id):
+        self._discard_keys(task_id)
+        if task_id in self._created:
+            created_at = self._created.pop(task_id)
+            del self.by_created[bisect_left(self.by_created, (created_at, task_id))]
+            del self.by_id[bisect_left(self.by_id, task_id)]
+
+    def _discard_keys(self, task_id):
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        status, priority, tags, due_date = keys
+        _discard_member(self.by_status, status, task_id)
+        _discard_member(self.by_priority, priority, task_id)
+        for tag in tags:
+            _discard_member(self.by_tag, tag, task_id)
+        if due_date is not None:
+            position = bisect_left(self.by_due_date, (due_date, task_id))
+            del self.by_due_date[position]
+
+    def reindex(self, task):
+        self._discard_keys(task.id)
+        self.add(task)
+
+    def ids_with_status(self, status):
+        return self.by_status.get(status, {}).keys()
+
+    def ids_with_priority(self, priority):
+        return self.by_priority.get(priority, {}).keys()
+
+    def ids_with_tag(self, tag):
+        return self.by_tag.get(tag, {}).keys()
+
+    def ids_due_before(self, when):
+        """Ids of open tasks due strictly before `when`, earliest first."""
+        return self.ids_due_between(None, when)
+
+    def ids_due_between(self, start, end):
+        """Ids of open tasks due in [start, end), earliest first.
+
+        start=None means no lower bound.
+        """
+        low, high = self._due_range(start, end)
+        return [task_id for _, task_id in self.by_due_date[low:high]]
+
+    def count_due_between(self, start, end):
+        low, high = self._due_range(start, end)
+        return max(high - low, 0)
+
+    def _due_range(self, start, end):
+        low = bisect_left(self.by_due_date, (start,)) if start is not None else 0
+        high = bisect_left(self.by_due_date, (end,)) if end is not None else len(self.by_due_date)
+        return low, high
+
+    def ids_created_after(self, cursor=None):
+        """Yield ids oldest first, starting just past `cursor`.
+
+        cursor is a (created_at, id) pair; the task it names does not have
+        to exist any more. Do not change the index while iterating.
+        """
+        position = bisect_right(self.by_created, cursor) if cursor is not None else 0
+        while position < len(self.by_created):
+            yield self.by_created[position][1]
+            position += 1
+
+    def ids_with_prefix(self, prefix, limit=None):
+        """Ids starting with `prefix`, in sorted order; at most `limit`."""
+        by_id = self.by_id
+        position = bisect_left(by_id, prefix)
+        ids = []
+        while (position < len(by_id) and by_id[position].startswith(prefix)
+               and (limit is None or len(ids) < limit)):
+            ids.append(by_id[position])
+            position += 1
+        return ids
+
+    def check_consistency(self, tasks):
+        """Rebuild the indexes from `tasks` and list every difference.
+
+        An empty list means the incrementally maintained indexes match.
+        """
+        fresh = TaskIndex()
+        fresh.rebuild(tasks)
+        problems = []
+        for name in ["by_status", "by_priority", "by_tag"]:
+            expected = {key: set(ids) for key, ids in getattr(fresh, name).items()}
+            actual = {key: set(ids) for key, ids in getattr(self, name).items()}
+            if expected != actual:
+                problems.append(f"{name}: expected {expected}, got {actual}")
+        if fresh.by_due_date != self.by_due_date:
+            problems.append(
+                f"by_due_date: expected {fresh.by_due_date}, got {self.by_due_date}"
+            )
+        if fresh.by_created != self.by_created:
+            problems.append("by_created: creation order differs from the tasks")
+        if fresh.by_id != self.by_id:
+            problems.append("by_id: sorted ids differ from the tasks")
+        if fresh._keys != self._keys:
+            problems.append("indexed keys differ from the tasks")
+        return problems
+
+
+def _discard_member(index, key, task_id):
+    members = index.get(key)
+    if members is None:
+        return
+    members.pop(task_id, None)
+    if not members:
+        del index[key]
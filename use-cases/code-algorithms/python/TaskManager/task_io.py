@@ -0,0 +1,149 @@
+# task_manager/task_io.py
+"""Streaming readers and writers for bulk import and export.
+
+Readers turn a stream into task records (dicts shaped like
+Task.to_dict(), or for JSONL the undecoded lines) without reading the
+whole stream first; record_to_task() validates one and builds the task. Writers take
+tasks one at a time. JSONL is the same format `list --format jsonl`
+prints, so its output can be imported as it is.
+"""
+import csv
+import json
+import uuid
+from datetime import datetime
+
+from models import PRIORITY_BY_VALUE, STATUS_BY_VALUE, TaskPriority
+
+FIELDS = ["id", "title", "description", "priority", "status",
+          "created_at", "updated_at", "due_date", "completed_at", "tags"]
+DATE_FIELDS = ["created_at", "updated_at", "due_date", "completed_at"]
+FORMATS = ["jsonl", "csv", "text"]
+
+
+def detect_format(path):
+    """Guess the format from a file name: .csv, .txt, anything else is JSONL."""
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith(".txt"):
+        return "text"
+    return "jsonl"
+
+
+def read_jsonl(stream):
+    # Lines are decoded by record_to_task, so a malformed one is reported
+    # (or skipped) like any other invalid record.
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def read_csv(stream):
+    return csv.DictReader(stream)
+
+
+def read_text(stream):
+    """One task per non-blank line, in the task_parser free-text syntax."""
+    from task_parser import parse_task_from_text
+    for line in stream:
+        if line.strip():
+            yield parse_task_from_text(" " + line.strip()).to_dict()
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv, "text": read_text}
+
+
+def read_records(stream, format="jsonl"):
+    """Yield the task records in `stream` one at a time."""
+    return READERS[format](stream)
+
+
+def record_to_task(record, task_class):
+    """Validate an imported record and build a task of `task_class`.
+
+    `record` is a dict or a line of JSON holding one. Only the title is
+    required. A record without an id gets a new one; priority may be its
+    number or its name, tags a list or a comma-separated string. Raises
+    ValueError for anything else that does not fit.
+    """
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    title = record.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("missing title")
+
+    data = {"id": _string(record, "id") or str(uuid.uuid4()), "title": title,
+            "description": _string(record, "description"),
+            "priority": _priority(record.get("priority")),
+            "status": _string(record, "status") or "todo",
+            "tags": _tags(record.get("tags"))}
+    if data["status"] not in STATUS_BY_VALUE:
+        raise ValueError(f"unknown status {data['status']!r}")
+    for field in DATE_FIELDS:
+        value = record.get(field) or None
+        if value is not None:
+            try:
+                parsed = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} is not an ISO date: {value!r}") from None
+            # Stored dates are naive local time and are compared as such.
+            if parsed.tzinfo is not None:
+                raise ValueError(f"{field} has a timezone: {value!r}")
+        data[field] = value
+    return task_class.from_dict(data)
+
+
+def _string(record, field):
+    value = record.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string, got {value!r}")
+    return value
+
+
+def _priority(value):
+    if value is None or value == "":
+        return TaskPriority.MEDIUM.value
+    if isinstance(value, str):
+        if value.upper() in TaskPriority.__members__:
+            return TaskPriority[value.upper()].value
+        value = int(value) if value.isdigit() else value
+    if not isinstance(value, int) or value not in PRIORITY_BY_VALUE:
+        raise ValueError(f"unknown priority {value!r}")
+    return value
+
+
+def _tags(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    if isinstance(value, list) and all(isinstance(tag, str) for tag in value):
+        return value
+    raise ValueError(f"tags must be a list or comma-separated string, got {value!r}")
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, task):
+        self.stream.write(json.dumps(task.to_dict(), ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    """Writes one row per task under a header row; tags are comma-separated."""
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, FIELDS)
+        self.writer.writeheader()
+
+    def write(self, task):
+        record = task.to_dict()
+        record["tags"] = ",".join(record["tags"])
+        self.writer.writerow(record)
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
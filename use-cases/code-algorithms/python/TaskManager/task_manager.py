@@ -1,13 +1,90 @@
 import argparse
+import heapq
+import os
 from datetime import datetime, timedelta
+from itertools import chain, islice
 
 from models import TaskPriority, Task, TaskStatus
-from storage import TaskStorage
+from storage import open_storage
+from task_query import TaskQuery, cursor_key, due_cursor_key, parse_cursor
+
+IMPORT_BATCH_SIZE = 1000
+# Done tasks completed longer ago than this are moved to the archive.
+ARCHIVE_AFTER_DAYS = 30
+# How many candidates an ambiguous id prefix reports.
+MAX_ID_CANDIDATES = 10
+
+
+class AmbiguousTaskIdError(LookupError):
+    """An id prefix matched more than one task."""
+
+    def __init__(self, prefix, candidates, truncated=False):
+        super().__init__(f"Task ID {prefix!r} matches several tasks: {', '.join(candidates)}"
+                         + (", ..." if truncated else ""))
+        self.prefix = prefix
+        self.candidates = candidates
+        # True when more tasks match than are listed.
+        self.truncated = truncated
 
 
 class TaskManager:
-    def __init__(self, storage_path="tasks.json"):
-        self.storage = TaskStorage(storage_path)
+    def __init__(self, storage_path="tasks.json", engine=None, task_class=Task,
+                 columnar=False, flush_interval=None, read_only=False, ranked=False):
+        self.task_class = task_class
+        self.storage = open_storage(storage_path, engine, task_class, flush_interval, read_only)
+        # Named scoring profiles for the top tasks, read from this JSON file
+        # when first needed (see task_priority.load_profiles).
+        self.profiles_path = storage_path + ".scoring"
+        self._profiles = None
+        # Optional NumPy TaskTable kept in sync with the storage; when set,
+        # statistics and list filters run as vectorized masks. SQLite stores
+        # have no index hooks and answer those from their own indexes.
+        self.table = None
+        if columnar and hasattr(self.storage, "add_index"):
+            from task_table import TaskTable
+            self.table = TaskTable.from_storage(self.storage)
+        # Optional TaskRanking kept in sync with the storage, so the top
+        # tasks are read off it instead of scoring the store each time.
+        # Worth it in long-running processes such as the daemon; SQLite
+        # stores have no index hooks and always score on demand.
+        self.ranking = None
+        if ranked and hasattr(self.storage, "add_index"):
+            from task_ranking import TaskRanking
+            try:
+                profile = self.scoring_profile()
+            except ValueError as e:
+                print(f"Error loading scoring profiles: {e}")
+                profile = None
+            self.ranking = TaskRanking.from_storage(self.storage, profile=profile)
+
+    def batch(self):
+        """Defer saving until the block exits, then write once.
+
+            with manager.batch():
+                for title in titles:
+                    manager.create_task(title)
+
+        If the block raises, the changes made in it are rolled back.
+        """
+        return self.storage.transaction()
+
+    def resolve_task_id(self, prefix):
+        """The full id of the task whose id is or starts with `prefix`,
+        such as the 8 characters the CLI prints.
+
+        An exact id always wins. Returns None when nothing matches and
+        raises AmbiguousTaskIdError, listing up to MAX_ID_CANDIDATES of
+        the matches, when several tasks do.
+        """
+        if not prefix:
+            return None
+        if self.storage.get_task(prefix) is not None:
+            return prefix
+        candidates = self.storage.find_ids(prefix, MAX_ID_CANDIDATES + 1)
+        if len(candidates) > 1:
+            raise AmbiguousTaskIdError(prefix, candidates[:MAX_ID_CANDIDATES],
+                                       truncated=len(candidates) > MAX_ID_CANDIDATES)
+        return candidates[0] if candidates else None
 
     def create_task(self, title, description="", priority_value=2,
                    due_date_str=None, tags=None):
@@ -20,11 +97,20 @@ class TaskManager:
                 print("Invalid date format. Use YYYY-MM-DD")
                 return None
 
-        task = Task(title, description, priority, due_date, tags)
+        task = self.task_class(title, description, priority, due_date, tags)
         task_id = self.storage.add_task(task)
         return task_id
 
-    def list_tasks(self, status_filter=None, priority_filter=None, show_overdue=False):
+    def list_tasks(self, status_filter=None, priority_filter=None, show_overdue=False,
+                   due_within=None):
+        if due_within is not None:
+            # Deadline view: open tasks due in the next `due_within` days,
+            # plus the overdue ones when show_overdue is also set.
+            return self.get_tasks_due_within(due_within, include_overdue=show_overdue)
+
+        if self.table is not None:
+            return self._list_tasks_columnar(status_filter, priority_filter, show_overdue)
+
         if show_overdue:
             return self.storage.get_overdue_tasks()
 
@@ -38,13 +124,208 @@ class TaskManager:
 
         return self.storage.get_all_tasks()
 
+    def _list_tasks_columnar(self, status_filter, priority_filter, show_overdue):
+        # Same precedence as list_tasks: overdue, then status, then priority.
+        if show_overdue:
+            task_ids = self.table.select_ids(overdue=True)
+        elif status_filter:
+            task_ids = self.table.select_ids(status=TaskStatus(status_filter))
+        elif priority_filter:
+            task_ids = self.table.select_ids(priority=TaskPriority(priority_filter))
+        else:
+            return self.storage.get_all_tasks()
+        return [self.storage.get_task(task_id) for task_id in task_ids]
+
+    def iter_tasks(self, status_filter=None, priority_filter=None, show_overdue=False,
+                   due_within=None, after=None, limit=None):
+        """Yield the tasks list_tasks would return one at a time, in its
+        order: earliest due first for the overdue and due-within views,
+        oldest first otherwise.
+
+        Pages through the store: pass the format_cursor() of the last task
+        of one page (with by_due=True for the due views) as `after` to get
+        the next. A cursor stays valid when tasks are added or deleted,
+        including the task it was made from.
+        """
+        now = datetime.now()
+        by_due = show_overdue or due_within is not None
+        cursor = parse_cursor(after, by_due) if after else None
+        if not (by_due or status_filter or priority_filter):
+            return islice(self.storage.iter_tasks_by_created(cursor), limit)
+
+        # Only the index candidates of the filter are read and ordered.
+        query = self._list_query(status_filter, priority_filter, show_overdue, due_within, now)
+        order = due_cursor_key if by_due else cursor_key
+        tasks = (task for task in self.storage.find_tasks(query, now) if query.matches(task, now))
+        if cursor is not None:
+            tasks = (task for task in tasks if order(task) > cursor)
+        if limit is None:
+            return iter(sorted(tasks, key=order))
+        return iter(heapq.nsmallest(limit, tasks, key=order))
+
+    def _list_query(self, status_filter, priority_filter, show_overdue, due_within, now):
+        # The same filters, with the same precedence, as list_tasks.
+        if due_within is not None:
+            open_statuses = [status for status in TaskStatus if status != TaskStatus.DONE]
+            return TaskQuery(statuses=open_statuses, due_after=None if show_overdue else now,
+                             due_before=now + timedelta(days=due_within))
+        if show_overdue:
+            return TaskQuery(overdue=True)
+        if status_filter:
+            return TaskQuery(statuses=[TaskStatus(status_filter)])
+        if priority_filter:
+            return TaskQuery(priorities=[TaskPriority(priority_filter)])
+        return TaskQuery()
+
+    def query(self, query, now=None):
+        """Tasks matching a TaskQuery, or a query expression such as
+        "status=in_progress priority>=high tag=backend due<7d sort=due limit=10".
+        """
+        now = now or datetime.now()
+        if isinstance(query, str):
+            query = TaskQuery.parse(query, now)
+        return query.select(self.storage.find_tasks(query, now), now)
+
+    def explain_query(self, query, now=None):
+        """How the storage will look up the tasks for a query."""
+        now = now or datetime.now()
+        if isinstance(query, str):
+            query = TaskQuery.parse(query, now)
+        return self.storage.plan_query(query, now)
+
+    def search(self, query, limit=None):
+        """Tasks whose title, description or tags match a search expression
+        such as "deploy* backend OR hotfix", best match first."""
+        return self.storage.search(query, limit)
+
+    def scoring_profile(self, name=None):
+        """The ScoringProfile called `name` in the store's profiles file,
+        by default its "default" profile or else task_priority's.
+
+        The file is re-read when it changes. Raises ValueError for a name
+        it does not have or a malformed file.
+        """
+        from task_priority import DEFAULT_PROFILE, load_profiles
+
+        try:
+            stat = os.stat(self.profiles_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if self._profiles is None or self._profiles[0] != signature:
+            self._profiles = (signature, load_profiles(self.profiles_path) if signature else {})
+        profiles = self._profiles[1]
+        name = name or "default"
+        if name in profiles:
+            return profiles[name]
+        if name == "default":
+            return DEFAULT_PROFILE
+        raise ValueError(f"No scoring profile named {name!r} in {self.profiles_path}")
+
+    def get_top_priority_tasks(self, limit=5, now=None, profile=None):
+        """The `limit` most important tasks by task_priority score under the
+        scoring profile named `profile` (default: the store's default),
+        best first: read off the ranking when one is kept for that profile,
+        else streamed from the storage rather than listed and sorted."""
+        scoring = self.scoring_profile(profile)
+        if self.ranking is not None:
+            if self.ranking.profile is not scoring and profile in (None, "default"):
+                # The profiles file changed under a running process.
+                self.ranking.use_profile(scoring)
+            if self.ranking.profile is scoring:
+                return self.ranking.top(limit, now)
+        from task_priority import top_tasks
+        return top_tasks(self.storage.iter_tasks_by_created(), limit, now, scoring)
+
+    def rank_tasks(self, limit=None, workers=None, now=None, profile=None):
+        """Like get_top_priority_tasks(), all tasks by default, but scored
+        in a pool of `workers` processes (default: one per CPU); see
+        task_parallel. For ranking very large binary stores, or stores of
+        EpochTask, in one go."""
+        scoring = self.scoring_profile(profile)
+        if getattr(type(self.storage), "rank_tasks", None) is not None:
+            return self.storage.rank_tasks(limit, now, scoring, workers)
+        from task_parallel import parallel_rank
+        return parallel_rank(self.storage.iter_tasks_by_created(), limit, now, scoring, workers)
+
+    def get_overdue_tasks(self, now=None):
+        """Open tasks whose due date has passed, earliest first."""
+        return self.storage.get_overdue_tasks(now or datetime.now())
+
+    def get_tasks_due_within(self, days, include_overdue=False, now=None):
+        """Open tasks due in the next `days` days, earliest first."""
+        now = now or datetime.now()
+        start = None if include_overdue else now
+        return self.storage.get_tasks_due_between(start, now + timedelta(days=days))
+
+    def import_tasks(self, records, batch_size=IMPORT_BATCH_SIZE, skip_invalid=False):
+        """Add tasks from an iterable of records (see task_io.record_to_task).
+
+        Records are validated and converted a batch at a time and each
+        batch is saved with one write, so any number of records can be
+        imported without holding them all. A record whose id is already in
+        the store replaces that task. An invalid record raises ValueError
+        naming it, after the batches before it have been saved; with
+        skip_invalid=True it is counted and skipped instead.
+
+        Returns (imported, skipped).
+        """
+        from task_io import record_to_task
+
+        imported = skipped = number = 0
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return imported, skipped
+            tasks = []
+            for number, record in enumerate(batch, number + 1):
+                try:
+                    tasks.append(record_to_task(record, self.task_class))
+                except ValueError as e:
+                    if not skip_invalid:
+                        raise ValueError(f"record {number}: {e}") from None
+                    skipped += 1
+            with self.batch():
+                for task in tasks:
+                    self.storage.add_task(task)
+            imported += len(tasks)
+
+    def export_tasks(self, writer):
+        """Write every task to `writer` (anything with write(task)), oldest
+        first and archived tasks after the live ones, without building a
+        list of them. Returns the count."""
+        tasks = self.storage.iter_tasks_by_created()
+        if getattr(type(self.storage), "iter_archived_tasks", None) is not None:
+            tasks = chain(tasks, self.storage.iter_archived_tasks())
+        count = 0
+        for task in tasks:
+            writer.write(task)
+            count += 1
+        return count
+
+    def archive_completed(self, older_than_days=ARCHIVE_AFTER_DAYS, now=None):
+        """Move tasks completed more than `older_than_days` ago into the
+        store's archive, so loading and saving the store skip them.
+
+        They can still be shown by id and listed by history(), and are
+        still counted by get_statistics(). Returns how many were moved.
+        """
+        now = now or datetime.now()
+        return self.storage.archive_completed(now - timedelta(days=older_than_days))
+
+    def history(self, since=None, limit=None):
+        """Completed tasks, most recently completed first, archived ones
+        included; only those completed at or after `since` when given."""
+        return islice(self.storage.iter_completed(since), limit)
+
     def update_task_status(self, task_id, new_status_value):
         new_status = TaskStatus(new_status_value)
         if new_status == TaskStatus.DONE:
             task = self.storage.get_task(task_id)
             if task:
                 task.mark_as_done()
-                self.storage.save()
+                self.storage.save(task)
                 return True
         else:
             return self.storage.update_task(task_id, status=new_status)
@@ -71,21 +352,50 @@ class TaskManager:
         task = self.storage.get_task(task_id)
         if task:
             if tag not in task.tags:
-                task.tags.append(tag)
-                self.storage.save()
+                # Reassigned rather than appended so tuple-backed tags work too.
+                task.tags = [*task.tags, tag]
+                self.storage.save(task)
             return True
         return False
 
     def remove_tag_from_task(self, task_id, tag):
         task = self.storage.get_task(task_id)
         if task and tag in task.tags:
-            task.tags.remove(tag)
-            self.storage.save()
+            tags = list(task.tags)
+            tags.remove(tag)
+            task.tags = tags
+            self.storage.save(task)
             return True
         return False
 
-    def get_statistics(self):
+    def get_statistics(self, verify=False):
+        """Task counts by status and priority, plus overdue and recent ones.
+
+        Answered from the storage's running counters (or the columnar
+        table) when it keeps them. With verify=True the result is checked
+        against a full scan of the store and a mismatch raises RuntimeError.
+        """
+        now = datetime.now()
+        if self.table is not None:
+            stats = self.storage.archive.add_statistics(self.table.statistics(now), now)
+        elif getattr(type(self.storage), "get_statistics", None) is not None:
+            stats = self.storage.get_statistics(now)
+        else:
+            stats = self._scan_statistics(now)
+
+        if verify:
+            scanned = self._scan_statistics(now)
+            if stats != scanned:
+                raise RuntimeError(f"Statistics out of sync with the store: {stats} != {scanned}")
+        return stats
+
+    def _scan_statistics(self, now):
         tasks = self.storage.get_all_tasks()
+        if getattr(type(self.storage), "iter_archived_tasks", None) is not None:
+            # A task brought back into the store may be archived until the
+            # next write; it counts once.
+            live = {task.id for task in tasks}
+            tasks.extend(task for task in self.storage.iter_archived_tasks() if task.id not in live)
         total = len(tasks)
 
         # Count by status
@@ -99,10 +409,13 @@ class TaskManager:
             priority_counts[task.priority.name] += 1
 
         # Count overdue
-        overdue_count = len([task for task in tasks if task.is_overdue()])
+        overdue_count = len([
+            task for task in tasks
+            if task.due_date and now > task.due_date and task.status != TaskStatus.DONE
+        ])
 
         # Count completed in last 7 days
-        seven_days_ago = datetime.now() - timedelta(days=7)
+        seven_days_ago = now - timedelta(days=7)
         completed_recently = len([
             task for task in tasks
             if task.completed_at and task.completed_at >= seven_days_ago
@@ -115,4 +428,3 @@ class TaskManager:
             "overdue": overdue_count,
             "completed_last_week": completed_recently
         }
-
@@ -0,0 +1,182 @@
+# task_manager/task_parallel.py
+"""Process-pool scoring and ranking for very large task sets.
+
+Scoring is pure Python, so a single process ranks a few million tasks
+one at a time. Here the tasks are cut into shards of SHARD_SIZE, each
+shard is scored in a ProcessPoolExecutor worker, and every worker sends
+back its local top `limit` (or, for a full ranking, its shard as one
+sorted run) as (-score, key) pairs. The parent k-way merges the runs with
+heapq.merge and reads off the winners.
+
+A shard travels as a compact projection: just the fields a score reads,
+as flat arrays of small integers and epoch microseconds plus one "has a
+boost tag" flag per task (project_tasks()), which pickle as raw bytes
+instead of as Task objects. The scoring profile is pickled by its
+declarative fields and compiled again in the worker.
+
+For tasks already in memory the parent still reads each one to project
+it. An EpochTask's times are epoch microseconds already and project for
+a fraction of what scoring costs, so the workers do nearly all the work.
+A Task's datetimes cost more to convert than to score: for Task objects
+the parent is the bottleneck and the single-process functions are
+faster. A binary store (.tbin) already holds the projection on disk as
+fixed-width records: rank_binary_file() has each worker map the file
+and read its own range of records, the parent does no per-task work at
+all, and throughput grows with the workers.
+"""
+import os
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from heapq import merge, nsmallest
+from itertools import islice
+
+from models import NO_TIME, Task, TaskStatus, to_epoch
+from task_priority import DEFAULT_PROFILE
+
+# Tasks per shard: enough to make a round trip to a worker worth it.
+SHARD_SIZE = 65536
+
+# Status codes in projections, the same as the binary format's, by
+# status value.
+STATUSES = list(TaskStatus)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+
+
+def project_tasks(tasks, profile=None):
+    """The fields of `tasks` that `profile` scores, as flat arrays:
+    (priorities, status codes, due dates, update times, boosted), with
+    times in epoch microseconds (NO_TIME for no due date) and boosted one
+    byte per task."""
+    boost_tags = (profile or DEFAULT_PROFILE).boost_tag_set
+    tasks = tasks if isinstance(tasks, list) else list(tasks)
+    try:
+        # EpochTask keeps its times as epoch microseconds already; reading
+        # them raw costs a fraction of converting datetimes.
+        due_dates = [task._due_date for task in tasks]
+        updated = [task._updated_at for task in tasks]
+        due_dates = [NO_TIME if due_date is None else due_date for due_date in due_dates]
+    except AttributeError:
+        due_dates = [to_epoch(task.due_date) for task in tasks]
+        updated = [to_epoch(task.updated_at) for task in tasks]
+    return (array("b", [task.priority._value_ for task in tasks]),
+            array("b", [STATUS_CODES[task.status._value_] for task in tasks]),
+            array("q", due_dates),
+            array("q", updated),
+            bytes([not boost_tags.isdisjoint(task.tags) for task in tasks]))
+
+
+def score_projection(projection, now, profile=None):
+    """Scores of a projection's tasks, in order: the same as
+    profile.score_tasks() on the tasks themselves."""
+    profile = profile or DEFAULT_PROFILE
+    priorities, statuses, due_dates, updated, boosted = projection
+    cutoffs, updated_since = profile.cutoffs(now)
+    # Whole microseconds either way, so epoch comparisons agree exactly.
+    cutoffs = [to_epoch(cutoff) for cutoff in cutoffs]
+    updated_since = to_epoch(updated_since)
+    priority_points = profile.priority_points
+    status_points = [profile.status_points[status.value] for status in STATUSES]
+    due_points = profile.due_points
+    tag_boost = profile.tag_boost
+    recent_update_boost = profile.recent_update_boost
+
+    scores = []
+    append = scores.append
+    for priority, status, due_date, updated_at, boost in zip(
+            priorities, statuses, due_dates, updated, boosted):
+        score = priority_points[priority] + status_points[status]
+        if due_date != NO_TIME:
+            score += due_points[bisect_right(cutoffs, due_date)]
+        if boost:
+            score += tag_boost
+        if updated_at > updated_since:
+            score += recent_update_boost
+        append(score)
+    return scores
+
+
+def _select(scores, keys, limit):
+    # (-score, key) pairs in ranking order: the best `limit`, or all.
+    pairs = zip([-score for score in scores], keys)
+    return sorted(pairs) if limit is None else nsmallest(limit, pairs)
+
+
+def _rank_projection(projection, start, limit, now, profile):
+    scores = score_projection(projection, now, profile)
+    return _select(scores, range(start, start + len(scores)), limit)
+
+
+def _rank_records(path, start, stop, limit, now, profile):
+    # Runs in a worker: rank records [start, stop) of a binary task file,
+    # ties broken by (created_at, id) as the stores list tasks.
+    from binary_storage import BinaryTaskFile
+
+    file = BinaryTaskFile(path)
+    try:
+        projection, keys = file.project(start, stop, profile.boost_tag_set)
+    finally:
+        file.close()
+    return _select(score_projection(projection, now, profile), keys, limit)
+
+
+def _merge(runs, limit):
+    # The k-way merge of the workers' runs: the keys of the winners.
+    return [key for _, key in islice(merge(*runs), limit)]
+
+
+def _default_workers(workers):
+    return workers or os.cpu_count() or 1
+
+
+def parallel_rank(tasks, limit=None, now=None, profile=None, workers=None, shard_size=SHARD_SIZE):
+    """The `limit` highest scoring `tasks` (all of them by default), best
+    first, scored in `workers` processes (default: one per CPU).
+
+    Equal scores keep their input order, so this lists exactly what
+    task_priority.top_tasks() or sort_tasks_by_importance() would. Shards
+    are handed out as they are projected, so the workers score while the
+    parent reads on.
+    """
+    if limit is not None and limit <= 0:
+        return []
+    now = now or datetime.now()
+    profile = profile or DEFAULT_PROFILE
+    tasks = iter(tasks)
+    read = []
+    runs = []
+    with ProcessPoolExecutor(max_workers=_default_workers(workers)) as executor:
+        while True:
+            shard = list(islice(tasks, shard_size))
+            if not shard:
+                break
+            runs.append(executor.submit(_rank_projection, project_tasks(shard, profile),
+                                        len(read), limit, now, profile))
+            read.extend(shard)
+        runs = [run.result() for run in runs]
+    return [read[position] for position in _merge(runs, limit)]
+
+
+def rank_binary_file(path, limit=None, now=None, profile=None, workers=None,
+                     shard_size=SHARD_SIZE, task_class=Task):
+    """The `limit` highest scoring tasks of a binary task file (all by
+    default), best first, equal scores oldest first; every worker reads its
+    own shard of records straight from the file. Only the tasks returned
+    are decoded in full."""
+    from binary_storage import BinaryTaskFile
+
+    if limit is not None and limit <= 0:
+        return []
+    now = now or datetime.now()
+    profile = profile or DEFAULT_PROFILE
+    file = BinaryTaskFile(path, task_class)
+    try:
+        with ProcessPoolExecutor(max_workers=_default_workers(workers)) as executor:
+            runs = [executor.submit(_rank_records, path, start, min(start + shard_size, len(file)),
+                                    limit, now, profile)
+                    for start in range(0, len(file), shard_size)]
+            runs = [run.result() for run in runs]
+        return [file.read_at(position) for _, _, position in _merge(runs, limit)]
+    finally:
+        file.close()
@@ -0,0 +1,260 @@
+# task_manager/task_query.py
+"""Combined task filters with sort and limit.
+
+A TaskQuery is a conjunction of filters. It can be built directly or
+parsed from a short expression, one term per word:
+
+    status=in_progress,review   any of the listed statuses
+    priority>=high              names or numbers; = < <= > >= compare
+    tag=backend                 has the tag; repeat the term to need several,
+                                use tag=a,b for either of them
+    due<7d  due>=2030-01-01     due date bounds; Nd is N days from now,
+                                "today" is midnight today
+    overdue                     past due and not done
+    sort=-priority              due, priority, created, updated, title or
+                                status; a leading "-" sorts descending
+    limit=10                    at most this many tasks
+
+For an indexed storage the planner starts from the smallest candidate
+set any one filter can get from the TaskIndex, then checks every filter
+on those candidates in a single pass. With a limit, sorting keeps only
+the best `limit` tasks on a heap instead of sorting all matches.
+"""
+import heapq
+from datetime import datetime, timedelta
+from itertools import chain, islice
+
+from models import TaskPriority, TaskStatus
+
+STATUS_ORDER = {status: position for position, status in enumerate(TaskStatus)}
+
+SORT_KEYS = {
+    "due": lambda task: task.due_date,
+    "priority": lambda task: task.priority.value,
+    "created": lambda task: task.created_at,
+    "updated": lambda task: task.updated_at,
+    "title": lambda task: task.title,
+    "status": lambda task: STATUS_ORDER[task.status],
+}
+
+COMPARISONS = {
+    "=": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+class TaskQuery:
+    def __init__(self, statuses=None, priorities=None, tags=None, due_before=None,
+                 due_after=None, overdue=False, sort_by=None, descending=False, limit=None):
+        self.statuses = set(statuses) if statuses else None
+        self.priorities = set(priorities) if priorities else None
+        # Each group is a set of tags; a task needs one tag from every group.
+        self.tags = [set(group) for group in tags or []]
+        # due_before is exclusive, due_after inclusive.
+        self.due_before = due_before
+        self.due_after = due_after
+        self.overdue = overdue
+        self.sort_by = _check_sort(sort_by) if sort_by is not None else None
+        self.descending = descending
+        self.limit = limit
+
+    @classmethod
+    def parse(cls, text, now=None):
+        """Build a query from an expression such as "status=todo tag=api limit=5"."""
+        now = now or datetime.now()
+        query = cls()
+        for term in text.split():
+            if term == "overdue":
+                query.overdue = True
+                continue
+            key, op, value = _split_term(term)
+            if key == "status" and op == "=":
+                query.statuses = {_parse_status(item) for item in value.split(",")}
+            elif key == "priority":
+                wanted = [_parse_priority(item) for item in value.split(",")]
+                if op == "=":
+                    query.priorities = set(wanted)
+                elif len(wanted) == 1:
+                    query.priorities = {priority for priority in TaskPriority
+                                        if COMPARISONS[op](priority.value, wanted[0].value)}
+                else:
+                    raise ValueError(f"Cannot compare priority with a list: {term}")
+            elif key == "tag" and op == "=":
+                query.tags.append(set(value.split(",")))
+            elif key == "due" and op != "=":
+                when, whole_day = _parse_when(value, now)
+                if whole_day and op in ("<=", ">"):
+                    # A date means the whole day: due<=2030-01-01 includes it.
+                    when += timedelta(days=1)
+                if op in ("<", "<="):
+                    query.due_before = when
+                else:
+                    query.due_after = when
+            elif key == "sort" and op == "=":
+                query.sort_by = _check_sort(value.lstrip("-"))
+                query.descending = value.startswith("-")
+            elif key == "limit" and op == "=":
+                query.limit = int(value)
+            else:
+                raise ValueError(f"Unknown query term: {term}")
+        return query
+
+    def matches(self, task, now):
+        if self.statuses is not None and task.status not in self.statuses:
+            return False
+        if self.priorities is not None and task.priority not in self.priorities:
+            return False
+        for group in self.tags:
+            if group.isdisjoint(task.tags):
+                return False
+        due_date = task.due_date
+        if self.due_before is not None or self.due_after is not None or self.overdue:
+            if due_date is None:
+                return False
+            if self.due_before is not None and due_date >= self.due_before:
+                return False
+            if self.due_after is not None and due_date < self.due_after:
+                return False
+            if self.overdue and (due_date >= now or task.status == TaskStatus.DONE):
+                return False
+        return True
+
+    def due_window(self, now):
+        """(start, end) due bounds, or None when the query has none."""
+        end = self.due_before
+        if self.overdue:
+            end = now if end is None else min(end, now)
+        if end is None and self.due_after is None:
+            return None
+        return self.due_after, end
+
+    def only_open_tasks(self):
+        if self.overdue:
+            return True
+        return self.statuses is not None and TaskStatus.DONE not in self.statuses
+
+    def plan(self, index, now):
+        """Pick the most selective index lookup for this query.
+
+        Returns (name, estimated rows, ids) for the chosen lookup, or None
+        when no filter can use the index and every task must be checked.
+        """
+        options = []
+        if self.statuses is not None:
+            sets = [index.ids_with_status(status) for status in self.statuses]
+            options.append(("status", sum(map(len, sets)), sets))
+        if self.priorities is not None:
+            sets = [index.ids_with_priority(priority) for priority in self.priorities]
+            options.append(("priority", sum(map(len, sets)), sets))
+        for group in self.tags:
+            sets = [index.ids_with_tag(tag) for tag in group]
+            options.append(("tag", sum(map(len, sets)), sets))
+        window = self.due_window(now)
+        # The due-date index only holds open tasks.
+        if window is not None and self.only_open_tasks():
+            options.append(("due", index.count_due_between(*window), window))
+        if not options:
+            return None
+
+        name, rows, source = min(options, key=lambda option: option[1])
+        if name == "due":
+            ids = index.ids_due_between(*source)
+        elif len(source) == 1:
+            ids = source[0]
+        else:
+            # A task can be in several of the sets (tag groups), so dedupe.
+            ids = dict.fromkeys(chain.from_iterable(source))
+        return name, rows, ids
+
+    def select(self, tasks, now):
+        """Filter `tasks` in one pass and apply sort_by and limit."""
+        matching = (task for task in tasks if self.matches(task, now))
+        if self.sort_by is None:
+            return list(islice(matching, self.limit))
+
+        value = SORT_KEYS[self.sort_by]
+        if self.descending:
+            # Tasks without a value (no due date) go last either way.
+            def key(task):
+                field = value(task)
+                return field is not None, field
+            pick, sort_reversed = heapq.nlargest, True
+        else:
+            def key(task):
+                field = value(task)
+                return field is None, field
+            pick, sort_reversed = heapq.nsmallest, False
+        if self.limit is None:
+            return sorted(matching, key=key, reverse=sort_reversed)
+        return pick(self.limit, matching, key=key)
+
+
+def cursor_key(task):
+    """The order cursors page in, as a tuple parse_cursor() returns."""
+    return task.created_at, task.id
+
+
+def due_cursor_key(task):
+    return task.due_date, task.created_at, task.id
+
+
+def format_cursor(task, by_due=False):
+    """Opaque cursor for listing the tasks created after `task`, or with
+    by_due, the tasks due after it (earliest due first)."""
+    cursor = f"{task.created_at.isoformat()}_{task.id}"
+    return f"{task.due_date.isoformat()}_{cursor}" if by_due else cursor
+
+
+def parse_cursor(cursor, by_due=False):
+    fields = cursor.split("_", 2 if by_due else 1)
+    try:
+        if len(fields) != (3 if by_due else 2):
+            raise ValueError
+        return (*map(datetime.fromisoformat, fields[:-1]), fields[-1])
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def _check_sort(field):
+    if field not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by {field!r}; use one of {', '.join(SORT_KEYS)}")
+    return field
+
+
+def _split_term(term):
+    for op in ("<=", ">=", "=", "<", ">", ":"):
+        key, found, value = term.partition(op)
+        if found and key and value:
+            return key, "=" if op == ":" else op, value
+    raise ValueError(f"Unknown query term: {term}")
+
+
+def _parse_status(value):
+    try:
+        return TaskStatus(value)
+    except ValueError:
+        raise ValueError(f"Unknown status: {value}") from None
+
+
+def _parse_priority(value):
+    if value.isdigit():
+        return TaskPriority(int(value))
+    try:
+        return TaskPriority[value.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown priority: {value}") from None
+
+
+def _parse_when(value, now):
+    """Return (datetime, whole_day) for "today", "Nd" or "YYYY-MM-DD"."""
+    if value == "today":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0), True
+    if value.endswith("d") and value[:-1].lstrip("-").isdigit():
+        return now + timedelta(days=int(value[:-1])), False
+    try:
+        return datetime.strptime(value, "%Y-%m-%d"), True
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}; use YYYY-MM-DD, Nd or today") from None
@@ -0,0 +1,147 @@
+# task_manager/task_ranking.py
+from bisect import bisect_left, insort
+from datetime import datetime
+from heapq import heapify, heappop, heappush
+
+from task_priority import DEFAULT_PROFILE
+
+
+class TaskRanking:
+    """Tasks kept ordered by their task_priority score, for "top N now".
+
+    A task's score changes only when the task does or when time crosses
+    one of its boundaries: a due date band edge or the end of the recent
+    update boost (see next_score_change). So every task is scored once and
+    filed in a bucket per score, and a heap holds the instant each score
+    expires. Attached to a TaskStorage with from_storage(), mutations
+    re-score just the task they touch; advance() re-scores just the tasks
+    whose boundary has passed. top() is then O(k) plus one heap peek
+    instead of scoring the whole store.
+
+    Within a score, tasks are ordered by (created_at, id), so top() lists
+    exactly what task_priority.top_tasks() over the storage's
+    iter_tasks_by_created() would, scored with the same `profile`.
+    """
+
+    def __init__(self, now=None, profile=None):
+        self.now = now or datetime.now()
+        self.profile = profile or DEFAULT_PROFILE
+        self.tasks = {}
+        # task id -> (score, (created_at, id), expires or None)
+        self.entries = {}
+        # score -> sorted [(created_at, id)], and the scores that have one
+        self.buckets = {}
+        self.scores = []
+        # (expires, task id); entries for tasks since re-scored or removed
+        # are skipped when they come up.
+        self.expiries = []
+
+    @classmethod
+    def from_storage(cls, storage, now=None, profile=None):
+        return storage.add_index(cls(now, profile))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def rebuild(self, tasks):
+        tasks = list(tasks)
+        self.tasks = {task.id: task for task in tasks}
+        self.entries = {}
+        self.buckets = {}
+        self.expiries = []
+        for task, score in zip(tasks, self.profile.score_tasks(tasks, self.now)):
+            key = (task.created_at, task.id)
+            expires = self.profile.next_score_change(task, self.now)
+            self.entries[task.id] = (score, key, expires)
+            self.buckets.setdefault(score, []).append(key)
+            if expires is not None:
+                self.expiries.append((expires, task.id))
+        for bucket in self.buckets.values():
+            bucket.sort()
+        self.scores = sorted(self.buckets)
+        heapify(self.expiries)
+
+    def add(self, task):
+        if task.id in self.entries:
+            self.discard(task.id)
+        self.tasks[task.id] = task
+        score = self.profile.score(task, self.now)
+        key = (task.created_at, task.id)
+        expires = self.profile.next_score_change(task, self.now)
+        self.entries[task.id] = (score, key, expires)
+        bucket = self.buckets.get(score)
+        if bucket is None:
+            bucket = self.buckets[score] = []
+            insort(self.scores, score)
+        insort(bucket, key)
+        if expires is not None:
+            heappush(self.expiries, (expires, task.id))
+            if len(self.expiries) > 2 * len(self.entries) + 1024:
+                self._compact_expiries()
+
+    def discard(self, task_id):
+        entry = self.entries.pop(task_id, None)
+        if entry is None:
+            return
+        del self.tasks[task_id]
+        score, key, _ = entry
+        bucket = self.buckets[score]
+        del bucket[bisect_left(bucket, key)]
+        if not bucket:
+            del self.buckets[score]
+            del self.scores[bisect_left(self.scores, score)]
+
+    def reindex(self, task):
+        self.add(task)
+
+    def use_profile(self, profile):
+        """Score with `profile` from now on, re-scoring every task."""
+        self.profile = profile
+        self.rebuild(list(self.tasks.values()))
+
+    def _compact_expiries(self):
+        self.expiries = [(expires, task_id) for task_id, (_, _, expires) in self.entries.items()
+                         if expires is not None]
+        heapify(self.expiries)
+
+    def next_boundary(self):
+        """When the next score expires, or None if none ever will."""
+        while self.expiries:
+            expires, task_id = self.expiries[0]
+            entry = self.entries.get(task_id)
+            if entry is not None and entry[2] == expires:
+                return expires
+            heappop(self.expiries)
+        return None
+
+    def advance(self, now):
+        """Move the ranking to `now`, re-scoring only the tasks whose score
+        may have changed since. Returns how many were re-scored."""
+        if now < self.now:
+            # Time went backwards (a clock change); boundaries only look ahead.
+            self.now = now
+            self.rebuild(self.tasks.values())
+            return len(self.entries)
+        self.now = now
+        rescored = 0
+        while True:
+            expires = self.next_boundary()
+            if expires is None or expires > now:
+                return rescored
+            _, task_id = heappop(self.expiries)
+            self.add(self.tasks[task_id])
+            rescored += 1
+
+    def top(self, limit, now=None):
+        """The `limit` highest scoring tasks at `now` (default: the current
+        time), best first."""
+        self.advance(now or datetime.now())
+        if limit <= 0:
+            return []
+        tasks = []
+        for score in reversed(self.scores):
+            for _, task_id in self.buckets[score]:
+                if len(tasks) == limit:
+                    return tasks
+                tasks.append(self.tasks[task_id])
+        return tasks
@@ -0,0 +1,145 @@
+# task_manager/task_server.py
+"""Long-running task daemon for the CLI.
+
+`cli.py serve` loads the store once and listens on a Unix socket next to
+it. Every other cli.py command first tries that socket: the daemon runs
+the command against its in-memory TaskManager and streams the output
+back, so a command costs a round trip instead of a full load. When no
+daemon is running the CLI opens the store itself, as before.
+
+The client side lives in task_client, which the CLI imports on every
+run, so it is kept free of everything only the daemon needs.
+"""
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+
+from task_client import send_message, socket_path_for
+
+
+class _StreamWriter(io.TextIOBase):
+    """Text stream that forwards what is written to the client.
+
+    Output is sent when the command flushes (write_tasks does so after
+    its first task and every chunk) or when 64 KiB have piled up.
+    """
+
+    def __init__(self, wfile, name):
+        self.wfile = wfile
+        self.name = name
+        self.buffer = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= 65536:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            send_message(self.wfile, {self.name: "".join(self.buffer)})
+            self.buffer.clear()
+            self.size = 0
+        self.wfile.flush()
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        send_message(self.wfile, {"exit": self.server.run(request, self.wfile)})
+        self.wfile.flush()
+
+
+class TaskServer(socketserver.UnixStreamServer):
+    """Serves CLI commands one at a time from a single loaded TaskManager."""
+
+    def __init__(self, socket_path, task_manager):
+        self.task_manager = task_manager
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            # Left behind by a daemon that did not shut down cleanly.
+            os.unlink(socket_path)
+        super().__init__(socket_path, _CommandHandler)
+        os.chmod(socket_path, 0o600)
+
+    def run(self, request, wfile):
+        from cli import build_parser, run_command
+
+        refresh = getattr(self.task_manager.storage, "refresh", None)
+        if refresh is not None:
+            # Another process may have written the store directly.
+            refresh()
+
+        out, err = _StreamWriter(wfile, "stdout"), _StreamWriter(wfile, "stderr")
+        previous_cwd = os.getcwd()
+        try:
+            # Relative paths in the command are the client's.
+            os.chdir(request.get("cwd", previous_cwd))
+            with redirect_stdout(out), redirect_stderr(err):
+                parser = build_parser(request["argv"])
+                args = parser.parse_args(request["argv"])
+                status = run_command(args, self.task_manager, parser)
+            return status or 0
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception:
+            err.write(traceback.format_exc())
+            return 1
+        finally:
+            os.chdir(previous_cwd)
+            out.flush()
+            err.flush()
+
+    def service_actions(self):
+        # Runs between requests: re-score the tasks whose score boundary
+        # has passed, so `top` finds the ranking already current.
+        ranking = self.task_manager.ranking
+        if ranking is not None:
+            boundary = ranking.next_boundary()
+            if boundary is not None and boundary <= datetime.now():
+                ranking.advance(datetime.now())
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return  # The client went away mid-output, e.g. piped into head.
+        super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        flush = getattr(self.task_manager.storage, "flush", None)
+        if flush is not None:
+            flush()
+
+
+def serve(storage_path, engine=None, socket_path=None, flush_interval=None):
+    """Load the store and answer CLI commands until interrupted."""
+    from task_manager import TaskManager
+
+    storage_path = os.path.abspath(storage_path)
+    socket_path = socket_path or socket_path_for(storage_path)
+    task_manager = TaskManager(storage_path, engine=engine, flush_interval=flush_interval,
+                               ranked=True)
+    # Treat `kill` like Ctrl-C so the socket is removed and changes flushed.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = TaskServer(socket_path, task_manager)
+    try:
+        print(f"Serving {storage_path} on {socket_path}")
+        sys.stdout.flush()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,84 @@
+# task_manager/task_stats.py
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from models import TaskPriority, TaskStatus
+
+
+class TaskStats:
+    """Running counters behind TaskManager.get_statistics.
+
+    Counts tasks per status and per priority, and keeps (completed_at, id)
+    sorted for every completed task, so a "completed since" count is a
+    bisect instead of a pass over the store. Overdue tasks are counted on
+    the due-date list of the storage's TaskIndex. Kept in sync as one of
+    the storage's indexes.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._reset()
+
+    def _reset(self):
+        self.total = 0
+        self.by_status = {status: 0 for status in TaskStatus}
+        self.by_priority = {priority: 0 for priority in TaskPriority}
+        self.completed = []
+        self._keys = {}
+
+    def rebuild(self, tasks):
+        self._reset()
+        for task in tasks:
+            completed = self._count(task)[2]
+            if completed is not None:
+                self.completed.append(completed)
+        self.completed.sort()
+
+    def _count(self, task):
+        completed = (task.completed_at, task.id) if task.completed_at else None
+        keys = self._keys[task.id] = (task.status, task.priority, completed)
+        self.total += 1
+        self.by_status[task.status] += 1
+        self.by_priority[task.priority] += 1
+        return keys
+
+    def add(self, task):
+        if task.id in self._keys:
+            self.discard(task.id)
+        completed = self._count(task)[2]
+        if completed is not None:
+            insort(self.completed, completed)
+
+    def discard(self, task_id):
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        status, priority, completed = keys
+        self.total -= 1
+        self.by_status[status] -= 1
+        self.by_priority[priority] -= 1
+        if completed is not None:
+            del self.completed[bisect_left(self.completed, completed)]
+
+    def reindex(self, task):
+        self.discard(task.id)
+        self.add(task)
+
+    def overdue_count(self, now):
+        """Tasks not done whose due date is before `now`."""
+        return self.index.count_due_between(None, now)
+
+    def completed_since(self, when):
+        """Tasks completed at or after `when`."""
+        return len(self.completed) - bisect_left(self.completed, (when,))
+
+    def statistics(self, now=None):
+        """Same result as TaskManager.get_statistics, from the counters."""
+        now = now or datetime.now()
+        return {
+            "total": self.total,
+            "by_status": {status.value: count for status, count in self.by_status.items()},
+            "by_priority": {priority.name: count for priority, count in self.by_priority.items()},
+            "overdue": self.overdue_count(now),
+            "completed_last_week": self.completed_since(now - timedelta(days=7)),
+        }
@@ -0,0 +1,186 @@
+# task_manager/task_table.py
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the columnar table needs it.
+    np = None
+
+from models import TaskPriority, TaskStatus, NO_TIME, to_epoch
+
+STATUSES = list(TaskStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+DONE_CODE = STATUS_CODES[TaskStatus.DONE]
+
+TIME_COLUMNS = ["created_at", "updated_at", "due_date", "completed_at"]
+
+
+class TaskTable:
+    """Columnar (struct-of-arrays) copy of a task set for reporting.
+
+    Holds priority and status as int8 and the four timestamps as int64
+    epoch microseconds, one row per task. Tags are indexed the other way
+    round: each tag has an int32 array of the rows that carry it, so they
+    cost four bytes per (task, tag) pair however many distinct tags there
+    are, and a tag filter scatters its rows into a mask.
+    Attach it to a TaskStorage with from_storage() and it is kept in sync
+    through the storage's index hooks; statistics and filters then run as
+    NumPy masks instead of Python loops over Task objects.
+    """
+
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise ImportError("TaskTable requires NumPy")
+        self.size = 0
+        self.ids = []
+        self.rows = {}
+        self.row_tags = []
+        self._allocate(capacity)
+
+    @classmethod
+    def from_storage(cls, storage):
+        return storage.add_index(cls())
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.priority = np.zeros(capacity, dtype=np.int8)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        for name in TIME_COLUMNS:
+            setattr(self, name, np.full(capacity, NO_TIME, dtype=np.int64))
+        # tag -> [rows, count]: the first `count` entries of `rows`, in no
+        # particular order, are the rows with the tag.
+        self.tag_rows = {}
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in ["priority", "status"] + TIME_COLUMNS:
+            column = getattr(self, name)
+            grown = np.full(capacity, NO_TIME if column.dtype == np.int64 else 0,
+                            dtype=column.dtype)
+            grown[:self.capacity] = column
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def rebuild(self, tasks):
+        tasks = list(tasks)
+        self.size = 0
+        self.ids = []
+        self.rows = {}
+        self.row_tags = []
+        self._allocate(max(1024, len(tasks)))
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task):
+        if task.id in self.rows:
+            self.reindex(task)
+            return
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        self.size += 1
+        self.ids.append(task.id)
+        self.rows[task.id] = row
+        self.row_tags.append(())
+        self._write_row(row, task)
+
+    def reindex(self, task):
+        row = self.rows.get(task.id)
+        if row is None:
+            self.add(task)
+        else:
+            self._write_row(row, task)
+
+    def discard(self, task_id):
+        row = self.rows.pop(task_id, None)
+        if row is None:
+            return
+        self._set_tags(row, ())
+        last = self.size - 1
+        if row != last:
+            # Move the last row into the hole so the table stays dense.
+            moved_id = self.ids[last]
+            for name in ["priority", "status"] + TIME_COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved_tags = self.row_tags[last]
+            self._set_tags(last, ())
+            self._set_tags(row, moved_tags)
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+        self.ids.pop()
+        self.row_tags.pop()
+        self.size = last
+
+    def _write_row(self, row, task):
+        self.priority[row] = task.priority.value
+        self.status[row] = STATUS_CODES[task.status]
+        for name in TIME_COLUMNS:
+            getattr(self, name)[row] = to_epoch(getattr(task, name))
+        self._set_tags(row, tuple(dict.fromkeys(task.tags)))
+
+    def _set_tags(self, row, tags):
+        for tag in self.row_tags[row]:
+            entry = self.tag_rows[tag]
+            rows, count = entry
+            position = np.flatnonzero(rows[:count] == row)[0]
+            rows[position] = rows[count - 1]
+            entry[1] = count - 1
+            if count == 1:
+                del self.tag_rows[tag]
+        for tag in tags:
+            entry = self.tag_rows.get(tag)
+            if entry is None:
+                entry = self.tag_rows[tag] = [np.empty(4, dtype=np.int32), 0]
+            rows, count = entry
+            if count == len(rows):
+                rows = entry[0] = np.concatenate([rows, np.empty(count, dtype=np.int32)])
+            rows[count] = row
+            entry[1] = count + 1
+        self.row_tags[row] = tags
+
+    def rows_with_tag(self, tag):
+        """The rows of the tasks with `tag`, in no particular order."""
+        entry = self.tag_rows.get(tag)
+        if entry is None:
+            return np.empty(0, dtype=np.int32)
+        rows, count = entry
+        return rows[:count]
+
+    def _overdue_mask(self, now):
+        due = self.due_date[:self.size]
+        return (due != NO_TIME) & (due < to_epoch(now)) & (self.status[:self.size] != DONE_CODE)
+
+    def mask(self, status=None, priority=None, tag=None, overdue=False, now=None):
+        """Boolean row mask for the tasks matching every given filter."""
+        selected = np.ones(self.size, dtype=bool)
+        if status is not None:
+            selected &= self.status[:self.size] == STATUS_CODES[status]
+        if priority is not None:
+            selected &= self.priority[:self.size] == priority.value
+        if tag is not None:
+            tag_mask = np.zeros(self.size, dtype=bool)
+            tag_mask[self.rows_with_tag(tag)] = True
+            selected &= tag_mask
+        if overdue:
+            selected &= self._overdue_mask(now or datetime.now())
+        return selected
+
+    def select_ids(self, **filters):
+        """Ids of the tasks matching mask(**filters), in row order."""
+        return [self.ids[row] for row in np.flatnonzero(self.mask(**filters))]
+
+    def statistics(self, now=None):
+        """Same result as TaskManager.get_statistics, computed column-wise."""
+        now = now or datetime.now()
+        n = self.size
+        status_counts = np.bincount(self.status[:n], minlength=len(STATUSES))
+        priority_counts = np.bincount(self.priority[:n], minlength=max(p.value for p in TaskPriority) + 1)
+        seven_days_ago = to_epoch(now - timedelta(days=7))
+        return {
+            "total": n,
+            "by_status": {status.value: int(status_counts[code]) for code, status in enumerate(STATUSES)},
+            "by_priority": {priority.name: int(priority_counts[priority.value]) for priority in TaskPriority},
+            "overdue": int(np.count_nonzero(self._overdue_mask(now))),
+            "completed_last_week": int(np.count_nonzero(self.completed_at[:n] >= seven_days_ago)),
+        }
@@ -0,0 +1,36 @@
+"""Tasks and a scoring profile shared by the scoring tests."""
+from datetime import timedelta
+
+from models import Task, TaskPriority, TaskStatus
+
+# A profile unlike the default in every field.
+TEAM_PROFILE = {
+    "priority_weights": {"low": 0, "3": 7},
+    "due_date_bands": [[-2, 50], [0.5, 30], [5, 12]],
+    "status_adjustments": {"in_progress": 9, "done": -80},
+    "boost_tags": ["ui"],
+    "tag_boost": 3,
+    "recent_update_boost": 11,
+    "recent_update_days": 2.5,
+}
+
+
+def random_tasks(rng, now, count, task_class=Task):
+    """Tasks spread over every scoring factor, with many due and update
+    times exactly on or next to a band edge."""
+    tags = ["blocker", "critical", "urgent", "work", "ui"]
+    near_edges = [timedelta(days=days) + timedelta(microseconds=delta)
+                  for days in range(-2, 10) for delta in (-1, 0, 1)]
+    tasks = []
+    for i in range(count):
+        offset = rng.choice(near_edges) if rng.random() < 0.5 else timedelta(
+            seconds=rng.randint(-20 * 86400, 20 * 86400))
+        task = task_class(f"Task {i}", priority=rng.choice(list(TaskPriority)),
+                          due_date=now + offset if rng.random() < 0.8 else None,
+                          tags=rng.sample(tags, rng.randint(0, 2)))
+        task.status = rng.choice(list(TaskStatus))
+        task.updated_at = now - rng.choice([timedelta(days=1), timedelta(days=1, microseconds=-1),
+                                            timedelta(days=1, microseconds=1),
+                                            timedelta(hours=rng.randint(-5, 60))])
+        tasks.append(task)
+    return tasks
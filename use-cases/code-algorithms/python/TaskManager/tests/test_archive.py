@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from models import Task, TaskPriority, TaskStatus
+from task_manager import TaskManager
+
+ENGINES = [("tasks.json", None), ("tasks.json", "journal"), ("tasks.tbin", None)]
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.now = datetime.now()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def populate(self, manager):
+        """Open tasks plus tasks completed 1 to 60 days ago; returns the
+        ids of the completed ones, most recent first."""
+        done = []
+        with manager.batch():
+            for i in range(20):
+                manager.storage.add_task(Task(f"Open {i}", priority=TaskPriority(i % 4 + 1),
+                                              due_date=self.now - timedelta(days=i - 10)))
+            for days in [1, 3, 5, 6, 8, 20, 31, 45, 60]:
+                task = Task(f"Done {days} days ago", priority=TaskPriority(days % 4 + 1),
+                            tags=["old"])
+                task.status = TaskStatus.DONE
+                task.completed_at = self.now - timedelta(days=days)
+                manager.storage.add_task(task)
+                done.append(task.id)
+        return done
+
+    def open(self, name, engine=None):
+        # One directory per engine, so each starts without an archive.
+        directory = os.path.join(self.tmp_dir, engine or "default")
+        os.makedirs(directory, exist_ok=True)
+        return TaskManager(os.path.join(directory, name), engine=engine)
+
+    def test_archived_tasks_leave_the_store_but_stay_counted(self):
+        """Test that archiving shrinks the store without changing statistics."""
+        for name, engine in ENGINES:
+            with self.subTest(store=name, engine=engine):
+                done = self.populate(self.open(name, engine))
+                before = self.open(name, engine).get_statistics()
+
+                manager = self.open(name, engine)
+                self.assertEqual(manager.archive_completed(7), 5)
+                self.assertEqual(manager.archive_completed(7), 0)
+                self.assertEqual(len(manager.storage.get_all_tasks()), 24)
+                self.assertEqual(manager.get_statistics(verify=True), before)
+
+                reopened = self.open(name, engine)
+                self.assertEqual(len(reopened.storage.tasks), 24)
+                self.assertEqual(reopened.get_statistics(verify=True), before)
+                self.assertEqual(reopened.get_task_details(done[-1]).title, "Done 60 days ago")
+                self.assertEqual(reopened.resolve_task_id(done[-1][:8]), done[-1])
+
+    def test_recent_completions_survive_archiving(self):
+        """Test that completed_last_week stays right when tasks younger than a week are archived."""
+        manager = self.open("tasks.json")
+        self.populate(manager)
+        before = manager.get_statistics()
+        self.assertEqual(manager.archive_completed(2), 8)
+        self.assertEqual(manager.get_statistics(verify=True), before)
+        self.assertEqual(self.open("tasks.json").get_statistics(verify=True), before)
+
+    def test_history_merges_store_and_archive(self):
+        """Test that history lists completed tasks newest first across both tiers."""
+        for name, engine in ENGINES + [("tasks.db", None)]:
+            with self.subTest(store=name, engine=engine):
+                manager = self.open(name, engine)
+                done = self.populate(manager)
+                manager.archive_completed(7)
+                reopened = self.open(name, engine)
+                self.assertEqual([task.id for task in reopened.history()], done)
+                self.assertEqual([task.id for task in reopened.history(limit=3)], done[:3])
+                since = self.now - timedelta(days=30)
+                self.assertEqual([task.id for task in reopened.history(since)], done[:6])
+
+    def test_changed_or_deleted_tasks_leave_the_archive(self):
+        """Test that reopening or deleting an archived task takes it out of the archive."""
+        for name, engine in ENGINES:
+            with self.subTest(store=name, engine=engine):
+                manager = self.open(name, engine)
+                done = self.populate(manager)
+                manager.archive_completed(7)
+                reopened_id, deleted_id, kept_id = done[-1], done[-2], done[-3]
+
+                self.assertTrue(manager.update_task_status(reopened_id, "todo"))
+                self.assertTrue(manager.delete_task(deleted_id))
+                self.assertFalse(manager.delete_task(deleted_id))
+                with self.assertRaises(RuntimeError):
+                    with manager.batch():
+                        manager.add_tag_to_task(kept_id, "rolled-back")
+                        raise RuntimeError("abort")
+
+                reopened = self.open(name, engine)
+                for current in [manager, reopened]:
+                    self.assertIn(reopened_id, current.storage.tasks)
+                    self.assertEqual(current.get_task_details(reopened_id).status, TaskStatus.TODO)
+                    self.assertIsNone(current.get_task_details(deleted_id))
+                    self.assertNotIn(kept_id, current.storage.tasks)
+                    self.assertEqual(current.get_task_details(kept_id).tags, ["old"])
+                    self.assertEqual(len(current.storage.archive), 3)
+                    stats = current.get_statistics(verify=True)
+                    self.assertEqual(stats["total"], 28)
+
+    def test_re_adding_an_archived_task_replaces_it(self):
+        """Test that adding or importing an archived id keeps one copy of the task."""
+        for name, engine in ENGINES:
+            with self.subTest(store=name, engine=engine):
+                manager = self.open(name, engine)
+                done = self.populate(manager)
+                manager.archive_completed(7)
+                before = manager.get_statistics()
+
+                readded = Task("Re-added")
+                readded.id = done[-1]
+                manager.storage.add_task(readded)
+                imported = {"id": done[-2], "title": "Imported", "status": "done",
+                            "completed_at": (self.now - timedelta(days=45)).isoformat()}
+                self.assertEqual(manager.import_tasks([imported]), (1, 0))
+
+                for current in [manager, self.open(name, engine)]:
+                    self.assertEqual(len(current.storage.archive), 3)
+                    self.assertEqual(current.get_task_details(done[-1]).title, "Re-added")
+                    stats = current.get_statistics(verify=True)
+                    self.assertEqual(stats["total"], before["total"])
+                    self.assertEqual(stats["by_status"]["todo"], before["by_status"]["todo"] + 1)
+
+    def test_export_includes_archived_tasks(self):
+        """Test that export writes the archived tasks after the live ones."""
+        for name, engine in ENGINES:
+            with self.subTest(store=name, engine=engine):
+                manager = self.open(name, engine)
+                done = self.populate(manager)
+                manager.archive_completed(7)
+                manager.delete_task(done[-1])
+
+                exported = []
+                self.assertEqual(manager.export_tasks(SimpleNamespace(write=exported.append)), 28)
+                self.assertEqual(len({task.id for task in exported}), 28)
+                self.assertNotIn(done[-1], {task.id for task in exported})
+                self.assertEqual([task.id for task in exported[-4:]], done[-5:-1])
+
+    def test_archive_is_read_lazily(self):
+        """Test that opening the store and reading statistics never map the archive."""
+        manager = self.open("tasks.json")
+        self.populate(manager)
+        manager.archive_completed(7)
+
+        reopened = self.open("tasks.json")
+        stats = reopened.get_statistics()
+        self.assertIsNone(reopened.storage.archive._file)
+        self.assertEqual(stats["by_status"]["done"], 9)
+
+        # Without its stats file the archive is counted instead.
+        os.remove(reopened.storage.archive.stats_path)
+        self.assertEqual(self.open("tasks.json").get_statistics(verify=True), stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from models import Task
+from storage import TaskStorage
+from task_manager import TaskManager
+
+
+class AtomicSaveTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_failed_write_keeps_previous_file(self):
+        """Test that a crash halfway through a save leaves the old store intact."""
+        storage = TaskStorage(self.path)
+        storage.add_task(Task("Safe"))
+        with open(self.path) as f:
+            before = f.read()
+
+        def torn_dump(records, f, **kwargs):
+            f.write('[{"id": "half')
+            raise OSError("disk full")
+
+        with patch('storage.json.dump', side_effect=torn_dump):
+            storage.add_task(Task("Lost"))
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), before)
+        leftovers = [name for name in os.listdir(self.tmp_dir) if name != "tasks.json.lock"]
+        self.assertEqual(leftovers, ["tasks.json"])
+        self.assertEqual([t.title for t in TaskStorage(self.path).get_all_tasks()], ["Safe"])
+
+    def test_new_file_gets_the_umask_mode(self):
+        """Test that a newly written store is created as open() would create it."""
+        umask = os.umask(0o027)
+        try:
+            TaskStorage(self.path).add_task(Task("First"))
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+
+        os.chmod(self.path, 0o600)
+        TaskStorage(self.path).add_task(Task("Second"))
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_background_flusher_coalesces_writes(self):
+        """Test that a burst of changes is written in one or two flushes."""
+        manager = TaskManager(self.path, flush_interval=0.2)
+        storage = manager.storage
+        with patch.object(storage, "write_records", wraps=storage.write_records) as write:
+            for i in range(200):
+                manager.create_task(f"Task {i}")
+            self.assertFalse(os.path.exists(self.path))
+
+            deadline = time.time() + 5
+            while write.call_count == 0 and time.time() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)
+            self.assertIn(write.call_count, (1, 2))
+
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 200)
+
+    def test_batch_with_background_flusher(self):
+        """Test that a batch hands its changes to the flusher in one go."""
+        storage = TaskStorage(self.path, flush_interval=60)
+        with storage.transaction():
+            ids = [storage.add_task(Task(f"Task {i}")) for i in range(3)]
+        self.assertFalse(os.path.exists(self.path))
+
+        storage.flush()
+        self.assertEqual(sorted(TaskStorage(self.path).tasks), sorted(ids))
+
+    def test_flush_writes_pending_changes_immediately(self):
+        """Test that flush() persists without waiting for the interval."""
+        storage = TaskStorage(self.path, flush_interval=60)
+        task_id = storage.add_task(Task("Pending"))
+        self.assertFalse(os.path.exists(self.path))
+
+        storage.flush()
+        self.assertEqual(list(TaskStorage(self.path).tasks), [task_id])
+
+        with patch.object(storage, "write_snapshot") as write:
+            storage.flush()
+        write.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from binary_storage import (BinaryTaskFile, BinaryTaskStorage, MAGIC,
+                            binary_to_json, json_to_binary, write_binary)
+from models import Task, TaskPriority, TaskStatus
+from storage import TaskStorage
+from task_manager import TaskManager
+
+
+def make_tasks(count):
+    tasks = []
+    for i in range(count):
+        task = Task(f"Task {i} ✓", f"Line one\nline {i}", TaskPriority(i % 4 + 1),
+                    datetime(2030, 1, 1 + i % 28, 9, 30, 0, i) if i % 3 else None,
+                    [f"tag{i % 5}", "ünïcode"] if i % 2 else [])
+        if i % 4 == 0:
+            task.mark_as_done()
+        tasks.append(task)
+    return tasks
+
+
+class BinaryStorageTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.tbin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_random_access_reads_single_tasks(self):
+        """Test that every task can be read back by id, and unknown ids miss."""
+        tasks = make_tasks(200)
+        write_binary(self.path, tasks)
+
+        source = BinaryTaskFile(self.path)
+        self.assertEqual(len(source), 200)
+        for task in tasks:
+            self.assertEqual(source.get(task.id).to_dict(), task.to_dict())
+        self.assertIsNone(source.get("no-such-task"))
+        self.assertEqual([t.id for t in source], [t.id for t in tasks])
+        source.close()
+
+    def test_rejects_foreign_files(self):
+        """Test that a file without the magic header is refused."""
+        with open(self.path, "wb") as f:
+            f.write(b"NOTTASKS" + bytes(64))
+        with self.assertRaises(ValueError):
+            BinaryTaskFile(self.path)
+
+        with open(self.path, "rb+") as f:
+            f.write(MAGIC + (99).to_bytes(2, "little"))
+        with self.assertRaises(ValueError):
+            BinaryTaskFile(self.path)
+
+    def test_json_conversion_is_lossless(self):
+        """Test that json -> binary -> json reproduces the original store."""
+        json_path = os.path.join(self.tmp_dir, "tasks.json")
+        storage = TaskStorage(json_path)
+        for task in make_tasks(50):
+            storage.add_task(task)
+
+        json_to_binary(json_path, self.path)
+        round_trip = os.path.join(self.tmp_dir, "round_trip.json")
+        binary_to_json(self.path, round_trip)
+
+        with open(json_path) as original, open(round_trip) as converted:
+            self.assertEqual(json.load(converted), json.load(original))
+
+    def test_task_without_description_round_trips(self):
+        """Test that a None description is saved and converted as an empty one."""
+        task = Task("No description", None)
+        storage = BinaryTaskStorage(self.path)
+        storage.add_task(task)
+        self.assertEqual(BinaryTaskStorage(self.path).get_task(task.id).description, "")
+
+        json_path = os.path.join(self.tmp_dir, "tasks.json")
+        with open(json_path, "w") as f:
+            json.dump([task.to_dict()], f)
+        converted = os.path.join(self.tmp_dir, "converted.tbin")
+        json_to_binary(json_path, converted)
+        self.assertEqual([found.title for found in BinaryTaskStorage(converted).get_all_tasks()],
+                         ["No description"])
+
+    def test_get_task_does_not_load_the_store(self):
+        """Test that show-style lookups never decode the whole file."""
+        tasks = make_tasks(100)
+        write_binary(self.path, tasks)
+
+        manager = TaskManager(self.path)
+        self.assertIsInstance(manager.storage, BinaryTaskStorage)
+        with patch.object(BinaryTaskStorage, "read_tasks") as read_tasks:
+            task = manager.get_task_details(tasks[42].id)
+        read_tasks.assert_not_called()
+        self.assertEqual(task.title, "Task 42 ✓")
+
+    def test_mutations_after_lazy_lookup_are_saved(self):
+        """Test that changing a task read straight from the map is persisted."""
+        tasks = make_tasks(10)
+        write_binary(self.path, tasks)
+
+        manager = TaskManager(self.path)
+        manager.add_tag_to_task(tasks[3].id, "from-binary")
+        manager.update_task_status(tasks[5].id, "review")
+        new_id = manager.create_task("New task", tags=["x"])
+        manager.delete_task(tasks[0].id)
+
+        reopened = TaskManager(self.path)
+        self.assertIn("from-binary", reopened.get_task_details(tasks[3].id).tags)
+        self.assertEqual(reopened.get_task_details(tasks[5].id).status, TaskStatus.REVIEW)
+        self.assertEqual(reopened.get_task_details(new_id).tags, ["x"])
+        self.assertIsNone(reopened.get_task_details(tasks[0].id))
+        self.assertEqual(len(reopened.list_tasks()), 10)
+
+    def test_empty_store(self):
+        """Test that a missing file is an empty store."""
+        manager = TaskManager(self.path)
+        self.assertIsNone(manager.get_task_details("anything"))
+        self.assertEqual(manager.list_tasks(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
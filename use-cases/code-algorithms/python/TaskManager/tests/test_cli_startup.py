@@ -0,0 +1,93 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from journal_storage import JournaledTaskStorage
+from task_manager import TaskManager
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+
+# Modules that only commands working on a store should pay for.
+HEAVY_MODULES = ["task_manager", "storage", "models", "json", "sqlite3", "numpy", "socketserver"]
+
+
+class CliStartupTest(unittest.TestCase):
+    def setUp(self):
+        """Run every command from an empty scratch directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def imported_modules(self, *argv):
+        result = subprocess.run([sys.executable, "-X", "importtime", CLI] + list(argv),
+                                cwd=self.tmp_dir, capture_output=True, text=True)
+        return {line.rsplit("|", 1)[1].strip() for line in result.stderr.splitlines()
+                if line.startswith("import time:") and "|" in line}
+
+    def test_help_and_parse_errors_skip_the_store(self):
+        """Test that --help and bad arguments neither import nor open the store."""
+        for argv in [["--help"], ["list", "--help"], ["no-such-command"], ["status", "abc", "nope"], []]:
+            with self.subTest(argv=argv):
+                modules = self.imported_modules(*argv)
+                self.assertIn("argparse", modules)
+                for name in HEAVY_MODULES:
+                    self.assertNotIn(name, modules)
+                self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_list_limit_must_be_positive(self):
+        """Test that list --limit 0 is an argument error, not a crash."""
+        result = subprocess.run([sys.executable, CLI, "list", "--limit", "0"],
+                                cwd=self.tmp_dir, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("must be at least 1", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_read_only_store(self):
+        """Test that a read-only manager reads the store but refuses to write it."""
+        for name, engine in [("tasks.json", None), ("tasks.db", None), ("journaled.json", "journal")]:
+            with self.subTest(store=name):
+                path = os.path.join(self.tmp_dir, name)
+                task_id = TaskManager(path, engine=engine).create_task("Existing")
+                if os.path.exists(path + ".lock"):
+                    # Left by the writer above; the reader must not recreate it.
+                    os.remove(path + ".lock")
+                if engine == "journal":
+                    # A torn record, which only a writer may cut off.
+                    with open(path + ".journal", "a") as f:
+                        f.write('{"op":"put","task":{"id":"x","ti')
+                    with open(path + ".journal", "rb") as f:
+                        journal = f.read()
+
+                manager = TaskManager(path, read_only=True)
+                if engine == "journal":
+                    self.assertIsInstance(manager.storage, JournaledTaskStorage)
+                self.assertEqual([task.id for task in manager.list_tasks()], [task_id])
+                self.assertEqual(manager.get_statistics()["total"], 1)
+                with self.assertRaises(PermissionError):
+                    manager.create_task("New")
+                self.assertFalse(os.path.exists(path + ".lock"))
+                if engine == "journal":
+                    result = subprocess.run([sys.executable, CLI, "--no-daemon", "--storage", path, "list"],
+                                            cwd=self.tmp_dir, capture_output=True, text=True)
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    self.assertIn("Existing", result.stdout)
+                    with open(path + ".journal", "rb") as f:
+                        self.assertEqual(f.read(), journal)
+                    self.assertFalse(os.path.exists(path + ".lock"))
+                self.assertEqual(len(TaskManager(path).list_tasks()), 1)
+
+    def test_read_only_missing_store(self):
+        """Test that listing a store that does not exist yet creates nothing."""
+        result = subprocess.run([sys.executable, CLI, "--no-daemon", "list"],
+                                cwd=self.tmp_dir, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import binary_storage
+from binary_storage import BinaryTaskStorage, write_binary
+from models import Task
+from task_manager import AmbiguousTaskIdError, MAX_ID_CANDIDATES, TaskManager
+
+IDS = ["abc-1", "abc-2", "abd-1", "b-1", "ab"]
+
+
+def make_tasks():
+    tasks = []
+    for task_id in IDS:
+        task = Task(f"Task {task_id}")
+        task.id = task_id
+        tasks.append(task)
+    return tasks
+
+
+class IdPrefixTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def manager_with_tasks(self, name):
+        path = os.path.join(self.tmp_dir, name)
+        if name.endswith(".tbin"):
+            write_binary(path, make_tasks())
+            return TaskManager(path)
+        manager = TaskManager(path)
+        with manager.batch():
+            for task in make_tasks():
+                manager.storage.add_task(task)
+        return manager
+
+    def test_prefixes_resolve_on_every_engine(self):
+        """Test unique, exact, ambiguous and unknown prefixes."""
+        for name in ["tasks.json", "tasks.db", "tasks.tbin"]:
+            with self.subTest(store=name):
+                manager = self.manager_with_tasks(name)
+                self.assertEqual(manager.resolve_task_id("abd"), "abd-1")
+                self.assertEqual(manager.resolve_task_id("b"), "b-1")
+                self.assertEqual(manager.resolve_task_id("abc-2"), "abc-2")
+                # An exact id wins over the longer ids it is a prefix of.
+                self.assertEqual(manager.resolve_task_id("ab"), "ab")
+                self.assertIsNone(manager.resolve_task_id("zz"))
+                self.assertIsNone(manager.resolve_task_id(""))
+                with self.assertRaises(AmbiguousTaskIdError) as caught:
+                    manager.resolve_task_id("abc")
+                self.assertEqual(caught.exception.candidates, ["abc-1", "abc-2"])
+                self.assertFalse(caught.exception.truncated)
+
+    def test_prefixes_follow_changes(self):
+        """Test that created and deleted tasks are found, or not, straight away."""
+        for name in ["tasks.json", "tasks.db", "tasks.tbin"]:
+            with self.subTest(store=name):
+                manager = self.manager_with_tasks(name)
+                manager.delete_task("abc-2")
+                self.assertEqual(manager.resolve_task_id("abc"), "abc-1")
+                new_id = manager.create_task("New")
+                self.assertEqual(manager.resolve_task_id(new_id[:8]), new_id)
+                if hasattr(manager.storage, "check_indexes"):
+                    self.assertEqual(manager.storage.check_indexes(), [])
+
+    def test_candidates_are_capped(self):
+        """Test that a prefix matching many tasks lists only the first few."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        with manager.batch():
+            for i in range(MAX_ID_CANDIDATES + 5):
+                task = Task(f"Task {i}")
+                task.id = f"same-{i:02d}"
+                manager.storage.add_task(task)
+        with self.assertRaises(AmbiguousTaskIdError) as caught:
+            manager.resolve_task_id("same")
+        self.assertEqual(len(caught.exception.candidates), MAX_ID_CANDIDATES)
+        self.assertEqual(caught.exception.candidates[0], "same-00")
+        self.assertTrue(caught.exception.truncated)
+
+    def test_binary_prefix_lookup_does_not_load_the_store(self):
+        """Test that the binary order section answers prefixes without decoding tasks."""
+        manager = self.manager_with_tasks("tasks.tbin")
+        with patch.object(BinaryTaskStorage, "read_tasks") as read_tasks:
+            self.assertEqual(manager.resolve_task_id("abd"), "abd-1")
+            self.assertEqual(manager.storage.find_ids("a"), ["ab", "abc-1", "abc-2", "abd-1"])
+        read_tasks.assert_not_called()
+
+    def test_binary_file_without_order_section(self):
+        """Test that files written before the order section still resolve prefixes."""
+        path = os.path.join(self.tmp_dir, "tasks.tbin")
+        with patch.object(binary_storage, "ID_ORDER", 0):
+            write_binary(path, make_tasks())
+        manager = TaskManager(path)
+        self.assertIsNone(manager.storage.file.ids_with_prefix("abd"))
+        self.assertEqual(manager.resolve_task_id("abd"), "abd-1")
+        self.assertEqual(manager.get_task_details("abd-1").title, "Task abd-1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from models import CompactTask, Task, TaskPriority, TaskStatus
+from task_io import CsvWriter, JsonlWriter, read_records, record_to_task
+from task_manager import TaskManager
+
+
+class ImportExportTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def populate(self, manager):
+        with manager.batch():
+            for i in range(25):
+                task = Task(f"Task, {i}", f"Line one\nline \"two\" {i}", TaskPriority(i % 4 + 1),
+                            datetime(2030, 1, i % 28 + 1) if i % 3 else None, ["a", f"t{i % 5}"][:i % 3])
+                if i % 4 == 0:
+                    task.mark_as_done()
+                manager.storage.add_task(task)
+
+    def test_round_trip_between_engines(self):
+        """Test that exported JSONL and CSV import back as the same tasks."""
+        source = TaskManager(os.path.join(self.tmp_dir, "source.json"))
+        self.populate(source)
+        expected = sorted((task.to_dict() for task in source.list_tasks()), key=lambda t: t["id"])
+
+        for output_format, writer in [("jsonl", JsonlWriter), ("csv", CsvWriter)]:
+            for name in ["copy.json", "copy.db"]:
+                with self.subTest(format=output_format, store=name):
+                    stream = io.StringIO(newline="")
+                    self.assertEqual(source.export_tasks(writer(stream)), 25)
+                    stream.seek(0)
+
+                    path = os.path.join(self.tmp_dir, f"{output_format}-{name}")
+                    target = TaskManager(path)
+                    self.assertEqual(target.import_tasks(read_records(stream, output_format), batch_size=7),
+                                     (25, 0))
+                    imported = sorted((task.to_dict() for task in TaskManager(path).list_tasks()),
+                                      key=lambda t: t["id"])
+                    self.assertEqual(imported, expected)
+
+    def test_one_write_per_batch(self):
+        """Test that records are persisted once per batch, pulled lazily."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        pulled = []
+
+        def records():
+            for i in range(23):
+                pulled.append(i)
+                # No more than one batch is read ahead of what is saved.
+                self.assertLessEqual(len(pulled), len(manager.list_tasks()) + 10)
+                yield {"title": f"Task {i}"}
+
+        with patch.object(manager.storage, "write_snapshot",
+                          wraps=manager.storage.write_snapshot) as write:
+            self.assertEqual(manager.import_tasks(records(), batch_size=10), (23, 0))
+        self.assertEqual(write.call_count, 3)
+        self.assertEqual(len(TaskManager(os.path.join(self.tmp_dir, "tasks.json")).list_tasks()), 23)
+
+    def test_invalid_records(self):
+        """Test that an invalid record stops the import unless skipped."""
+        lines = ['{"title": "First"}', "not json", '{"title": ""}',
+                 '{"title": "Bad", "priority": "extreme"}', '{"title": "Bad", "due_date": "soon"}',
+                 '{"title": "Bad", "status": "finished"}', '{"title": "Last", "priority": "high"}']
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+
+        with self.assertRaisesRegex(ValueError, "record 2"):
+            manager.import_tasks(lines, batch_size=1)
+        self.assertEqual([task.title for task in manager.list_tasks()], ["First"])
+
+        self.assertEqual(manager.import_tasks(lines[1:], skip_invalid=True), (1, 5))
+        last = manager.query("priority=high")[0]
+        self.assertEqual(last.title, "Last")
+
+    def test_record_conversion(self):
+        """Test the accepted spellings of priorities, tags and dates."""
+        task = record_to_task({"title": "T", "priority": "3", "tags": " a, b ,", "status": "done",
+                               "due_date": "2030-05-01", "completed_at": ""}, CompactTask)
+        self.assertIsInstance(task, CompactTask)
+        self.assertEqual((task.priority, task.status), (TaskPriority.HIGH, TaskStatus.DONE))
+        self.assertEqual((task.tags, task.due_date), (["a", "b"], datetime(2030, 5, 1)))
+        self.assertIsNone(task.completed_at)
+        self.assertEqual(record_to_task(json.dumps({"title": "T", "id": "abc"}), Task).id, "abc")
+
+    def test_record_fields_of_the_wrong_type(self):
+        """Test that non-string ids, statuses and descriptions and aware dates are refused."""
+        for record in [{"title": "T", "id": 7}, {"title": "T", "status": ["done"]},
+                       {"title": "T", "description": {"text": "x"}},
+                       {"title": "T", "due_date": "2030-05-01T09:00:00+02:00"}]:
+            with self.subTest(record=record):
+                with self.assertRaises(ValueError):
+                    record_to_task(record, Task)
+
+    def test_text_import_uses_the_task_parser(self):
+        """Test that free-text lines become tasks as parse_task_from_text reads them."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        stream = io.StringIO("Buy milk @shopping !3\n\nFinish report !urgent @work @project\n")
+        self.assertEqual(manager.import_tasks(read_records(stream, "text")), (2, 0))
+        tasks = {task.title: task for task in manager.list_tasks()}
+        self.assertEqual(tasks["Buy milk"].tags, ["shopping"])
+        self.assertEqual(tasks["Buy milk"].priority, TaskPriority.HIGH)
+        self.assertEqual(tasks["Finish report"].tags, ["work", "project"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from journal_storage import JournaledTaskStorage
+from models import Task, TaskPriority, TaskStatus
+from storage import TaskStorage, open_storage
+
+
+class JournaledTaskStorageTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def journal_lines(self):
+        with open(self.path + ".journal") as f:
+            return f.read().splitlines()
+
+    def test_mutations_append_records_without_rewriting_snapshot(self):
+        """Test that add, update and delete only append to the journal."""
+        storage = JournaledTaskStorage(self.path)
+        task = Task("Write report", priority=TaskPriority.HIGH)
+        other = Task("Review report")
+
+        storage.add_task(task)
+        storage.add_task(other)
+        storage.update_task(task.id, status=TaskStatus.IN_PROGRESS)
+        storage.delete_task(other.id)
+
+        self.assertFalse(os.path.exists(self.path))
+        records = [json.loads(line) for line in self.journal_lines()]
+        self.assertEqual([r["op"] for r in records], ["put", "put", "put", "del"])
+        self.assertEqual(records[2]["task"]["status"], "in_progress")
+        self.assertEqual(records[3]["id"], other.id)
+
+    def test_load_replays_journal_on_top_of_snapshot(self):
+        """Test that a reopened store sees the snapshot plus the journal tail."""
+        storage = JournaledTaskStorage(self.path)
+        kept = Task("Kept", due_date=datetime(2030, 1, 1), tags=["work"])
+        removed = Task("Removed")
+        storage.add_task(kept)
+        storage.add_task(removed)
+        storage.compact()
+
+        storage.update_task(kept.id, priority=TaskPriority.URGENT)
+        storage.delete_task(removed.id)
+
+        reopened = JournaledTaskStorage(self.path)
+        self.assertEqual(list(reopened.tasks), [kept.id])
+        task = reopened.get_task(kept.id)
+        self.assertEqual(task.priority, TaskPriority.URGENT)
+        self.assertEqual(task.due_date, datetime(2030, 1, 1))
+        self.assertEqual(task.tags, ["work"])
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        """Test that the journal is compacted after compact_every records."""
+        storage = JournaledTaskStorage(self.path, compact_every=3)
+        tasks = [Task(f"Task {i}") for i in range(4)]
+        for task in tasks:
+            storage.add_task(task)
+
+        # Three records triggered a compaction, the fourth is in the journal.
+        self.assertEqual(len(self.journal_lines()), 1)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+        reopened = JournaledTaskStorage(self.path)
+        self.assertEqual(set(reopened.tasks), {task.id for task in tasks})
+
+    def test_torn_tail_record_is_ignored(self):
+        """Test that a partially written last record does not break loading."""
+        storage = JournaledTaskStorage(self.path)
+        task = Task("Survives")
+        storage.add_task(task)
+        with open(self.path + ".journal", "a") as f:
+            f.write('{"op":"put","task":{"id":"x","ti')
+
+        with open(self.path + ".journal", "rb") as f:
+            journal = f.read()
+
+        reopened = JournaledTaskStorage(self.path)
+        self.assertEqual(list(reopened.tasks), [task.id])
+        # Loading holds the shared lock at most, so it leaves the tail alone.
+        with open(self.path + ".journal", "rb") as f:
+            self.assertEqual(f.read(), journal)
+
+    def test_appends_after_a_torn_tail_survive(self):
+        """Test that changes written after a torn record are there on reopen."""
+        storage = JournaledTaskStorage(self.path)
+        first = Task("Before the crash")
+        storage.add_task(first)
+        with open(self.path + ".journal", "a") as f:
+            f.write('{"op":"put","task":{"id":"x","ti')
+
+        # Each CLI run is its own process: reopen, change, reopen.
+        reopened = JournaledTaskStorage(self.path)
+        later = [Task("After the crash"), Task("And again")]
+        for task in later:
+            reopened.add_task(task)
+
+        self.assertEqual(sorted(JournaledTaskStorage(self.path).tasks),
+                         sorted([first.id] + [task.id for task in later]))
+
+    def test_tail_torn_after_loading_is_cut_before_appending(self):
+        """Test that an append checks for a torn tail left since the store was read."""
+        storage = JournaledTaskStorage(self.path)
+        first = Task("Before the crash")
+        storage.add_task(first)
+        with open(self.path + ".journal", "a") as f:
+            f.write('{"op":"put","task":{"id":"x","ti')
+
+        later = Task("After the crash")
+        storage.add_task(later)
+        self.assertEqual(sorted(JournaledTaskStorage(self.path).tasks), sorted([first.id, later.id]))
+        self.assertEqual(len(self.journal_lines()), 2)
+
+    def test_compaction_keeps_newer_records_of_other_writers(self):
+        """Test that a stale compaction does not replay changes it already appended."""
+        first = JournaledTaskStorage(self.path)
+        task = Task("Draft")
+        first.add_task(task)
+        second = JournaledTaskStorage(self.path)
+        second.update_task(task.id, title="Final")
+
+        first.compact()
+
+        self.assertEqual(JournaledTaskStorage(self.path).get_task(task.id).title, "Final")
+
+    def test_open_storage_detects_journaled_store(self):
+        """Test that open_storage picks the engine from the files on disk."""
+        self.assertIsInstance(open_storage(self.path), TaskStorage)
+        self.assertNotIsInstance(open_storage(self.path), JournaledTaskStorage)
+
+        JournaledTaskStorage(self.path).compact()
+        self.assertIsInstance(open_storage(self.path), JournaledTaskStorage)
+
+        with self.assertRaises(ValueError):
+            open_storage(self.path, engine="yaml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from models import Task, CompactTask, EpochTask, TaskPriority, TaskStatus, TupleTagsTask
+from storage import TaskDecoder, TaskEncoder
+from task_manager import TaskManager
+
+
+class TaskSerializationTest(unittest.TestCase):
+    def setUp(self):
+        """Create a task with every field set."""
+        self.task = Task("Write docs", "User guide", TaskPriority.HIGH,
+                         datetime(2030, 3, 1, 12, 0), ["docs", "release"])
+        self.task.mark_as_done()
+
+    def assertSameTask(self, actual, expected):
+        for field in ["id", "title", "description", "priority", "status",
+                      "created_at", "updated_at", "due_date", "completed_at", "tags"]:
+            self.assertEqual(getattr(actual, field), getattr(expected, field), field)
+
+    def test_from_dict_round_trips_to_dict(self):
+        """Test that from_dict(to_dict()) gives back an equal task."""
+        self.assertSameTask(Task.from_dict(self.task.to_dict()), self.task)
+
+    def test_from_dict_skips_init(self):
+        """Test that decoding does not generate a uuid or read the clock."""
+        data = self.task.to_dict()
+        with patch('models.uuid.uuid4') as uuid4, patch('models.datetime') as mock_datetime:
+            mock_datetime.fromisoformat = datetime.fromisoformat
+            Task.from_dict(data)
+        uuid4.assert_not_called()
+        mock_datetime.now.assert_not_called()
+
+    def test_json_round_trip_through_encoder_and_decoder(self):
+        """Test that the storage encoder and decoder use the dict form."""
+        text = json.dumps([self.task], cls=TaskEncoder)
+        self.assertEqual(json.loads(text), [self.task.to_dict()])
+
+        decoded, = json.loads(text, cls=TaskDecoder)
+        self.assertSameTask(decoded, self.task)
+
+    def test_from_dict_fills_defaults_for_missing_fields(self):
+        """Test that optional fields fall back like the old decoder did."""
+        task = Task.from_dict({"id": "t1", "title": "Minimal",
+                               "priority": 1, "status": "todo"})
+        self.assertEqual(task.description, "")
+        self.assertEqual(task.priority, TaskPriority.LOW)
+        self.assertEqual(task.status, TaskStatus.TODO)
+        self.assertIsNone(task.due_date)
+        self.assertEqual(task.updated_at, task.created_at)
+        self.assertEqual(task.tags, [])
+
+
+class SlottedTaskTest(unittest.TestCase):
+    def test_slotted_tasks_have_no_instance_dict(self):
+        """Test that the compact variants do not carry a __dict__."""
+        for task_class in [CompactTask, EpochTask, TupleTagsTask]:
+            task = task_class("Lean")
+            self.assertFalse(hasattr(task, "__dict__"), task_class.__name__)
+
+    def test_api_matches_task(self):
+        """Test update, mark_as_done and is_overdue on every variant."""
+        due = datetime.now() - timedelta(days=1)
+        for task_class in [CompactTask, EpochTask, TupleTagsTask]:
+            task = task_class("Pay invoice", priority=TaskPriority.HIGH, due_date=due)
+            self.assertTrue(task.is_overdue())
+
+            task.update(title="Pay invoice #42", tags=["finance"])
+            self.assertEqual(task.title, "Pay invoice #42")
+            self.assertEqual(list(task.tags), ["finance"])
+
+            task.mark_as_done()
+            self.assertEqual(task.status, TaskStatus.DONE)
+            self.assertEqual(task.completed_at, task.updated_at)
+            self.assertFalse(task.is_overdue())
+
+    def test_tags_are_interned(self):
+        """Test that equal tags decoded separately share one string object."""
+        first = CompactTask.from_dict({"id": "a", "title": "A", "priority": 2,
+                                       "status": "todo", "tags": ["".join(["ba", "ckend"])]})
+        second = CompactTask.from_dict({"id": "b", "title": "B", "priority": 2,
+                                        "status": "todo", "tags": ["".join(["back", "end"])]})
+        self.assertIs(first.tags[0], second.tags[0])
+
+    def test_tuple_tags(self):
+        """Test that tuple-backed tags are stored as tuples whatever is assigned."""
+        task = TupleTagsTask("Frozen", tags=["a"])
+        self.assertEqual(task.tags, ("a",))
+        task.tags = ["a", "b"]
+        self.assertEqual(task.tags, ("a", "b"))
+
+    def test_epoch_timestamps_round_trip(self):
+        """Test that epoch storage keeps datetimes exact to the microsecond."""
+        task = EpochTask("Timed", due_date=datetime(2031, 7, 4, 8, 15, 30, 123456))
+        self.assertIsInstance(task._due_date, int)
+        self.assertEqual(task.due_date, datetime(2031, 7, 4, 8, 15, 30, 123456))
+        self.assertIsNone(task.completed_at)
+
+        copy = EpochTask.from_dict(task.to_dict())
+        self.assertEqual(copy.to_dict(), task.to_dict())
+
+    def test_task_manager_with_compact_tasks(self):
+        """Test that a store of tuple-tagged tasks works through TaskManager."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "tasks.json")
+
+        manager = TaskManager(path, task_class=TupleTagsTask)
+        task_id = manager.create_task("Compact", tags=["a"])
+        manager.add_tag_to_task(task_id, "b")
+        manager.remove_tag_from_task(task_id, "a")
+
+        reopened = TaskManager(path, task_class=TupleTagsTask)
+        task = reopened.get_task_details(task_id)
+        self.assertIsInstance(task, TupleTagsTask)
+        self.assertEqual(task.tags, ("b",))
+        self.assertEqual([t.id for t in reopened.storage.get_tasks_by_tag("b")], [task_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage import TaskStorage, fcntl
+from task_manager import TaskManager
+
+PROCESSES = 4
+TASKS_PER_PROCESS = 25
+
+
+def create_tasks(path, engine, worker, start):
+    manager = TaskManager(path, engine=engine)
+    if engine == "journal":
+        # Compact often so compactions race with the other processes' appends.
+        manager.storage.compact_every = 10
+    start.wait()
+    for i in range(TASKS_PER_PROCESS):
+        manager.create_task(f"Worker {worker} task {i}")
+
+
+@unittest.skipIf(fcntl is None, "fcntl is not available")
+class MultiProcessStorageTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_workers(self, engine):
+        context = multiprocessing.get_context("fork")
+        start = context.Event()
+        workers = [context.Process(target=create_tasks, args=(self.path, engine, worker, start))
+                   for worker in range(PROCESSES)]
+        for worker in workers:
+            worker.start()
+        start.set()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+    def assertNoLostTasks(self, engine):
+        titles = {task.title for task in TaskManager(self.path, engine=engine).list_tasks()}
+        expected = {f"Worker {worker} task {i}"
+                    for worker in range(PROCESSES) for i in range(TASKS_PER_PROCESS)}
+        self.assertEqual(titles, expected)
+
+    def test_concurrent_creates_are_not_lost(self):
+        """Test that processes saving the same store all keep their tasks."""
+        self.run_workers("json")
+        self.assertNoLostTasks("json")
+
+    def test_concurrent_journal_appends_are_not_lost(self):
+        """Test the same for the journaled engine, including compactions."""
+        self.run_workers("journal")
+        self.assertNoLostTasks("journal")
+
+    def test_concurrent_binary_saves_are_not_lost(self):
+        """Test the same for the binary engine."""
+        self.path = os.path.join(self.tmp_dir, "tasks.tbin")
+        self.run_workers("binary")
+        self.assertNoLostTasks("binary")
+
+    def test_binary_store_refreshes_after_another_write(self):
+        """Test that a binary store sees a write made by another process."""
+        path = os.path.join(self.tmp_dir, "tasks.tbin")
+        first = TaskManager(path)
+        first.create_task("First")
+        second = TaskManager(path)
+        second.create_task("Second")
+
+        self.assertTrue(first.storage.refresh())
+        self.assertEqual({task.title for task in first.list_tasks()}, {"First", "Second"})
+
+    def test_stale_writer_replays_only_its_own_changes(self):
+        """Test that a writer behind the store keeps the other writer's edits."""
+        first = TaskStorage(self.path)
+        second = TaskStorage(self.path)
+        first_manager = TaskManager(self.path)
+        first_manager.storage = first
+        kept = first_manager.create_task("Kept")
+        second_manager = TaskManager(self.path)
+        second_manager.storage = second
+        second_manager.create_task("Other")
+
+        first_manager.update_task_status(kept, "done")
+        first.delete_task(first_manager.create_task("Deleted"))
+
+        titles = {task.title: task.status.value for task in TaskStorage(self.path).get_all_tasks()}
+        self.assertEqual(titles, {"Kept": "done", "Other": "todo"})
+        self.assertEqual(first.generation, second.generation + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from cli import write_tasks
+from models import Task, TaskPriority, TaskStatus
+from task_manager import TaskManager
+from task_query import due_cursor_key, format_cursor
+
+
+class PaginationTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def populate(self, manager, count=100):
+        start = datetime(2030, 1, 1)
+        with manager.batch():
+            for i in range(count):
+                task = Task(f"Task {i}", priority=TaskPriority(i % 4 + 1),
+                            due_date=start + timedelta(days=i % 9) if i % 2 else None)
+                # Several tasks share a creation time, so ids break the ties.
+                task.created_at = task.updated_at = start + timedelta(minutes=i // 3)
+                if i % 5 == 0:
+                    task.status = TaskStatus.DONE
+                manager.storage.add_task(task)
+
+    def pages(self, manager, limit, between_pages=None, by_due=False, **filters):
+        seen, after = [], None
+        while True:
+            page = list(manager.iter_tasks(after=after, limit=limit, **filters))
+            seen.extend(page)
+            if len(page) < limit:
+                return seen
+            after = format_cursor(page[-1], by_due)
+            if between_pages:
+                between_pages(page)
+
+    def test_pages_cover_every_task_once(self):
+        """Test that paging returns each task exactly once, oldest first."""
+        for name in ["tasks.json", "tasks.db"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                self.populate(manager)
+                seen = self.pages(manager, limit=7)
+                self.assertEqual(len(seen), 100)
+                self.assertEqual(len({task.id for task in seen}), 100)
+                keys = [(task.created_at, task.id) for task in seen]
+                self.assertEqual(keys, sorted(keys))
+
+                filtered = self.pages(manager, limit=4, priority_filter=2)
+                self.assertEqual({task.id for task in filtered},
+                                 {task.id for task in manager.list_tasks(priority_filter=2)})
+
+    def test_due_views_page_earliest_due_first(self):
+        """Test that overdue and due-within pages keep list_tasks' earliest-due order."""
+        now = datetime.now()
+        for name in ["tasks.json", "tasks.db"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                with manager.batch():
+                    for i in range(60):
+                        task = Task(f"Task {i}", due_date=now + timedelta(days=i % 9 - 4, hours=i % 2))
+                        task.created_at = datetime(2030, 1, 1) + timedelta(minutes=i // 3)
+                        manager.storage.add_task(task)
+                for filters in [{"show_overdue": True}, {"due_within": 3},
+                                {"due_within": 3, "show_overdue": True}]:
+                    seen = self.pages(manager, limit=6, by_due=True, **filters)
+                    self.assertTrue(seen)
+                    self.assertEqual([task.id for task in seen],
+                                     [task.id for task in sorted(manager.list_tasks(**filters),
+                                                                 key=due_cursor_key)])
+
+    def test_filtered_listing_reads_only_index_candidates(self):
+        """Test that a status filter does not walk the whole store."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        self.populate(manager)
+        with patch.object(manager.storage, "iter_tasks_by_created") as scan:
+            done = list(manager.iter_tasks(status_filter="done", limit=5))
+        scan.assert_not_called()
+        self.assertEqual([task.id for task in done],
+                         [task.id for task in manager.iter_tasks() if task.status == TaskStatus.DONE][:5])
+
+    def test_cursor_survives_deleting_its_task(self):
+        """Test that deleting the last task of a page does not break the next page."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        self.populate(manager, count=30)
+        expected = {task.id for task in manager.list_tasks()}
+        deleted = set()
+
+        def delete_last(page):
+            manager.delete_task(page[-1].id)
+            deleted.add(page[-1].id)
+
+        seen = self.pages(manager, limit=5, between_pages=delete_last)
+        self.assertEqual({task.id for task in seen}, expected)
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(manager.list_tasks()), 30 - len(deleted))
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor raises ValueError before listing."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        with self.assertRaises(ValueError):
+            manager.iter_tasks(after="not-a-cursor")
+
+    def test_output_formats(self):
+        """Test the jsonl and tsv writers, including escaping."""
+        task = Task("Tab\there", "Line\nbreak", TaskPriority.HIGH, datetime(2030, 2, 3), ["a", "b"])
+
+        out = io.StringIO()
+        self.assertEqual(write_tasks([task], "jsonl", out), (1, task))
+        self.assertEqual(json.loads(out.getvalue()), task.to_dict())
+
+        out = io.StringIO()
+        write_tasks([task], "tsv", out)
+        header, row = out.getvalue().splitlines()
+        self.assertEqual(header.split("\t")[0], "id")
+        self.assertEqual(row.split("\t"), [task.id, "todo", "HIGH", "2030-02-03", "Tab\\there", "a,b"])
+
+    def test_first_task_is_flushed_immediately(self):
+        """Test that output starts before the task generator is exhausted."""
+        out = io.StringIO()
+
+        def tasks():
+            yield Task("First")
+            self.assertIn("First", out.getvalue())
+            for i in range(1000):
+                yield Task(f"Task {i}")
+
+        count, _ = write_tasks(tasks(), "text", out, chunk_size=100)
+        self.assertEqual(count, 1001)
+        self.assertEqual(out.getvalue().count("-" * 50), 1001)
+
+
+if __name__ == '__main__':
+    unittest.main()
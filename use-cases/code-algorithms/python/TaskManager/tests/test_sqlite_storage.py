@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+from sqlite_storage import SqliteTaskStorage
+from task_manager import TaskManager
+
+
+class SqliteTaskStorageTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch database for each test."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.db")
+        self.storage = SqliteTaskStorage(self.path)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip_preserves_all_fields(self):
+        """Test that a stored task comes back with every field intact."""
+        task = Task("Ship release", "Tag and upload", TaskPriority.URGENT,
+                    datetime(2030, 5, 1, 9, 30), ["release", "backend"])
+        task.mark_as_done()
+        self.storage.add_task(task)
+
+        reopened = SqliteTaskStorage(self.path)
+        loaded = reopened.get_task(task.id)
+        reopened.close()
+
+        for field in ["id", "title", "description", "priority", "status",
+                      "created_at", "updated_at", "due_date", "completed_at", "tags"]:
+            self.assertEqual(getattr(loaded, field), getattr(task, field), field)
+
+    def test_indexed_queries(self):
+        """Test status, priority, tag and overdue queries."""
+        now = datetime.now()
+        overdue = Task("Overdue", priority=TaskPriority.HIGH,
+                       due_date=now - timedelta(days=1), tags=["backend"])
+        done = Task("Done", priority=TaskPriority.HIGH, due_date=now - timedelta(days=1))
+        done.status = TaskStatus.DONE
+        future = Task("Future", due_date=now + timedelta(days=3), tags=["frontend"])
+        for task in [overdue, done, future]:
+            self.storage.add_task(task)
+
+        def ids(tasks):
+            return {task.id for task in tasks}
+
+        self.assertEqual(ids(self.storage.get_tasks_by_status(TaskStatus.DONE)), {done.id})
+        self.assertEqual(ids(self.storage.get_tasks_by_priority(TaskPriority.HIGH)),
+                         {overdue.id, done.id})
+        self.assertEqual(ids(self.storage.get_tasks_by_tag("backend")), {overdue.id})
+        self.assertEqual(ids(self.storage.get_overdue_tasks()), {overdue.id})
+        self.assertEqual(ids(self.storage.get_tasks_due_between(now, now + timedelta(days=7))),
+                         {future.id})
+        self.assertEqual([task.id for task in self.storage.get_tasks_due_between(None, now + timedelta(days=7))],
+                         [overdue.id, future.id])
+        self.assertEqual(len(self.storage.get_all_tasks()), 3)
+
+    def test_update_and_delete(self):
+        """Test that update_task and delete_task write through to the database."""
+        task = Task("Draft", tags=["a", "b"])
+        self.storage.add_task(task)
+
+        self.assertTrue(self.storage.update_task(task.id, title="Final", tags=["b"]))
+        self.assertEqual(self.storage.get_task(task.id).title, "Final")
+        self.assertEqual(self.storage.get_tasks_by_tag("a"), [])
+
+        self.assertTrue(self.storage.delete_task(task.id))
+        self.assertFalse(self.storage.delete_task(task.id))
+        self.assertIsNone(self.storage.get_task(task.id))
+        self.assertFalse(self.storage.update_task(task.id, title="Gone"))
+
+    def test_task_manager_picks_sqlite_from_path(self):
+        """Test that TaskManager opens .db paths with the SQLite engine."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "other.db"))
+        self.assertIsInstance(manager.storage, SqliteTaskStorage)
+
+        task_id = manager.create_task("Tagged", tags=["x"])
+        manager.add_tag_to_task(task_id, "y")
+        manager.update_task_status(task_id, "done")
+
+        task = manager.get_task_details(task_id)
+        self.assertEqual(task.tags, ["x", "y"])
+        self.assertEqual(task.status, TaskStatus.DONE)
+        self.assertIsNotNone(task.completed_at)
+        manager.storage.close()
+
+    def test_search_index_filled_for_existing_database(self):
+        """Test that a database from before full-text search gets its tasks indexed on open."""
+        task = Task("Quarterly report", tags=["finance"])
+        self.storage.add_task(task)
+        with self.storage.conn:
+            self.storage.conn.execute("DROP TABLE task_search")
+            self.storage.conn.execute("PRAGMA user_version = 0")
+        self.storage.close()
+
+        self.storage = SqliteTaskStorage(self.path)
+        self.assertEqual([found.id for found in self.storage.search("finance report")], [task.id])
+        self.storage.update_task(task.id, title="Annual report")
+        self.assertEqual(self.storage.search("quarterly"), [])
+        self.assertEqual(len(self.storage.search("annual")), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
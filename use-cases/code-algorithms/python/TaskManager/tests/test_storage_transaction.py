@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from journal_storage import JournaledTaskStorage
+from models import Task, TaskPriority, TaskStatus
+from storage import TaskStorage, _copy_task
+from task_manager import TaskManager
+
+
+class StorageTransactionTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_batch_writes_once(self):
+        """Test that a batch of creates and tag changes is saved exactly once."""
+        manager = TaskManager(self.path)
+        storage = manager.storage
+        with patch.object(storage, "write_snapshot", wraps=storage.write_snapshot) as write:
+            with manager.batch():
+                ids = [manager.create_task(f"Task {i}") for i in range(1000)]
+                for task_id in ids[:100]:
+                    manager.add_tag_to_task(task_id, "imported")
+                manager.update_task_status(ids[0], "done")
+                manager.delete_task(ids[1])
+                self.assertEqual(write.call_count, 0)
+        self.assertEqual(write.call_count, 1)
+
+        reopened = TaskStorage(self.path)
+        self.assertEqual(len(reopened.tasks), 999)
+        self.assertEqual(len(reopened.get_tasks_by_tag("imported")), 99)
+
+    def test_exception_rolls_back_in_memory_changes(self):
+        """Test that a failing batch leaves the store as it was."""
+        manager = TaskManager(self.path)
+        kept_id = manager.create_task("Kept", tags=["a"])
+        removed_id = manager.create_task("Removed")
+
+        with patch.object(TaskStorage, "write_snapshot", autospec=True) as write:
+            with self.assertRaises(RuntimeError):
+                with manager.batch():
+                    manager.create_task("New")
+                    manager.add_tag_to_task(kept_id, "b")
+                    manager.update_task_priority(kept_id, 4)
+                    manager.delete_task(removed_id)
+                    raise RuntimeError("import failed")
+            write.assert_not_called()
+
+        storage = manager.storage
+        self.assertEqual(set(storage.tasks), {kept_id, removed_id})
+        kept = storage.get_task(kept_id)
+        self.assertEqual(kept.tags, ["a"])
+        self.assertEqual(kept.priority, TaskPriority.MEDIUM)
+        self.assertEqual(storage.get_tasks_by_tag("b"), [])
+        self.assertEqual(storage.check_indexes(), [])
+
+    def test_rollback_copies_only_touched_tasks(self):
+        """Test that a transaction copies a task when first touched, not the store up front."""
+        for name in ["tasks.json", "tasks.tbin"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                with manager.batch():
+                    ids = [manager.create_task(f"Task {i}") for i in range(50)]
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+
+                with patch("storage._copy_task", wraps=_copy_task) as copy:
+                    with self.assertRaises(RuntimeError):
+                        with manager.batch():
+                            manager.update_task_status(ids[0], "done")
+                            manager.update_task_priority(ids[0], 4)
+                            manager.add_tag_to_task(ids[1], "x")
+                            raise RuntimeError("abort")
+                self.assertEqual(copy.call_count, 2)
+                first, second = manager.storage.get_task(ids[0]), manager.storage.get_task(ids[1])
+                self.assertEqual((first.status, first.priority), (TaskStatus.TODO, TaskPriority.MEDIUM))
+                self.assertEqual(second.tags, [])
+                self.assertEqual(manager.storage.check_indexes(), [])
+
+    def test_rollback_restores_tasks_changed_before_saving(self):
+        """Test that a task from list_tasks changed inside a failing batch is put back."""
+        for name in ["tasks.json", "journaled.json", "tasks.tbin"]:
+            with self.subTest(store=name):
+                path = os.path.join(self.tmp_dir, name)
+                manager = TaskManager(path, engine="journal" if name == "journaled.json" else None)
+                kept_id = manager.create_task("Old title", tags=["a"])
+                removed_id = manager.create_task("Removed")
+
+                with self.assertRaises(RuntimeError):
+                    with manager.batch():
+                        for task in manager.list_tasks():
+                            task.title = "New title"
+                            task.tags = ["b"]
+                            manager.storage.save(task)
+                        manager.delete_task(removed_id)
+                        manager.create_task("Added")
+                        raise RuntimeError("abort")
+
+                storage = manager.storage
+                self.assertEqual(sorted(task.title for task in storage.get_all_tasks()),
+                                 ["Old title", "Removed"])
+                self.assertEqual(storage.get_tasks_by_tag("b"), [])
+                self.assertEqual(storage.check_indexes(), [])
+
+                manager.create_task("Later")
+                reopened = TaskManager(path, read_only=True)
+                self.assertEqual(sorted(task.title for task in reopened.list_tasks()),
+                                 ["Later", "Old title", "Removed"])
+                self.assertEqual(reopened.get_task_details(kept_id).tags, ["a"])
+
+    def test_nested_transactions_join_the_outer_one(self):
+        """Test that an inner transaction does not write on its own."""
+        storage = TaskStorage(self.path)
+        with patch.object(TaskStorage, "write_snapshot", autospec=True) as write:
+            with storage.transaction():
+                with storage.transaction():
+                    storage.add_task(Task("Inner"))
+                self.assertEqual(write.call_count, 0)
+                storage.add_task(Task("Outer"))
+        self.assertEqual(write.call_count, 1)
+
+    def test_journaled_batch_appends_once(self):
+        """Test that a journaled batch appends its records in a single write."""
+        storage = JournaledTaskStorage(self.path)
+        task = Task("Existing")
+        storage.add_task(task)
+
+        with patch.object(storage, "_append", wraps=storage._append) as append:
+            with storage.transaction():
+                storage.add_task(Task("New"))
+                storage.update_task(task.id, status=TaskStatus.REVIEW)
+                storage.delete_task(task.id)
+        self.assertEqual(append.call_count, 1)
+
+        reopened = JournaledTaskStorage(self.path)
+        self.assertEqual([t.title for t in reopened.get_all_tasks()], ["New"])
+
+    def test_sqlite_transaction_rolls_back(self):
+        """Test that the SQLite engine commits or rolls back a batch as a whole."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.db"))
+        with manager.batch():
+            manager.create_task("Committed")
+        with self.assertRaises(RuntimeError):
+            with manager.batch():
+                manager.create_task("Rolled back")
+                raise RuntimeError("import failed")
+
+        self.assertEqual([t.title for t in manager.list_tasks()], ["Committed"])
+        manager.storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
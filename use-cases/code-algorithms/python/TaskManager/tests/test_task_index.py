@@ -0,0 +1,111 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+from storage import TaskStorage
+from task_index import TaskIndex
+from task_manager import TaskManager
+
+
+class TaskIndexTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch store for each test."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+        self.manager = TaskManager(self.path)
+        self.storage = self.manager.storage
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_indexes_follow_storage_mutations(self):
+        """Test that add, update and delete keep the indexes consistent."""
+        now = datetime(2030, 1, 1)
+        rng = random.Random(42)
+        ids = []
+        for i in range(40):
+            due = now + timedelta(days=rng.randint(-5, 5)) if i % 3 else None
+            task = Task(f"Task {i}", priority=rng.choice(list(TaskPriority)),
+                        due_date=due, tags=rng.sample(["a", "b", "c", "d"], 2))
+            ids.append(self.storage.add_task(task))
+
+        for _ in range(100):
+            task_id = rng.choice(ids)
+            self.storage.update_task(
+                task_id,
+                status=rng.choice(list(TaskStatus)),
+                priority=rng.choice(list(TaskPriority)),
+                due_date=now + timedelta(days=rng.randint(-5, 5)),
+                tags=rng.sample(["a", "b", "c", "d"], rng.randint(0, 3)),
+            )
+        for task_id in ids[:10]:
+            self.storage.delete_task(task_id)
+
+        self.assertEqual(self.storage.check_indexes(), [])
+
+    def test_tag_changes_through_task_manager_are_indexed(self):
+        """Test that add_tag_to_task and remove_tag_from_task update the tag index."""
+        task_id = self.manager.create_task("Fix login", tags=["backend"])
+
+        self.manager.add_tag_to_task(task_id, "security")
+        self.assertEqual([t.id for t in self.storage.get_tasks_by_tag("security")], [task_id])
+
+        self.manager.remove_tag_from_task(task_id, "backend")
+        self.assertEqual(self.storage.get_tasks_by_tag("backend"), [])
+        self.assertEqual(self.storage.check_indexes(), [])
+
+    def test_list_tasks_filters_use_indexes(self):
+        """Test that list_tasks filters return exactly the matching tasks."""
+        done_id = self.manager.create_task("Done", priority_value=3)
+        todo_id = self.manager.create_task("Todo", priority_value=1, due_date_str="2000-01-01")
+        self.manager.update_task_status(done_id, "done")
+
+        self.assertEqual([t.id for t in self.manager.list_tasks(status_filter="done")], [done_id])
+        self.assertEqual([t.id for t in self.manager.list_tasks(priority_filter=1)], [todo_id])
+        self.assertEqual([t.id for t in self.manager.list_tasks(show_overdue=True)], [todo_id])
+
+        reopened = TaskStorage(self.path)
+        self.assertEqual(reopened.check_indexes(), [])
+
+    def test_deadline_queries_share_one_now(self):
+        """Test overdue and due-within windows against a fixed `now`."""
+        now = datetime(2030, 1, 10, 12, 0)
+        due = {name: now + timedelta(days=days) for name, days in
+               [("late", -2), ("today", 0), ("soon", 2), ("later", 9)]}
+        ids = {name: self.storage.add_task(Task(name, due_date=when)) for name, when in due.items()}
+        finished = self.storage.add_task(Task("finished", due_date=now - timedelta(days=1)))
+        self.manager.update_task_status(finished, "done")
+
+        def names(tasks):
+            return [task.title for task in tasks]
+
+        self.assertEqual(names(self.manager.get_overdue_tasks(now)), ["late"])
+        self.assertEqual(names(self.manager.get_tasks_due_within(3, now=now)), ["today", "soon"])
+        self.assertEqual(names(self.manager.get_tasks_due_within(3, include_overdue=True, now=now)),
+                         ["late", "today", "soon"])
+
+        self.manager.update_task_status(ids["late"], "done")
+        self.manager.update_task_status(finished, "todo")
+        self.assertEqual(names(self.manager.get_overdue_tasks(now)), ["finished"])
+        self.assertEqual(self.storage.check_indexes(), [])
+
+    def test_check_consistency_reports_stale_entries(self):
+        """Test that the checker notices a task changed behind the index's back."""
+        task = Task("Sneaky", tags=["old"])
+        index = TaskIndex()
+        index.add(task)
+
+        task.tags = ["new"]
+        task.status = TaskStatus.REVIEW
+
+        problems = index.check_consistency([task])
+        self.assertTrue(any(p.startswith("by_tag") for p in problems))
+        self.assertTrue(any(p.startswith("by_status") for p in problems))
+
+
+if __name__ == '__main__':
+    unittest.main()
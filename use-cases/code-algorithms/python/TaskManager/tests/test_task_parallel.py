@@ -0,0 +1,89 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from models import CompactTask, EpochTask, Task
+from binary_storage import write_binary
+from task_manager import TaskManager
+from task_parallel import parallel_rank, project_tasks, rank_binary_file, score_projection
+from task_priority import DEFAULT_PROFILE, ScoringProfile, score_tasks, top_tasks
+from tests.scoring_fixtures import TEAM_PROFILE, random_tasks
+
+
+class TaskParallelTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory and a profile unlike the default."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.now = datetime(2030, 9, 9, 9, 9, 9, 9)
+        self.profile = ScoringProfile.from_dict(TEAM_PROFILE, "team")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_projection_scores_like_the_tasks(self):
+        """Test that scoring a projection gives the scores of the tasks themselves."""
+        rng = random.Random(51)
+        for task_class in [Task, CompactTask, EpochTask]:
+            for profile in [DEFAULT_PROFILE, self.profile]:
+                with self.subTest(task_class=task_class.__name__, profile=profile.name):
+                    tasks = random_tasks(rng, self.now, 500, task_class)
+                    projection = pickle.loads(pickle.dumps(project_tasks(tasks, profile)))
+                    self.assertEqual(score_projection(projection, self.now, profile),
+                                     score_tasks(tasks, self.now, profile))
+
+    def test_profile_pickles_by_its_fields(self):
+        """Test that a profile sent to a worker scores as the original does."""
+        copy = pickle.loads(pickle.dumps(self.profile))
+        tasks = random_tasks(random.Random(52), self.now, 300)
+        self.assertEqual(copy.name, "team")
+        self.assertEqual(copy.score_tasks(tasks, self.now), self.profile.score_tasks(tasks, self.now))
+
+    def test_parallel_rank_matches_a_single_process(self):
+        """Test that merged worker runs equal top_tasks and the full stable sort."""
+        tasks = random_tasks(random.Random(53), self.now, 3000, EpochTask)
+        scores = score_tasks(tasks, self.now, self.profile)
+        ranking = [tasks[i] for i in sorted(range(len(tasks)), key=scores.__getitem__, reverse=True)]
+        self.assertEqual(parallel_rank(tasks, None, self.now, self.profile, workers=2, shard_size=400),
+                         ranking)
+        for limit in [0, 1, 25, 401]:
+            with self.subTest(limit=limit):
+                self.assertEqual(parallel_rank(iter(tasks), limit, self.now, self.profile,
+                                               workers=2, shard_size=400),
+                                 top_tasks(tasks, limit, self.now, self.profile))
+
+    def test_rank_binary_file_reads_shards_in_the_workers(self):
+        """Test ranking a binary file against top_tasks over its tasks in created order."""
+        tasks = random_tasks(random.Random(54), self.now, 2000)
+        # The length prefix of "ui" inside another tag, which only decoding tells apart.
+        tasks[0].tags = ["x\x02\x00\x00\x00ui"]
+        path = os.path.join(self.tmp_dir, "tasks.tbin")
+        write_binary(path, tasks)
+        by_created = sorted(tasks, key=lambda task: (task.created_at, task.id))
+        for profile in [DEFAULT_PROFILE, self.profile]:
+            with self.subTest(profile=profile.name):
+                ranked = rank_binary_file(path, 40, self.now, profile, workers=2, shard_size=300)
+                self.assertEqual([task.id for task in ranked],
+                                 [task.id for task in top_tasks(by_created, 40, self.now, profile)])
+        self.assertEqual(rank_binary_file(os.path.join(self.tmp_dir, "missing.tbin"), 5, self.now), [])
+
+    def test_task_manager_rank_tasks(self):
+        """Test that rank_tasks lists what get_top_priority_tasks does, for each engine."""
+        tasks = random_tasks(random.Random(55), self.now, 1500)
+        for name in ["tasks.json", "tasks.tbin"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                with manager.batch():
+                    for task in tasks:
+                        manager.storage.add_task(task)
+                # Reopened, so the binary store ranks straight from its file.
+                manager = TaskManager(os.path.join(self.tmp_dir, name), read_only=True)
+                ranked = [task.id for task in manager.rank_tasks(30, workers=2, now=self.now)]
+                self.assertEqual(ranked, [task.id for task in manager.get_top_priority_tasks(30, self.now)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,20 @@
+import json
+import os
+import random
+import shutil
+import tempfile
 import unittest
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
-from models import Task, TaskStatus, TaskPriority
-from task_priority import calculate_task_score, sort_tasks_by_importance, get_top_priority_tasks
+from models import CompactTask, EpochTask, Task, TaskStatus, TaskPriority
+import task_priority
+from task_priority import (DEFAULT_PROFILE, ScoringProfile, calculate_task_score, load_profiles,
+                           next_score_change, score_table, score_tasks, top_tasks,
+                           sort_tasks_by_importance, get_top_priority_tasks)
+from task_manager import TaskManager
+from task_table import TaskTable, np
+from tests.scoring_fixtures import TEAM_PROFILE, random_tasks
 
 
 class TaskPriorityTest(unittest.TestCase):
@@ -223,6 +234,169 @@ class TaskPriorityTest(unittest.TestCase):
         default_top_tasks = get_top_priority_tasks(tasks)
         self.assertEqual(len(default_top_tasks), 5)  # Default limit is 5
 
+    def test_score_tasks_matches_calculate_task_score(self):
+        """Test that batch scores equal the scalar score of every task, for each task class."""
+        rng = random.Random(21)
+        for task_class in [Task, CompactTask, EpochTask]:
+            for seed in range(5):
+                with self.subTest(task_class=task_class.__name__, seed=seed):
+                    now = datetime(2030, 1, 1) + timedelta(seconds=rng.randint(0, 10 ** 7),
+                                                           microseconds=rng.randint(0, 999999))
+                    tasks = random_tasks(rng, now, 400, task_class)
+                    self.assertEqual(score_tasks(tasks, now),
+                                     [calculate_task_score(task, now) for task in tasks])
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_score_table_matches_calculate_task_score(self):
+        """Test that column-wise scores equal the scalar score of every row."""
+        rng = random.Random(22)
+        now = datetime(2030, 6, 15, 12, 0, 0, 500)
+        tasks = random_tasks(rng, now, 1000)
+        table = TaskTable()
+        table.rebuild(tasks)
+        for task in tasks[:100]:
+            table.discard(task.id)  # rows move around
+        by_id = {task.id: task for task in tasks}
+        expected = [calculate_task_score(by_id[task_id], now) for task_id in table.ids]
+        self.assertEqual(score_table(table, now).tolist(), expected)
+
+    def test_top_tasks_matches_stable_sort(self):
+        """Test that heap selection returns the head of the stable sort, ties included."""
+        rng = random.Random(23)
+        now = datetime(2030, 3, 1)
+        # Few distinct scores, so most of the selection is tie-breaking.
+        tasks = random_tasks(rng, now, 700)
+        expected = [task for _, task in sorted(
+            ((calculate_task_score(task, now), task) for task in tasks),
+            key=lambda pair: pair[0], reverse=True)]
+        with patch.object(task_priority, "TOP_TASKS_CHUNK", 64):
+            for limit in [0, 1, 5, 63, 64, 65, 700, 1000]:
+                with self.subTest(limit=limit):
+                    self.assertEqual(top_tasks(tasks, limit, now), expected[:limit])
+                    # Any iterable will do, read once.
+                    self.assertEqual(top_tasks(iter(tasks), limit, now), expected[:limit])
+
+    def test_task_manager_top_tasks_streams_the_store(self):
+        """Test TaskManager.get_top_priority_tasks against sorting the whole store."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        manager = TaskManager(os.path.join(tmp_dir, "tasks.json"))
+        with manager.batch():
+            for task in random_tasks(random.Random(24), self.now, 200):
+                manager.storage.add_task(task)
+        ordered = sorted(manager.storage.iter_tasks_by_created(),
+                         key=lambda task: calculate_task_score(task, self.now), reverse=True)
+        with patch.object(manager.storage, "get_all_tasks") as get_all_tasks:
+            top = manager.get_top_priority_tasks(10, now=self.now)
+        get_all_tasks.assert_not_called()
+        self.assertEqual([task.id for task in top], [task.id for task in ordered[:10]])
+
+    def test_sort_keeps_input_order_for_equal_scores(self):
+        """Test that tasks with the same score stay in their input order."""
+        tasks = [Task(f"Task {i}", priority=TaskPriority(i % 2 + 1)) for i in range(10)]
+        ordered = sort_tasks_by_importance(tasks)
+        self.assertEqual([task.title for task in ordered],
+                         [f"Task {i}" for i in [1, 3, 5, 7, 9, 0, 2, 4, 6, 8]])
+
+
+def interpret(fields, task, now):
+    """TEAM_PROFILE-style fields applied the slow, obvious way."""
+    weights = {"LOW": 1, "MEDIUM": 2, "HIGH": 4, "URGENT": 6}
+    weights.update({"LOW": 0, "HIGH": 7})
+    score = weights[task.priority.name] * 10
+    score += {"in_progress": 9, "review": -15, "done": -80}.get(task.status.value, 0)
+    if task.due_date:
+        for limit, points in fields["due_date_bands"]:
+            if task.due_date - now < timedelta(days=limit):
+                score += points
+                break
+    if set(fields["boost_tags"]) & set(task.tags):
+        score += fields["tag_boost"]
+    if now - task.updated_at < timedelta(days=fields["recent_update_days"]):
+        score += fields["recent_update_boost"]
+    return score
+
+
+class ScoringProfileTest(unittest.TestCase):
+    def test_default_profile_from_config_scores_alike(self):
+        """Test that the default weights written as config score like DEFAULT_PROFILE."""
+        profile = ScoringProfile.from_dict({
+            "priority_weights": {"low": 1, "medium": 2, "high": 4, "urgent": 6},
+            "due_date_bands": [[0, 35], [1, 20], [3, 15], [8, 10]],
+            "status_adjustments": {"done": -50, "review": -15},
+            "boost_tags": ["blocker", "critical", "urgent"],
+        })
+        now = datetime(2030, 2, 2, 2, 2)
+        tasks = random_tasks(random.Random(41), now, 500)
+        self.assertEqual(profile.score_tasks(tasks, now), DEFAULT_PROFILE.score_tasks(tasks, now))
+        self.assertEqual(ScoringProfile.from_dict({}).score_tasks(tasks, now),
+                         score_tasks(tasks, now))
+
+    def test_every_path_scores_with_the_profile(self):
+        """Test scalar, batch, column-wise and top-k scoring against a plain reading of the profile."""
+        profile = ScoringProfile.from_dict(TEAM_PROFILE, "team")
+        rng = random.Random(42)
+        for task_class in [Task, CompactTask, EpochTask]:
+            with self.subTest(task_class=task_class.__name__):
+                now = datetime(2030, 4, 4, 4, 4, 4, 4)
+                tasks = random_tasks(rng, now, 600, task_class)
+                expected = [interpret(TEAM_PROFILE, task, now) for task in tasks]
+                self.assertEqual([calculate_task_score(task, now, profile) for task in tasks], expected)
+                self.assertEqual(score_tasks(tasks, now, profile), expected)
+                order = sorted(range(len(tasks)), key=expected.__getitem__, reverse=True)
+                self.assertEqual(top_tasks(tasks, 25, now, profile), [tasks[i] for i in order[:25]])
+                if np is not None:
+                    table = TaskTable()
+                    table.rebuild(tasks)
+                    self.assertEqual(score_table(table, now, profile).tolist(), expected)
+
+    def test_next_score_change_with_the_profile(self):
+        """Test that a profile's score holds until its next_score_change."""
+        profile = ScoringProfile.from_dict(TEAM_PROFILE, "team")
+        rng = random.Random(43)
+        now = datetime(2030, 7, 7)
+        for task in random_tasks(rng, now, 300):
+            change = next_score_change(task, now, profile)
+            if change is not None:
+                self.assertEqual(profile.score(task, change - timedelta(microseconds=1)),
+                                 profile.score(task, now))
+
+    def test_invalid_profiles(self):
+        """Test that a profile the scorer cannot use is rejected with ValueError."""
+        for fields in [{"weights": {}}, {"priority_weights": {"highest": 9}},
+                       {"priority_weights": {"high": "9"}}, {"status_adjustments": {"blocked": 1}},
+                       {"due_date_bands": [[3, 15], [1, 20]]}, {"due_date_bands": [[1]]},
+                       {"boost_tags": "urgent"}, {"tag_boost": True}, []]:
+            with self.subTest(fields=fields):
+                with self.assertRaises(ValueError):
+                    ScoringProfile.from_dict(fields)
+
+    def test_task_manager_reads_profiles_from_the_store_config(self):
+        """Test named and default profiles from <store>.scoring, re-read when it changes."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "tasks.json")
+        manager = TaskManager(path)
+        now = datetime.now()
+        with manager.batch():
+            for task in random_tasks(random.Random(44), now, 200):
+                manager.storage.add_task(task)
+        self.assertIs(manager.scoring_profile(), DEFAULT_PROFILE)
+        with self.assertRaises(ValueError):
+            manager.get_top_priority_tasks(5, now, profile="team")
+
+        with open(path + ".scoring", "w") as f:
+            json.dump({"team": TEAM_PROFILE}, f)
+        team = load_profiles(path + ".scoring")["team"]
+        expected = top_tasks(manager.storage.iter_tasks_by_created(), 10, now, team)
+        self.assertEqual(manager.get_top_priority_tasks(10, now, profile="team"), expected)
+        self.assertIs(manager.scoring_profile(), DEFAULT_PROFILE)
+
+        with open(path + ".scoring", "w") as f:
+            json.dump({"default": TEAM_PROFILE, "unused": {}}, f)
+        os.utime(path + ".scoring", ns=(0, 0))  # a different mtime even on coarse clocks
+        self.assertEqual(manager.get_top_priority_tasks(10, now), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+from task_manager import TaskManager
+from task_query import TaskQuery
+
+NOW = datetime(2030, 3, 15, 12, 0)
+
+QUERIES = [
+    "status=in_progress priority>=high tag=backend due<7d",
+    "status=todo,review sort=due limit=5",
+    "overdue sort=-priority",
+    "tag=ui,db tag=api",
+    "priority=low,urgent due>=today due<=2030-03-20 sort=title",
+    "due>2030-03-16 status=todo",
+    "sort=-due limit=7",
+    "",
+]
+
+
+def sort_value(task, query):
+    value = getattr(task, {"due": "due_date", "priority": "priority", "title": "title"}[query.sort_by])
+    return value.value if query.sort_by == "priority" else value
+
+
+class TaskQueryTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def populate(self, manager, count=400):
+        rng = random.Random(11)
+        with manager.batch():
+            for i in range(count):
+                task = Task(f"Task {i:03d}", priority=rng.choice(list(TaskPriority)),
+                            due_date=NOW + timedelta(days=rng.randint(-10, 10), hours=i % 24) if i % 5 else None,
+                            tags=rng.sample(["backend", "ui", "db", "api"], rng.randint(0, 2)))
+                task.status = rng.choice(list(TaskStatus))
+                manager.storage.add_task(task)
+
+    def brute_force(self, manager, text):
+        query = TaskQuery.parse(text, NOW)
+        tasks = [task for task in manager.storage.get_all_tasks() if query.matches(task, NOW)]
+        if query.sort_by is not None:
+            present = sorted((task for task in tasks if sort_value(task, query) is not None),
+                             key=lambda task: sort_value(task, query), reverse=query.descending)
+            tasks = present + [task for task in tasks if sort_value(task, query) is None]
+        return tasks[:query.limit] if query.limit is not None else tasks
+
+    def test_queries_match_brute_force_on_every_engine(self):
+        """Test planned queries against filtering and sorting every task."""
+        for name in ["tasks.json", "tasks.db"]:
+            manager = TaskManager(os.path.join(self.tmp_dir, name))
+            self.populate(manager)
+            for text in QUERIES:
+                with self.subTest(store=name, query=text):
+                    query = TaskQuery.parse(text, NOW)
+                    result = manager.query(text, now=NOW)
+                    expected = self.brute_force(manager, text)
+                    if query.sort_by is not None:
+                        # Ties come in candidate order, which depends on the plan.
+                        self.assertEqual([sort_value(task, query) for task in result],
+                                         [sort_value(task, query) for task in expected])
+                    if query.limit is None:
+                        self.assertEqual({task.id for task in result}, {task.id for task in expected})
+
+    def test_planner_picks_most_selective_index(self):
+        """Test that the smallest candidate set drives the lookup."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        self.populate(manager)
+        rare = manager.create_task("Rare", tags=["rare"], priority_value=3)
+        manager.update_task_status(rare, "in_progress")
+
+        self.assertEqual(manager.explain_query("status=in_progress priority>=high tag=rare", NOW),
+                         "tag index (1 candidates)")
+        self.assertTrue(manager.explain_query("overdue status=todo,review", NOW).startswith("due index"))
+        self.assertTrue(manager.explain_query("sort=title", NOW).startswith("full scan"))
+        # Done tasks are not in the due-date index, so it cannot serve this query.
+        self.assertFalse(manager.explain_query("due<1d", NOW).startswith("due index"))
+        self.assertEqual([task.id for task in manager.query("tag=rare status=in_progress", NOW)], [rare])
+
+    def test_top_k_keeps_ties_in_store_order(self):
+        """Test that a limit returns the same tasks as a full stable sort."""
+        tasks = [Task(f"T{i}", priority=TaskPriority(i % 2 + 1)) for i in range(20)]
+        query = TaskQuery(sort_by="priority", descending=True, limit=4)
+        self.assertEqual([t.title for t in query.select(tasks, NOW)], ["T1", "T3", "T5", "T7"])
+        query.limit = None
+        self.assertEqual(len(query.select(tasks, NOW)), 20)
+
+    def test_parse_errors(self):
+        """Test that malformed expressions raise ValueError."""
+        for text in ["colour=red", "status=finished", "priority=extreme", "due=2030-01-01",
+                     "due<tomorrow", "sort=size", "priority>=high,low", "limit"]:
+            with self.subTest(query=text):
+                with self.assertRaises(ValueError):
+                    TaskQuery.parse(text, NOW)
+
+
+if __name__ == '__main__':
+    unittest.main()
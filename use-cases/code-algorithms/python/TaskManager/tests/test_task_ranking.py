@@ -0,0 +1,136 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+from task_manager import TaskManager
+from task_priority import ScoringProfile, calculate_task_score, next_score_change, top_tasks
+from task_ranking import TaskRanking
+
+TAGS = ["blocker", "critical", "urgent", "ui", "api"]
+
+
+def random_task(rng, now):
+    task = Task(f"Task {rng.random():.6f}", priority=rng.choice(list(TaskPriority)),
+                due_date=now + timedelta(minutes=rng.randint(-3 * 1440, 10 * 1440))
+                if rng.random() < 0.8 else None,
+                tags=rng.sample(TAGS, rng.randint(0, 2)))
+    task.status = rng.choice(list(TaskStatus))
+    task.updated_at = now - timedelta(minutes=rng.randint(0, 2 * 1440))
+    return task
+
+
+class TaskRankingTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assert_top_matches(self, manager, now):
+        expected = top_tasks(manager.storage.iter_tasks_by_created(), len(manager.storage.tasks), now)
+        for limit in [1, 5, 40, len(expected) + 1]:
+            self.assertEqual([task.id for task in manager.get_top_priority_tasks(limit, now)],
+                             [task.id for task in expected[:limit]])
+
+    def test_ranking_follows_changes_and_time(self):
+        """Test top tasks against scoring the whole store as tasks change and time passes."""
+        rng = random.Random(31)
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"), ranked=True)
+        now = datetime.now()
+        with manager.batch():
+            for _ in range(300):
+                manager.storage.add_task(random_task(rng, now))
+
+        for step in range(60):
+            with self.subTest(step=step):
+                now += timedelta(minutes=rng.choice([1, 30, 240, 1440, 3000]))
+                ids = list(manager.storage.tasks)
+                for _ in range(rng.randint(0, 5)):
+                    task_id = rng.choice(ids)
+                    change = rng.randrange(5)
+                    if change == 0:
+                        manager.update_task_status(task_id, rng.choice(["todo", "review", "done"]))
+                    elif change == 1:
+                        manager.update_task_priority(task_id, rng.randint(1, 4))
+                    elif change == 2:
+                        manager.add_tag_to_task(task_id, rng.choice(TAGS))
+                    elif change == 3:
+                        manager.storage.update_task(
+                            task_id, due_date=now + timedelta(hours=rng.randint(-48, 200)))
+                    elif manager.delete_task(task_id):
+                        ids.remove(task_id)
+                        manager.storage.add_task(random_task(rng, now))
+                self.assert_top_matches(manager, now)
+
+    def test_rollback_and_clock_going_back(self):
+        """Test that a rolled back batch and an earlier `now` leave the ranking right."""
+        rng = random.Random(32)
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"), ranked=True)
+        now = datetime.now()
+        with manager.batch():
+            for _ in range(100):
+                manager.storage.add_task(random_task(rng, now))
+        with self.assertRaises(RuntimeError):
+            with manager.batch():
+                for task_id in list(manager.storage.tasks)[:20]:
+                    manager.update_task_priority(task_id, 4)
+                raise RuntimeError("abort")
+        self.assert_top_matches(manager, now + timedelta(days=2))
+        self.assert_top_matches(manager, now)
+
+    def test_advance_rescores_only_expired_tasks(self):
+        """Test that moving time forward re-scores just the tasks crossing a boundary."""
+        now = datetime(2030, 1, 1)
+        tasks = [Task(f"Task {i}", due_date=now + timedelta(days=30 + i)) for i in range(1000)]
+        for task in tasks:
+            task.updated_at = now - timedelta(days=5)
+        soon = Task("Soon", due_date=now + timedelta(days=8, hours=1))
+        soon.updated_at = now - timedelta(days=5)
+        ranking = TaskRanking(now)
+        ranking.rebuild(tasks + [soon])
+
+        self.assertEqual(ranking.next_boundary(), soon.due_date - timedelta(days=8) + timedelta(microseconds=1))
+        self.assertEqual(ranking.advance(now + timedelta(hours=2)), 1)
+        self.assertEqual(ranking.top(1, now + timedelta(hours=2)), [soon])
+        self.assertEqual(ranking.advance(now + timedelta(hours=3)), 0)
+
+    def test_ranking_with_a_profile(self):
+        """Test a ranking kept under a scoring profile, and one switched to another."""
+        rng = random.Random(34)
+        now = datetime.now()
+        # In the order the storage lists them, which the ranking keeps for ties.
+        tasks = sorted((random_task(rng, now) for _ in range(300)), key=lambda task: (task.created_at, task.id))
+        profile = ScoringProfile.from_dict({"due_date_bands": [[0.25, 40], [2, 25]], "boost_tags": ["ui"],
+                                            "recent_update_days": 0.5}, "team")
+        ranking = TaskRanking(now, profile)
+        ranking.rebuild(tasks)
+        for hours in [0, 1, 7, 30, 90]:
+            later = now + timedelta(hours=hours)
+            self.assertEqual(ranking.top(20, later), top_tasks(tasks, 20, later, profile))
+        ranking.use_profile(ScoringProfile())
+        self.assertEqual(ranking.top(20, later), top_tasks(tasks, 20, later))
+
+    def test_next_score_change(self):
+        """Test that a score holds from `now` until the change next_score_change reports."""
+        rng = random.Random(33)
+        now = datetime(2030, 5, 5, 12, 30)
+        for _ in range(500):
+            task = random_task(rng, now)
+            change = next_score_change(task, now)
+            score = calculate_task_score(task, now)
+            if change is None:
+                self.assertEqual(calculate_task_score(task, now + timedelta(days=400)), score)
+                continue
+            self.assertGreater(change, now)
+            self.assertEqual(calculate_task_score(task, change - timedelta(microseconds=1)), score)
+            between = now + (change - now) * rng.random()
+            self.assertEqual(calculate_task_score(task, between), score)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from task_manager import TaskManager
+from task_client import run_remote, socket_path_for
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TaskServerTest(unittest.TestCase):
+    def setUp(self):
+        """Start a daemon on a scratch store."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "tasks.json")
+        self.seed_id = TaskManager(self.path).create_task("Seed", tags=["seed"])
+        self.server = subprocess.Popen([sys.executable, CLI, "--storage", self.path, "serve"],
+                                       stdout=subprocess.PIPE, text=True)
+        self.assertIn("Serving", self.server.stdout.readline())
+
+    def tearDown(self):
+        self.server.terminate()
+        self.server.wait(10)
+        self.server.stdout.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def remote(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = run_remote(self.path, ["--storage", self.path, *argv])
+        return status, out.getvalue()
+
+    def test_commands_run_on_the_daemon(self):
+        """Test that reads and writes through the socket behave like the CLI."""
+        status, output = self.remote("show", self.seed_id)
+        self.assertEqual(status, 0)
+        self.assertIn("Seed", output)
+
+        status, output = self.remote("create", "From client", "-t", "remote")
+        self.assertIn("Created task with ID", output)
+        self.assertEqual([t.title for t in TaskManager(self.path).storage.get_tasks_by_tag("remote")],
+                         ["From client"])
+
+        status, output = self.remote("list", "--format", "tsv")
+        self.assertEqual(len(output.splitlines()), 3)
+
+    def test_daemon_sees_direct_writes(self):
+        """Test that the daemon reloads after another process saves the store."""
+        TaskManager(self.path).create_task("Written directly")
+        _, output = self.remote("list", "--format", "tsv")
+        self.assertIn("Written directly", output)
+
+    def test_errors_keep_the_daemon_alive(self):
+        """Test parse errors and failures return a status and the daemon carries on."""
+        status, _ = self.remote("priority", self.seed_id, "9")
+        self.assertEqual(status, 2)
+        status, output = self.remote("stats")
+        self.assertEqual(status, 0)
+        self.assertIn("Total tasks: 1", output)
+
+    def test_shutdown_removes_socket(self):
+        """Test that the client falls back once the daemon has stopped."""
+        self.server.terminate()
+        self.server.wait(10)
+        self.assertFalse(os.path.exists(socket_path_for(self.path)))
+        self.assertIsNone(run_remote(self.path, ["stats"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
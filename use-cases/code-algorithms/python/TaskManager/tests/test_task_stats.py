@@ -0,0 +1,96 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from models import Task, TaskPriority, TaskStatus
+from task_index import TaskIndex
+from task_manager import TaskManager
+from task_stats import TaskStats
+
+
+class TaskStatsTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def mutate(self, manager, seed=3):
+        rng = random.Random(seed)
+        now = datetime.now()
+        ids = []
+        for i in range(150):
+            due = (now + timedelta(days=rng.randint(-5, 5))).strftime("%Y-%m-%d") if i % 3 else None
+            ids.append(manager.create_task(f"Task {i}", priority_value=rng.randint(1, 4),
+                                           due_date_str=due))
+        for task_id in rng.sample(ids, 60):
+            manager.update_task_status(task_id, rng.choice(["todo", "in_progress", "review", "done"]))
+        for task_id in rng.sample(ids, 30):
+            manager.update_task_priority(task_id, rng.randint(1, 4))
+        for task_id in rng.sample(ids, 20):
+            manager.update_task_due_date(task_id, (now - timedelta(days=1)).strftime("%Y-%m-%d"))
+        for task_id in rng.sample(ids, 25):
+            manager.delete_task(task_id)
+
+    def test_counters_match_full_scan_for_every_engine(self):
+        """Test the verification mode after random mutations on each engine."""
+        for name in ["tasks.json", "journal.json", "tasks.db", "tasks.tbin"]:
+            with self.subTest(store=name):
+                path = os.path.join(self.tmp_dir, name)
+                engine = "journal" if name == "journal.json" else None
+                manager = TaskManager(path, engine=engine)
+                self.mutate(manager)
+                stats = manager.get_statistics(verify=True)
+                self.assertEqual(stats["total"], 125)
+                TaskManager(path, engine=engine).get_statistics(verify=True)
+
+    def test_statistics_do_not_scan_the_store(self):
+        """Test that get_statistics is answered without listing the tasks."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        self.mutate(manager)
+        with patch.object(manager.storage, "get_all_tasks") as get_all_tasks:
+            manager.get_statistics()
+        get_all_tasks.assert_not_called()
+
+    def test_verify_reports_drift(self):
+        """Test that verify=True raises when the counters disagree with the store."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        manager.create_task("Counted")
+        manager.storage.stats.by_status[TaskStatus.TODO] += 1
+        with self.assertRaises(RuntimeError):
+            manager.get_statistics(verify=True)
+
+    def test_overdue_and_completed_boundaries(self):
+        """Test that overdue is strict and completed-since is inclusive."""
+        now = datetime(2030, 6, 1, 12, 0)
+        due_now = Task("Due now", due_date=now)
+        due_before = Task("Due before", due_date=now - timedelta(seconds=1))
+        done_late = Task("Done late", due_date=now - timedelta(days=3))
+        done_late.status = TaskStatus.DONE
+        done_late.completed_at = now - timedelta(days=7)
+
+        index = TaskIndex()
+        stats = TaskStats(index)
+        for kept in [index, stats]:
+            kept.rebuild([due_now, due_before, done_late])
+        self.assertEqual(stats.overdue_count(now), 1)
+        self.assertEqual(stats.completed_since(now - timedelta(days=7)), 1)
+
+        done_late.completed_at = None
+        done_late.status = TaskStatus.TODO
+        done_late.priority = TaskPriority.URGENT
+        index.reindex(done_late)
+        stats.reindex(done_late)
+        result = stats.statistics(now)
+        self.assertEqual(result["overdue"], 2)
+        self.assertEqual(result["completed_last_week"], 0)
+        self.assertEqual(result["by_priority"]["URGENT"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
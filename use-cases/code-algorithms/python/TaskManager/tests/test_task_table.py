@@ -0,0 +1,108 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from models import Task, TaskPriority, TaskStatus
+from task_manager import TaskManager
+from task_table import np
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TaskTableTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch store with a columnar table attached."""
+        self.tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(self.tmp_dir, "tasks.json")
+        self.manager = TaskManager(path, columnar=True)
+        self.scan_manager = TaskManager(path)
+        self.scan_manager.storage = self.manager.storage
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sqlite_store_ignores_columnar(self):
+        """Test that columnar=True on a SQLite store lists tasks without a table."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.db"), columnar=True)
+        task_id = manager.create_task("Stored in SQLite", priority_value=3)
+        self.assertIsNone(manager.table)
+        self.assertEqual([task.id for task in manager.list_tasks(priority_filter=3)], [task_id])
+        self.assertEqual(manager.get_statistics()["total"], 1)
+
+    def populate(self, count=300):
+        rng = random.Random(7)
+        now = datetime.now()
+        ids = []
+        with self.manager.batch():
+            for i in range(count):
+                task = Task(f"Task {i}", priority=rng.choice(list(TaskPriority)),
+                            due_date=now + timedelta(days=rng.randint(-10, 10)) if i % 4 else None,
+                            tags=rng.sample(["api", "ui", "db"], rng.randint(0, 2)))
+                task.status = rng.choice(list(TaskStatus))
+                if task.status == TaskStatus.DONE and i % 2:
+                    task.completed_at = now - timedelta(days=rng.randint(0, 14))
+                ids.append(self.manager.storage.add_task(task))
+        return rng, ids
+
+    def assertMatchesScan(self):
+        self.assertEqual(self.manager.get_statistics(), self.scan_manager.get_statistics())
+        for kwargs in [{"show_overdue": True}, {"status_filter": "review"},
+                       {"priority_filter": 4}, {}]:
+            columnar = {task.id for task in self.manager.list_tasks(**kwargs)}
+            scanned = {task.id for task in self.scan_manager.list_tasks(**kwargs)}
+            self.assertEqual(columnar, scanned, kwargs)
+
+    def test_matches_full_scan_after_mutations(self):
+        """Test statistics and filters against the object-based implementation."""
+        rng, ids = self.populate()
+        self.assertMatchesScan()
+
+        for task_id in rng.sample(ids, 60):
+            self.manager.update_task_status(task_id, rng.choice(["todo", "done", "review"]))
+            self.manager.update_task_priority(task_id, rng.randint(1, 4))
+        for task_id in rng.sample(ids, 80):
+            self.manager.delete_task(task_id)
+        self.assertMatchesScan()
+
+    def test_tag_rows_follow_moves_and_retags(self):
+        """Test that the rows of each tag stay right when rows are swapped on delete."""
+        first = self.manager.create_task("First", tags=["api"])
+        second = self.manager.create_task("Second", tags=["ui"])
+        third = self.manager.create_task("Third", tags=["ui", "db"])
+
+        self.manager.delete_task(first)
+        self.manager.add_tag_to_task(second, "api")
+        self.manager.remove_tag_from_task(third, "ui")
+
+        table = self.manager.table
+        self.assertEqual(set(table.select_ids(tag="ui")), {second})
+        self.assertEqual(set(table.select_ids(tag="api")), {second})
+        self.assertEqual(set(table.select_ids(tag="db")), {third})
+        self.assertEqual(table.select_ids(tag="missing"), [])
+
+    def test_distinct_tags_cost_only_their_rows(self):
+        """Test that many distinct tags are indexed by their rows, not one mask each."""
+        with self.manager.batch():
+            for i in range(2000):
+                self.manager.storage.add_task(Task(f"Task {i}", tags=[f"tag{i}", "shared"]))
+        table = self.manager.table
+        self.assertEqual(len(table.tag_rows), 2001)
+        # Four bytes per (task, tag) pair, doubled at most by growth, plus
+        # the first four slots of each tag; a bool mask each would be 4 MB.
+        self.assertLessEqual(sum(rows.nbytes for rows, _ in table.tag_rows.values()),
+                             2 * 4 * 4000 + 16 * 2001)
+        self.assertEqual(len(table.select_ids(tag="shared")), 2000)
+        self.assertEqual(table.select_ids(tag="tag1234"), [table.ids[table.rows_with_tag("tag1234")[0]]])
+        self.assertMatchesScan()
+
+    def test_table_grows_past_initial_capacity(self):
+        """Test that the columns are reallocated as the store grows."""
+        self.populate(count=2500)
+        self.assertEqual(self.manager.table.size, 2500)
+        self.assertMatchesScan()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import text_index
+from models import Task
+from task_manager import TaskManager
+from text_index import TextIndex, parse_search, tokenize
+
+WORDS = ["deploy", "deployment", "backend", "frontend", "login", "bug", "docs", "report",
+         "release", "review", "api", "database", "migration", "hotfix", "client"]
+
+SEARCHES = ["backend", "deploy*", "login bug", "docs OR hotfix", "api database OR release review",
+            "dep* back*", "Backend-API", "missing", "review OR missing", "re*"]
+
+
+def matches(task, text):
+    words = set(tokenize(task.title)) | set(tokenize(task.description))
+    for tag in task.tags:
+        words |= set(tokenize(tag))
+    for clause in parse_search(text):
+        if all(any(w.startswith(word) for w in words) if is_prefix else word in words
+               for word, is_prefix in clause):
+            return True
+    return False
+
+
+class TextIndexTest(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for each store."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def populate(self, manager, count=300, seed=5):
+        rng = random.Random(seed)
+        with manager.batch():
+            for i in range(count):
+                manager.storage.add_task(Task(" ".join(rng.sample(WORDS, 3)).title(),
+                                              " ".join(rng.sample(WORDS, 4)),
+                                              tags=rng.sample(WORDS, rng.randint(0, 2))))
+
+    def assert_searches_match(self, manager):
+        tasks = manager.storage.get_all_tasks()
+        for text in SEARCHES:
+            with self.subTest(search=text):
+                expected = {task.id for task in tasks if matches(task, text)}
+                self.assertEqual({task.id for task in manager.search(text)}, expected)
+                top = manager.search(text, limit=5)
+                self.assertEqual(len(top), min(5, len(expected)))
+
+    def test_search_matches_brute_force_on_every_engine(self):
+        """Test AND, OR and prefix searches against checking every task."""
+        for name in ["tasks.json", "tasks.db"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                self.populate(manager)
+                self.assert_searches_match(manager)
+
+    def test_ranking(self):
+        """Test that title matches rank above description matches."""
+        for name in ["tasks.json", "tasks.db"]:
+            with self.subTest(store=name):
+                manager = TaskManager(os.path.join(self.tmp_dir, name))
+                body = manager.create_task("Weekly sync", "prepare the release notes")
+                title = manager.create_task("Release notes", "for the weekly sync")
+                party = manager.create_task("Release party")
+                ranked = [task.id for task in manager.search("release")]
+                self.assertEqual(set(ranked[:2]), {title, party})
+                self.assertEqual(ranked[-1], body)
+                self.assertEqual([task.id for task in manager.search("release notes", limit=1)], [title])
+
+    def test_index_follows_every_change(self):
+        """Test updates, tag changes, deletes and rollbacks against a fresh index."""
+        manager = TaskManager(os.path.join(self.tmp_dir, "tasks.json"))
+        self.populate(manager, count=100)
+        manager.search("backend")  # attach the index before changing anything
+        tasks = manager.storage.get_all_tasks()
+        manager.storage.update_task(tasks[0].id, title="Zeppelin maintenance")
+        manager.add_tag_to_task(tasks[1].id, "zeppelin")
+        manager.add_tag_to_task(tasks[2].id, "zeppelin")
+        manager.remove_tag_from_task(tasks[2].id, "zeppelin")
+        manager.delete_task(tasks[3].id)
+        manager.update_task_status(tasks[4].id, "done")
+        with self.assertRaises(RuntimeError):
+            with manager.batch():
+                manager.storage.update_task(tasks[5].id, title="Rolled back zeppelin")
+                raise RuntimeError("abort")
+
+        self.assertEqual({task.id for task in manager.search("zeppelin")}, {tasks[0].id, tasks[1].id})
+        self.assert_searches_match(manager)
+
+    def test_saved_index_is_reused_and_brought_up_to_date(self):
+        """Test that a later process loads the saved index and re-indexes only changed tasks."""
+        path = os.path.join(self.tmp_dir, "tasks.json")
+        manager = TaskManager(path)
+        self.populate(manager, count=200)
+        manager.search("backend")
+        self.assertTrue(os.path.exists(path + ".search"))
+
+        # Changed by a process that never searched, so the saved index is stale.
+        other = TaskManager(path)
+        changed = other.storage.get_all_tasks()[7]
+        other.storage.update_task(changed.id, title="Quarterly zeppelin report")
+        other.delete_task(other.storage.get_all_tasks()[8].id)
+
+        with patch.object(text_index, "_weights", wraps=text_index._weights) as weights:
+            reloaded = TaskManager(path)
+            self.assertEqual([task.id for task in reloaded.search("zeppelin")], [changed.id])
+        self.assertEqual(weights.call_count, 1)
+        self.assert_searches_match(reloaded)
+
+    def test_damaged_index_is_rebuilt(self):
+        """Test that an unreadable saved index is replaced by a rebuilt one."""
+        path = os.path.join(self.tmp_dir, "tasks.json")
+        manager = TaskManager(path)
+        self.populate(manager, count=50)
+        with open(path + ".search", "wb") as f:
+            f.write(b"not an index")
+        self.assert_searches_match(TaskManager(path))
+
+    def test_saved_index_round_trip(self):
+        """Test that save() and load() give back the same postings, without pickle."""
+        index = TextIndex()
+        tasks = [Task(f"Task {i} {random.Random(i).choice(WORDS)}", tags=["ü-tag"]) for i in range(300)]
+        index.rebuild(tasks)
+        index.discard(tasks[3].id)
+        path = os.path.join(self.tmp_dir, "index")
+        with open(path, "wb") as f:
+            index.save(f)
+        with open(path, "rb") as f:
+            self.assertTrue(f.readline().startswith(b"{"))
+            f.seek(0)
+            loaded = TextIndex.load(f)
+        self.assertEqual((loaded.docs, loaded.stamps, loaded.postings, loaded.retired),
+                         (index.docs, index.stamps, index.postings, index.retired))
+        for text in SEARCHES:
+            self.assertEqual(loaded.search(text), index.search(text))
+
+        with open(path, "rb") as f:
+            truncated = f.read()[:-1]
+        with open(path, "wb") as f:
+            f.write(truncated)
+        with open(path, "rb") as f:
+            self.assertRaises(ValueError, TextIndex.load, f)
+
+    def test_compaction_keeps_results(self):
+        """Test that retired document numbers are dropped without changing results."""
+        index = TextIndex()
+        tasks = [Task(f"Task {i} alpha", tags=["beta"]) for i in range(600)]
+        index.rebuild(tasks)
+        for round_number in range(3):
+            for task in tasks:
+                task.title = f"Task {task.title.split()[1]} gamma{round_number}"
+                index.reindex(task)
+        self.assertLess(len(index.docs), 2 * len(tasks) + 1000)
+        self.assertEqual(len(index.search("gamma2 beta")), 600)
+        self.assertEqual(index.search("alpha"), [])
+        index.compact()
+        self.assertEqual(index.retired, 0)
+        self.assertEqual(index.search("task 17 gamma*"), [tasks[17].id])
+
+    def test_parse_errors(self):
+        """Test that an expression without words raises ValueError."""
+        for text in ["", "OR", "* AND"]:
+            with self.subTest(search=text):
+                with self.assertRaises(ValueError):
+                    parse_search(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
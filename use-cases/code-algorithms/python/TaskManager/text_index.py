@@ -0,0 +1,309 @@
+# task_manager/text_index.py
+import json
+import re
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, insort
+from heapq import nlargest
+from math import log
+from operator import itemgetter
+
+# Letters and digits; everything else separates words, as in SQLite's
+# unicode61 tokenizer, so both engines split text the same way.
+_find_words = re.compile(r"[^\W_]+").findall
+
+# What one occurrence of a word in each field adds to its weight.
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+MAX_WEIGHT = 255
+
+
+def tokenize(text):
+    return _find_words(text.lower()) if text else []
+
+
+def parse_search(text):
+    """Split a search expression into OR-ed clauses of AND-ed words.
+
+    "deploy backend OR hotfix" finds tasks with both deploy and backend,
+    or with hotfix. A trailing * makes a word a prefix: "deploy*" also
+    matches "deployment". AND may be written but is the default.
+    Returns a list of clauses, each a list of (word, is_prefix) pairs.
+    """
+    clauses = [[]]
+    for part in text.split():
+        if part == "OR":
+            clauses.append([])
+        elif part != "AND":
+            words = tokenize(part)
+            for position, word in enumerate(words):
+                is_prefix = part.endswith("*") and position == len(words) - 1
+                clauses[-1].append((word, is_prefix))
+    clauses = [clause for clause in clauses if clause]
+    if not clauses:
+        raise ValueError(f"nothing to search for in {text!r}")
+    return clauses
+
+
+def _stamp(task):
+    text = "\x1f".join([task.title, task.description or "", *task.tags])
+    return zlib.crc32(text.encode())
+
+
+def _weights(task):
+    weights = {}
+    fields = [(task.title, TITLE_WEIGHT), (task.description, DESCRIPTION_WEIGHT)]
+    fields += [(tag, TAG_WEIGHT) for tag in task.tags]
+    for text, weight in fields:
+        for word in tokenize(text):
+            weights[word] = weights.get(word, 0) + weight
+    return weights
+
+
+def _from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+class TextIndex:
+    """Inverted index from the words in task titles, descriptions and tags
+    to the tasks that contain them.
+
+    Every indexed task gets a document number, and a word's posting list
+    is two parallel arrays: the numbers of the tasks containing it, in
+    ascending order, and the word's weight in each. That keeps a million
+    tasks in tens of megabytes where per-word dicts would take gigabytes.
+    A changed or deleted task's number is retired rather than removed
+    from the arrays, and the task is added again under a new number, so
+    postings only ever grow at the end; once retired numbers outnumber
+    live ones the arrays are compacted.
+
+    A checksum of each task's text is kept as well, so rebuild() only
+    re-indexes the tasks that changed. That is what makes a saved index
+    worth loading: it is checked against the store task by task.
+    """
+
+    VERSION = 2
+
+    def __init__(self):
+        self.docs = []  # document number -> task id, None once retired
+        self.stamps = array("L")  # document number -> checksum of its text
+        self.doc_of = {}  # task id -> document number
+        self.postings = {}  # word -> (document numbers, weights)
+        self.words = []  # sorted, for prefix lookups
+        self.retired = 0
+
+    def rebuild(self, tasks):
+        """Bring the index in line with `tasks`; returns how many changed."""
+        changed = 0
+        live = set()
+        new_words = []
+        for task in tasks:
+            live.add(task.id)
+            stamp = _stamp(task)
+            number = self.doc_of.get(task.id)
+            if number is None or self.stamps[number] != stamp:
+                self._add(task, stamp, new_words)
+                changed += 1
+        for task_id in [task_id for task_id in self.doc_of if task_id not in live]:
+            self.discard(task_id)
+            changed += 1
+        if new_words:
+            # One sort instead of an insort per word.
+            self.words = sorted(self.postings)
+        return changed
+
+    def add(self, task):
+        new_words = []
+        self._add(task, _stamp(task), new_words)
+        for word in new_words:
+            insort(self.words, word)
+
+    def reindex(self, task):
+        number = self.doc_of.get(task.id)
+        if number is None or self.stamps[number] != _stamp(task):
+            self.add(task)
+
+    def _add(self, task, stamp, new_words):
+        number = self.doc_of.get(task.id)
+        if number is not None:
+            self._retire(number)
+        number = len(self.docs)
+        self.docs.append(task.id)
+        self.stamps.append(stamp)
+        self.doc_of[task.id] = number
+        for word, weight in _weights(task).items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = (array("L"), array("B"))
+                new_words.append(word)
+            posting[0].append(number)
+            posting[1].append(min(weight, MAX_WEIGHT))
+
+    def discard(self, task_id):
+        number = self.doc_of.pop(task_id, None)
+        if number is not None:
+            self._retire(number)
+
+    def _retire(self, number):
+        self.docs[number] = None
+        self.retired += 1
+        if self.retired > max(len(self.doc_of), 1000):
+            self.compact()
+
+    def compact(self):
+        """Drop retired numbers from the postings and renumber the rest."""
+        renumber = array("l", [-1]) * len(self.docs)
+        docs, stamps = [], array("L")
+        for number, task_id in enumerate(self.docs):
+            if task_id is not None:
+                renumber[number] = len(docs)
+                docs.append(task_id)
+                stamps.append(self.stamps[number])
+        for word, (numbers, weights) in list(self.postings.items()):
+            kept = [(renumber[number], weight) for number, weight in zip(numbers, weights)
+                    if renumber[number] >= 0]
+            if kept:
+                self.postings[word] = (array("L", [number for number, _ in kept]),
+                                       array("B", [weight for _, weight in kept]))
+            else:
+                del self.postings[word]
+        self.docs, self.stamps, self.retired = docs, stamps, 0
+        self.doc_of = {task_id: number for number, task_id in enumerate(docs)}
+        self.words = sorted(self.postings)
+
+    def search(self, query, limit=None):
+        """Ids of the tasks matching `query`, best match first.
+
+        `query` is a search expression or parse_search() output. A task
+        scores the weight of each matched word times how rare the word is
+        (its idf); ties keep indexing order.
+        """
+        clauses = parse_search(query) if isinstance(query, str) else query
+        scores = {}
+        for clause in clauses:
+            for number, score in self._match(clause).items():
+                scores[number] = scores.get(number, 0) + score
+        if limit is None:
+            ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)
+        else:
+            ranked = nlargest(limit, scores.items(), key=itemgetter(1))
+        return [self.docs[number] for number, _ in ranked]
+
+    def _match(self, clause):
+        terms = []
+        for word, is_prefix in clause:
+            term = self._prefix_term(word) if is_prefix else self._word_term(word)
+            if not term:
+                return {}
+            terms.append(term)
+        # Walk the rarest word's matches and look each one up in the rest.
+        terms.sort(key=len)
+        docs = self.docs
+        matches = {}
+        for number, score in terms[0].items():
+            if docs[number] is None:
+                continue
+            for term in terms[1:]:
+                extra = term.get(number)
+                if extra is None:
+                    break
+                score += extra
+            else:
+                matches[number] = score
+        return matches
+
+    def _word_term(self, word):
+        posting = self.postings.get(word)
+        if posting is None:
+            return None
+        numbers, weights = posting
+        return _Posting(numbers, weights, log(1 + len(self.doc_of) / len(numbers)))
+
+    def _prefix_term(self, prefix):
+        # Each task scores its best word with this prefix.
+        scores = {}
+        words = self.words
+        position = bisect_left(words, prefix)
+        while position < len(words) and words[position].startswith(prefix):
+            numbers, weights = self.postings[words[position]]
+            idf = log(1 + len(self.doc_of) / len(numbers))
+            for number, weight in zip(numbers, weights):
+                score = weight * idf
+                if score > scores.get(number, 0):
+                    scores[number] = score
+            position += 1
+        return scores
+
+    def save(self, f):
+        # A JSON header line with the ids and words, then the raw bytes of
+        # the stamps, of every word's document numbers and of every word's
+        # weights, in the header's word order: plain data that loading
+        # cannot turn into code, unlike a pickle.
+        words = list(self.postings)
+        header = {"version": self.VERSION, "byteorder": sys.byteorder,
+                  "itemsize": self.stamps.itemsize, "docs": self.docs,
+                  "words": [[word, len(self.postings[word][0])] for word in words]}
+        f.write(json.dumps(header, separators=(',', ':')).encode() + b"\n")
+        f.write(self.stamps.tobytes())
+        for word in words:
+            f.write(self.postings[word][0].tobytes())
+        for word in words:
+            f.write(self.postings[word][1].tobytes())
+
+    @classmethod
+    def load(cls, f):
+        """Read an index written by save(); raises ValueError if it is not one."""
+        header = json.loads(f.readline())
+        if (not isinstance(header, dict) or header.get("version") != cls.VERSION
+                or header.get("byteorder") != sys.byteorder
+                or header.get("itemsize") != array("L").itemsize):
+            raise ValueError("not a task search index of this version")
+        itemsize = header["itemsize"]
+        docs, words = header["docs"], header["words"]
+        data = memoryview(f.read())
+        total = sum(length for _, length in words)
+        if len(data) != itemsize * (len(docs) + total) + total:
+            raise ValueError("task search index is truncated")
+
+        index = cls()
+        index.docs = docs
+        index.stamps = _from_bytes("L", data[:itemsize * len(docs)])
+        numbers_at = itemsize * len(docs)
+        weights_at = numbers_at + itemsize * total
+        for word, length in words:
+            numbers = _from_bytes("L", data[numbers_at:numbers_at + itemsize * length])
+            weights = _from_bytes("B", data[weights_at:weights_at + length])
+            index.postings[word] = (numbers, weights)
+            numbers_at += itemsize * length
+            weights_at += length
+        index.doc_of = {task_id: number for number, task_id in enumerate(index.docs)
+                        if task_id is not None}
+        index.retired = len(index.docs) - len(index.doc_of)
+        index.words = sorted(index.postings)
+        return index
+
+
+class _Posting:
+    """One word's posting list, scored with its idf."""
+
+    def __init__(self, numbers, weights, idf):
+        self.numbers = numbers
+        self.weights = weights
+        self.idf = idf
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def items(self):
+        idf = self.idf
+        return ((number, weight * idf) for number, weight in zip(self.numbers, self.weights))
+
+    def get(self, number):
+        position = bisect_left(self.numbers, number)
+        if position < len(self.numbers) and self.numbers[position] == number:
+            return self.weights[position] * self.idf
+        return None